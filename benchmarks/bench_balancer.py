@@ -0,0 +1,66 @@
+"""Requests/s and per-replica load for each balancing strategy over uneven mock replicas.
+
+Two fast replicas, one slow replica and one dead URL (connection refused) serve the same model.
+
+Usage: PYTHONPATH=src python benchmarks/bench_balancer.py [--requests 400] [--concurrency 16]
+"""
+from __future__ import annotations
+
+import argparse
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_attack.runtime.balancer import STRATEGIES
+from agent_attack.runtime.mock_server import LatencyModel, start_mock_server
+from agent_attack.runtime.model_clients import ClientConfig, HTTPModelClient
+
+
+def dead_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--fast", type=float, default=0.01, help="Latency of the fast replicas in seconds")
+    parser.add_argument("--slow", type=float, default=0.05, help="Latency of the slow replica in seconds")
+    parser.add_argument("--strategies", nargs="*", default=list(STRATEGIES))
+    args = parser.parse_args()
+
+    servers = [start_mock_server(LatencyModel(mean_s=latency)) for latency in (args.fast, args.fast, args.slow)]
+    urls = [url for _, url in servers] + [dead_url()]
+    labels = {url: name for url, name in zip(urls, ["fast-a", "fast-b", "slow", "dead"])}
+    try:
+        for strategy in args.strategies:
+            client = HTTPModelClient(
+                ClientConfig(
+                    provider="vllm",
+                    model="stub",
+                    base_urls=urls,
+                    balance_strategy=strategy,
+                    backoff_base_s=0.001,
+                    backoff_max_s=0.01,
+                )
+            )
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                list(pool.map(lambda i: client.respond(f"prompt {i}"), range(args.requests)))
+            elapsed = time.perf_counter() - start
+            assert client.balancer is not None
+            per_endpoint = "  ".join(
+                f"{labels[url]}={stats['requests']}/{stats['utilization']:.2f}{'(ejected)' if stats['ejected'] else ''}"
+                for url, stats in client.balancer.stats().items()
+            )
+            print(f"{strategy:<18} {args.requests / elapsed:8.1f} req/s  requests/utilization: {per_endpoint}")
+    finally:
+        for server, _ in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
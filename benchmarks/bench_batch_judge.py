@@ -0,0 +1,91 @@
+"""Re-scoring finished agent results: one judge call at a time vs an offline batch file.
+
+Produces agent trajectories against the in-process mock, writes their judge requests with
+``BatchRescorer``, then answers the same request file twice with a slower mock judge:
+sequentially (the interactive path) and through the file-based ``LocalBatchBackend``.
+Reports nodes/s for both and whether the joined verdicts match.
+
+Usage: PYTHONPATH=src python benchmarks/bench_batch_judge.py [--items 8] [--judge-latency 0.02] [--workers 16]
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from agent_attack.core.interfaces import VictimModel
+from agent_attack.core.types import AttackGoal
+from agent_attack.runtime.batch_judge import BatchRescorer, LocalBatchBackend
+from agent_attack.runtime.benchmark import BenchmarkItem, run_agent_attack
+from agent_attack.runtime.engine import AttackConfig
+from agent_attack.runtime.judge import LLMPromptJudge
+from agent_attack.runtime.mock_server import LatencyModel, start_mock_server
+from agent_attack.runtime.model_clients import ClientConfig, HTTPModelClient
+
+
+def answer_sequentially(client: VictimModel, path: Path) -> dict[str, str]:
+    with path.open("r", encoding="utf-8") as fh:
+        rows = [json.loads(line) for line in fh]
+    return {row["custom_id"]: client.respond_messages(row["body"]["messages"]) for row in rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=8)
+    parser.add_argument("--max-budget", type=int, default=12)
+    parser.add_argument("--judge-latency", type=float, default=0.02, help="Judge mock latency per call in seconds")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent calls of the local batch backend")
+    args = parser.parse_args()
+
+    config = AttackConfig(
+        seed_prompt="",
+        objective="benchmark",
+        subgoals=["trigger refusal", "recover"],
+        constraints=["high-level only"],
+        target_provider="mock",
+        target_model="mock",
+        judge_provider="mock",
+        judge_model="mock",
+        max_budget=args.max_budget,
+    )
+    goal = AttackGoal(objective=config.objective, subgoals=list(config.subgoals), constraints=list(config.constraints))
+    items = [BenchmarkItem(i, f"seed prompt {i}", None, None, None, None) for i in range(args.items)]
+    records = run_agent_attack(items, config)
+
+    server, base_url = start_mock_server(LatencyModel(mean_s=args.judge_latency))
+    try:
+        client = HTTPModelClient(ClientConfig(provider="vllm", model="mock", base_url=base_url, temperature=0.0))
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / "requests.jsonl"
+            sequential = copy.deepcopy(records)
+            rescorer = BatchRescorer(LLMPromptJudge(client), goal)
+            nodes = rescorer.write(sequential, path, "mock")
+            start = time.perf_counter()
+            rescorer.apply(answer_sequentially(client, path))
+            sequential_s = time.perf_counter() - start
+
+            batched = copy.deepcopy(records)
+            rescorer = BatchRescorer(LLMPromptJudge(client), goal)
+            rescorer.write(batched, path, "mock")
+            start = time.perf_counter()
+            summary = rescorer.submit(LocalBatchBackend(client, workdir, workers=args.workers), path, poll_interval_s=0.01)
+            batch_s = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    def verdicts(results: list[dict]) -> list[tuple[list[str], float]]:
+        return [(node["tags"], node["score"]) for record in results for node in record["trajectory"]]
+
+    print(f"sequential  nodes={nodes:>4}  elapsed={sequential_s:6.3f}s  nodes/s={nodes / sequential_s:7.1f}")
+    print(
+        f"batch       nodes={nodes:>4}  elapsed={batch_s:6.3f}s  nodes/s={nodes / batch_s:7.1f}  "
+        f"judged={summary['judged']}  missing={summary['missing']}  "
+        f"verdicts={'same' if verdicts(sequential) == verdicts(batched) else 'differ'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Campaign throughput by worker-process count, plus lease takeover and merge checks.
+
+Each item burns ``--work-ms`` of CPU (the GIL-bound part of an item), so extra processes
+should scale throughput. Before timing, the script checks on a scratch campaign that:
+
+* a fresh lease is never taken over, a stale one is, and the new owner resumes from the ids
+  the dead owner completed;
+* ``merge`` keeps one record per id, in id order, preferring a success over an error;
+* ``run_campaign`` finishes a campaign with a dead worker's stale lease, without redoing its
+  completed items.
+
+It exits non-zero on any failed check.
+
+Usage: PYTHONPATH=src python benchmarks/bench_campaign.py [--items 128] [--work-ms 20] [--processes 1 2 4]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+from agent_attack.runtime.benchmark import JsonlResultWriter, read_jsonl_results
+from agent_attack.runtime.campaign import Campaign, run_campaign
+
+
+def run_items(items: int, work_ms: float, shard: int, num_shards: int, output: Path, done: set[int]) -> int:
+    """Shard runner: item ``i`` belongs to shard ``i % num_shards``."""
+    count = 0
+    with JsonlResultWriter(output) as writer:
+        for sample_id in range(shard, items, num_shards):
+            if sample_id in done:
+                continue
+            deadline = time.perf_counter() + work_ms / 1000
+            while time.perf_counter() < deadline:
+                pass
+            writer.write({"id": sample_id, "owner": output.name})
+            count += 1
+    return count
+
+
+def write_records(path: Path, records: list[dict]) -> None:
+    with JsonlResultWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+
+
+def make_stale(campaign: Campaign, shard: int) -> None:
+    lease = campaign.root / "leases" / f"{shard}.lease"
+    past = time.time() - 10 * campaign.lease_timeout_s
+    os.utime(lease, (past, past))
+
+
+def check_takeover_and_merge(root: Path) -> list[str]:
+    failures = []
+    dead = Campaign(root, 2, lease_timeout_s=5.0, owner="dead")
+    alive = Campaign(root, 2, lease_timeout_s=5.0, owner="alive")
+    if dead.claim() != 0:
+        return ["first claim did not get shard 0"]
+    write_records(dead.shard_output(0), [{"id": 0}, {"id": 2}, {"id": 4, "error": "TimeoutError: boom"}])
+    if alive.claim() != 1:
+        failures.append("fresh lease on shard 0 was taken over")
+    make_stale(dead, 0)
+    if alive.claim() != 0:
+        failures.append("stale lease on shard 0 was not taken over")
+    if alive.completed_ids(0) != {0, 2}:
+        failures.append(f"resume ids {sorted(alive.completed_ids(0))}, expected [0, 2]")
+    dead.release(0)
+    if not (root / "leases" / "0.lease").exists():
+        failures.append("former owner released the new owner's lease")
+    write_records(alive.shard_output(0), [{"id": 4}, {"id": 6}, {"id": 2}])
+    write_records(alive.shard_output(1), [{"id": 3}, {"id": 1}])
+    alive.complete(0, 2, time.time())
+    alive.complete(1, 2, time.time())
+
+    output = root / "merged.json"
+    summary = alive.merge(output)
+    merged = json.loads(output.read_text(encoding="utf-8"))
+    if [record["id"] for record in merged] != [0, 1, 2, 3, 4, 6]:
+        failures.append(f"merged ids {[record['id'] for record in merged]}, expected [0, 1, 2, 3, 4, 6]")
+    if any("error" in record for record in merged):
+        failures.append("an error record won over a later success")
+    if summary["duplicates_dropped"] != 2 or summary["errors"] != 0:
+        failures.append(f"merge summary {summary}")
+    if not alive.is_done() or alive.claim() is not None:
+        failures.append("finished campaign still has claimable shards")
+    return failures
+
+
+def check_run_with_stale_lease(root: Path, items: int, timeout_s: float = 60.0) -> list[str]:
+    dead = Campaign(root, 4, lease_timeout_s=1.0, owner="dead")
+    if dead.claim() != 0:
+        return ["first claim did not get shard 0"]
+    write_records(dead.shard_output(0), [{"id": 0, "owner": "dead"}, {"id": 4, "owner": "dead"}])
+    make_stale(dead, 0)
+    # A takeover that never happens makes run_campaign wait forever, so it runs under a deadline.
+    result: list[Campaign] = []
+    runner = threading.Thread(
+        target=lambda: result.append(
+            run_campaign(root, 4, partial(run_items, items, 0.0), processes=2, lease_timeout_s=1.0, poll_interval_s=0.05)
+        ),
+        daemon=True,
+    )
+    runner.start()
+    runner.join(timeout_s)
+    if not result:
+        return [f"run_campaign did not finish within {timeout_s:.0f}s despite the stale lease"]
+    summary = result[0].merge(root / "merged.json")
+    merged = json.loads((root / "merged.json").read_text(encoding="utf-8"))
+    failures = []
+    if [record["id"] for record in merged] != list(range(items)):
+        failures.append(f"run_campaign merged {len(merged)} records, expected ids 0..{items - 1} once each")
+    redone = [
+        record["id"]
+        for path in (root / "shards").glob("0.*.jsonl")
+        if ".dead." not in path.name
+        for record in read_jsonl_results(path)
+        if record["id"] in (0, 4)
+    ]
+    if redone:
+        failures.append(f"items {redone} completed by the dead worker were run again")
+    if summary["duplicates_dropped"]:
+        failures.append(f"{summary['duplicates_dropped']} duplicates after a clean takeover")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=128)
+    parser.add_argument("--work-ms", type=float, default=20.0, help="CPU time per item")
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--processes", type=int, nargs="*", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = check_takeover_and_merge(Path(tmp) / "takeover")
+        failures += check_run_with_stale_lease(Path(tmp) / "stale", 16)
+    if failures:
+        sys.exit("campaign checks failed:\n  " + "\n  ".join(failures))
+
+    for processes in args.processes:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            campaign = run_campaign(
+                tmp, args.shards, partial(run_items, args.items, args.work_ms), processes=processes, poll_interval_s=0.05
+            )
+            elapsed = time.perf_counter() - start
+            summary = campaign.merge(Path(tmp) / "merged.json")
+        print(
+            f"processes={processes:>2}  shards={args.shards}  items={summary['records']}  "
+            f"elapsed={elapsed:6.3f}s  items/s={summary['records'] / elapsed:7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Items/s of ``run_agent_attack`` at several worker counts against the local mock server.
+
+Usage: PYTHONPATH=src python benchmarks/bench_concurrency.py [--items 64] [--latency 0.05]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from agent_attack.runtime.benchmark import BenchmarkItem, run_agent_attack
+from agent_attack.runtime.engine import AttackConfig
+from agent_attack.runtime.mock_server import LatencyModel, start_mock_server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub server latency per call in seconds")
+    parser.add_argument("--max-budget", type=int, default=6)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(LatencyModel(mean_s=args.latency))
+    items = [
+        BenchmarkItem(sample_id=i, original_prompt=f"prompt {i}", image_path=None, style=None, main_category=None, subcategory=None)
+        for i in range(args.items)
+    ]
+    cfg = AttackConfig(
+        seed_prompt="",
+        objective="benchmark",
+        subgoals=[],
+        constraints=[],
+        target_provider="vllm",
+        target_model="stub",
+        judge_provider="vllm",
+        judge_model="stub",
+        target_base_url=base_url,
+        judge_base_url=base_url,
+        max_budget=args.max_budget,
+    )
+    try:
+        for workers in args.workers:
+            start = time.perf_counter()
+            outputs = run_agent_attack(items, cfg, concurrency=workers)
+            elapsed = time.perf_counter() - start
+            errors = sum(1 for o in outputs if "error" in o)
+            print(f"workers={workers:>3}  items={len(outputs)}  errors={errors}  {len(outputs) / elapsed:8.2f} items/s")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
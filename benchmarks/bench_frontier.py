@@ -0,0 +1,116 @@
+"""Frontier micro-benchmark: ``SortedFrontier`` (sort + truncate per step) vs ``BoundedFrontier``.
+
+Simulates the planner loop: pop one node, push ``--children`` scored children, trim.
+Both frontiers must yield the same pop order: the script checks tie-breaking (equal scores pop
+in insertion order) and eviction (the worst, then newest, node goes first) on small cases, and
+the pop order of every timed run, and exits non-zero on any mismatch.
+
+Usage: PYTHONPATH=src python benchmarks/bench_frontier.py [--beam-widths 4 64 1024]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+
+from agent_attack.core.types import AttackGoal, SearchNode, SearchState
+from agent_attack.planner.frontier import BoundedFrontier, Frontier, SortedFrontier
+
+
+def simulate(frontier: Frontier, steps: list[list[SearchNode]], root: SearchNode) -> list[str]:
+    frontier.push(root)
+    popped: list[str] = []
+    for children in steps:
+        if not frontier:
+            break
+        popped.append(frontier.pop().node_id)
+        for child in children:
+            frontier.push(child)
+        frontier.trim()
+    return popped
+
+
+def check_ties_and_eviction() -> list[str]:
+    """Small cases with a known answer, run against both frontiers."""
+    goal, state = AttackGoal(objective="check"), SearchState()
+
+    def node(name: str, score: float) -> SearchNode:
+        return SearchNode(node_id=name, parent_id=None, depth=0, goal=goal, state=state, score=score)
+
+    cases = [
+        # name, capacity, pushed (id, score), expected pop order
+        ("equal scores pop in insertion order", 8, [("a", 0.5), ("b", 0.5), ("c", 0.5)], ["a", "b", "c"]),
+        ("newest tie is evicted", 2, [("a", 0.5), ("b", 0.5), ("c", 0.5)], ["a", "b"]),
+        ("worst is evicted before a newer better node", 2, [("a", 0.1), ("b", 0.9), ("c", 0.5)], ["b", "c"]),
+        ("ties rank below higher scores", 3, [("a", 0.0), ("b", 1.0), ("c", 0.0), ("d", 1.0)], ["b", "d", "a"]),
+        ("zero capacity keeps nothing", 0, [("a", 1.0)], []),
+    ]
+    failures = []
+    for label, capacity, pushed, expected in cases:
+        for cls in (SortedFrontier, BoundedFrontier):
+            frontier = cls(capacity)
+            for name, score in pushed:
+                frontier.push(node(name, score))
+            frontier.trim()
+            popped = []
+            while frontier:
+                peeked = frontier.peek().node_id
+                popped.append(frontier.pop().node_id)
+                if peeked != popped[-1]:
+                    failures.append(f"{cls.__name__}: {label}: peek {peeked} but pop {popped[-1]}")
+            if popped != expected:
+                failures.append(f"{cls.__name__}: {label}: popped {popped}, expected {expected}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--beam-widths", type=int, nargs="*", default=[4, 64, 1024])
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--children", type=int, default=32)
+    args = parser.parse_args()
+
+    failures = check_ties_and_eviction()
+    rng = random.Random(0)
+    root = SearchNode(node_id="root", parent_id=None, depth=0, goal=AttackGoal(objective="bench"), state=SearchState())
+    # Three score levels make most comparisons ties, so tie-breaking decides the order.
+    tied = [
+        [
+            SearchNode(node_id=f"{step}.{i}", parent_id=None, depth=0, goal=root.goal, state=root.state, score=rng.choice((0.0, 0.5, 1.0)))
+            for i in range(args.children)
+        ]
+        for step in range(min(args.steps, 200))
+    ]
+    for beam in args.beam_widths:
+        orders = {name: simulate(cls(beam), tied, root) for name, cls in (("sorted", SortedFrontier), ("bounded", BoundedFrontier))}
+        if orders["sorted"] != orders["bounded"]:
+            failures.append(f"beam={beam}: pop order with tied scores differs")
+    if failures:
+        sys.exit("BoundedFrontier disagrees with SortedFrontier:\n  " + "\n  ".join(failures))
+
+    steps = [
+        [
+            SearchNode(node_id=f"{step}.{i}", parent_id=None, depth=0, goal=root.goal, state=root.state, score=round(rng.uniform(-1, 1), 2))
+            for i in range(args.children)
+        ]
+        for step in range(args.steps)
+    ]
+    for beam in args.beam_widths:
+        timings: dict[str, float] = {}
+        orders: dict[str, list[str]] = {}
+        for name, cls in (("sorted", SortedFrontier), ("bounded", BoundedFrontier)):
+            start = time.perf_counter()
+            orders[name] = simulate(cls(beam), steps, root)
+            timings[name] = time.perf_counter() - start
+        same = orders["sorted"] == orders["bounded"]
+        print(
+            f"beam={beam:>5}  sorted={timings['sorted'] * 1e3:8.1f} ms  bounded={timings['bounded'] * 1e3:8.1f} ms  "
+            f"speedup={timings['sorted'] / timings['bounded']:5.2f}x  same_order={same}"
+        )
+        if not same:
+            sys.exit(f"beam={beam}: BoundedFrontier pop order differs from SortedFrontier")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Bytes of search-state bookkeeping per explored node: list copies vs. shared ``TurnChain``.
+
+Each level expands ``--branching`` children (as ``FrontierPlanner._expand`` does) and
+descends through the first one, retaining every node like the planner's ``explored`` list.
+Response strings are allocated up front, so only history/action storage is measured.
+Before measuring, the script checks that ``TurnChain`` reads like the list it replaces
+(equality, indexing, slicing, iteration, ``repr``) and exits non-zero if it does not.
+
+Usage: PYTHONPATH=src python benchmarks/bench_history_memory.py [--depths 5 10 20]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tracemalloc
+from typing import Callable
+
+from agent_attack.core.types import SearchState, TurnChain
+
+
+def copy_child(state: SearchState, prompt: str, response: str, action: str) -> SearchState:
+    child = SearchState()
+    child.history = [*state.history, prompt, response]  # type: ignore[assignment]
+    child.attempted_actions = [*state.attempted_actions, action]  # type: ignore[assignment]
+    child.budget_used = state.budget_used + 1
+    return child
+
+
+def chain_child(state: SearchState, prompt: str, response: str, action: str) -> SearchState:
+    child = SearchState()
+    child.history = state.history.append(prompt, response)
+    child.attempted_actions = state.attempted_actions.append(action)
+    child.budget_used = state.budget_used + 1
+    return child
+
+
+def check_turn_chain() -> list[str]:
+    """Compare a ``TurnChain`` built by appends, and one branched off it, with plain lists."""
+    failures: list[str] = []
+    values = ["seed", "p1", "r1", "p2", "r2"]
+    chain = TurnChain(values[:1]).append(*values[1:3]).append(*values[3:])
+    branch = chain.append("p3")
+    sibling = chain.append("p3-other")
+
+    def expect(label: str, got: object, want: object) -> None:
+        if got != want:
+            failures.append(f"{label}: got {got!r}, expected {want!r}")
+
+    expect("len", len(chain), len(values))
+    expect("list", list(chain), values)
+    expect("eq list", chain == values, True)
+    expect("eq tuple", chain == tuple(values), True)
+    expect("eq chain", chain == TurnChain(values), True)
+    expect("ne shorter", chain == values[:-1], False)
+    expect("ne other", branch == sibling, False)
+    expect("parent unchanged", list(chain), values)
+    expect("branch", list(branch), [*values, "p3"])
+    expect("repr", repr(chain), repr(values))
+    expect("repr empty", repr(TurnChain()), "[]")
+    expect("reversed", list(reversed(chain)), values[::-1])
+    for index in range(-len(values), len(values)):
+        expect(f"index {index}", chain[index], values[index])
+    for window in (slice(1, 3), slice(None, None, -1), slice(-2, None), slice(10, 20)):
+        expect(f"slice {window}", chain[window], values[window])
+    for index in (len(values), -len(values) - 1):
+        try:
+            chain[index]
+        except IndexError:
+            pass
+        else:
+            failures.append(f"index {index}: no IndexError")
+    expect("count", chain.count("p1"), 1)
+    expect("index()", chain.index("r2"), 4)
+    expect("contains", "p2" in chain, True)
+    return failures
+
+
+def measure(make_child: Callable[[SearchState, str, str, str], SearchState], depth: int, branching: int, texts: list[str]) -> float:
+    root = SearchState()
+    root.history = TurnChain(["seed"]) if make_child is chain_child else ["seed"]  # type: ignore[assignment]
+    tracemalloc.start()
+    explored = [root]
+    node = root
+    for level in range(depth):
+        children = [
+            make_child(node, texts[2 * (level * branching + b)], texts[2 * (level * branching + b) + 1], f"action_{b}")
+            for b in range(branching)
+        ]
+        explored.extend(children)
+        node = children[0]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / (len(explored) - 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", type=int, nargs="*", default=[5, 10, 20])
+    parser.add_argument("--branching", type=int, default=6)
+    args = parser.parse_args()
+
+    failures = check_turn_chain()
+    if failures:
+        sys.exit("TurnChain differs from list:\n  " + "\n  ".join(failures))
+    for depth in args.depths:
+        texts = [f"turn {i} " + "x" * 400 for i in range(2 * depth * args.branching)]
+        listed = measure(copy_child, depth, args.branching, texts)
+        chained = measure(chain_child, depth, args.branching, texts)
+        print(f"depth={depth:>3}  list copy={listed:8.0f} B/node  turn chain={chained:8.0f} B/node  ratio={listed / chained:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
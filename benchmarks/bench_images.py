@@ -0,0 +1,132 @@
+"""Image encode time and peak memory per 1k images: per-call encoding vs the cached ImageEncoder.
+
+Writes ``--images`` synthetic PNGs, then reports, scaled to 1k images:
+
+* ``uncached``: read + base64 on every use (``--uses`` uses per image, like one call per tree node)
+* ``cold`` / ``warm``: first and repeated passes through one ``ImageEncoder``
+* ``prefetch``: wall time of a loop doing ``--work-ms`` of other work per item, with and without
+  background prefetch of the next items' images, and how much of the cold encode time was hidden.
+  ``--work-ms`` defaults to the measured cold encode time per image: with much longer work the
+  encode is noise, with much shorter work there is nothing to overlap it with
+* ``resize``: cold pass with ``--max-side`` downscaling (only when Pillow is installed)
+
+Usage: PYTHONPATH=src python benchmarks/bench_images.py [--images 100] [--side 1024]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import struct
+import tempfile
+import time
+import tracemalloc
+import zlib
+from pathlib import Path
+from typing import Callable
+
+from agent_attack.runtime.benchmark import BenchmarkItem, prefetch_images
+from agent_attack.runtime.images import ImageEncoder, _encode_file
+
+
+def write_png(path: Path, side: int, seed: int) -> None:
+    noise = os.urandom(side * 3)
+    rows = b"".join(b"\x00" + noise[(seed + y) % side :] + noise[: (seed + y) % side] for y in range(side))
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0)
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 1)) + chunk(b"IEND", b""))
+
+
+def measure(make: Callable[[], Callable[[], None]]) -> tuple[float, float]:
+    """Time one run of ``make()()``, then trace peak memory of a second, identical run."""
+    fn = make()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    fn = make()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def report(label: str, elapsed: float, peak_mb: float, images: int) -> None:
+    scale = 1000 / images
+    print(f"{label:<20} {elapsed * scale * 1e3:9.1f} ms/1k images  peak {peak_mb:7.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--side", type=int, default=1024, help="Width and height of each synthetic PNG")
+    parser.add_argument("--uses", type=int, default=8, help="Requests per image (e.g. nodes in one item's search tree)")
+    parser.add_argument("--work-ms", type=float, default=None, help="Other per-item work overlapping with prefetch (default: one cold encode)")
+    parser.add_argument("--lookahead", type=int, default=4)
+    parser.add_argument("--max-side", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [Path(tmp) / f"{i}.png" for i in range(args.images)]
+        for i, path in enumerate(paths):
+            write_png(path, args.side, i)
+        size_mb = sum(path.stat().st_size for path in paths) / 2**20
+        print(f"{args.images} images of {args.side}x{args.side}, {size_mb:.1f} MiB on disk, {args.uses} uses each")
+
+        def uncached() -> Callable[[], None]:
+            def run() -> None:
+                for path in paths:
+                    for _ in range(args.uses):
+                        _encode_file(str(path), None)
+
+            return run
+
+        def cached(warm: bool) -> Callable[[], Callable[[], None]]:
+            def make() -> Callable[[], None]:
+                encoder = ImageEncoder()
+                if warm:
+                    for path in paths:
+                        encoder.encode(path)
+                return lambda: [encoder.encode(path) for path in paths for _ in range(args.uses)]
+
+            return make
+
+        report("uncached", *measure(uncached), args.images)
+        cold_s, cold_peak = measure(cached(False))
+        report("cold (cached)", cold_s, cold_peak, args.images)
+        report("warm (cached)", *measure(cached(True)), args.images)
+
+        encode_ms = cold_s * 1000 / args.images
+        work_ms = encode_ms if args.work_ms is None else args.work_ms
+        items = [BenchmarkItem(i, "prompt", str(path), None, None, None) for i, path in enumerate(paths)]
+        walls: list[float] = []
+        for lookahead in (0, args.lookahead):
+            encoder = ImageEncoder()
+            start = time.perf_counter()
+            for item in prefetch_images(items, encoder, lookahead):
+                assert item.image_path is not None
+                encoder.encode(item.image_path)
+                time.sleep(work_ms / 1000)
+            elapsed = time.perf_counter() - start
+            walls.append(elapsed)
+            print(f"{f'prefetch={lookahead}':<20} {elapsed * 1000 / args.images * 1e3:9.1f} ms/1k items wall  ({work_ms:.2f} ms other work per item)")
+            encoder.close()
+        hidden = (walls[0] - walls[1]) / cold_s
+        print(f"prefetch hid {hidden:.0%} of {encode_ms:.2f} ms cold encode per image")
+
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            print("resize               skipped (Pillow not installed)")
+        else:
+            def resized() -> Callable[[], None]:
+                encoder = ImageEncoder(max_side=args.max_side)
+                return lambda: [encoder.encode(path) for path in paths]
+
+            report(f"resize {args.max_side}px", *measure(resized), args.images)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Judge prompt tokens by search depth, unbounded vs bounded context, plus verdict agreement.
+
+For each depth a synthetic node carries that many past actions and is judged on a response of
+``--response-chars`` characters. Prompt sizes use the local ``estimate_tokens``. Then
+``--samples`` responses are judged with both prompts and the share of identical tag sets is
+reported; point ``--judge-base-url`` at an OpenAI-compatible judge for a meaningful number
+(the default mock judge answers by prompt hash, so there it only exercises the path).
+
+Usage: PYTHONPATH=src python benchmarks/bench_judge_context.py [--judge-base-url URL --judge-model M]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from agent_attack.core.types import AttackGoal, SearchNode, SearchState
+from agent_attack.runtime.judge import UNBOUNDED_CONTEXT, JudgeContext, LLMPromptJudge
+from agent_attack.runtime.mock_server import start_mock_server
+from agent_attack.runtime.model_clients import ClientConfig, HTTPModelClient
+from agent_attack.runtime.tokens import estimate_tokens
+
+ACTIONS = ["reframe_goal", "ask_clarification", "gentle_context_bridge", "role_play", "hypothetical", "step_back"]
+WORDS = "the model explains policy boundaries and then describes general safety considerations in detail".split()
+
+
+def node_at(depth: int, rng: random.Random) -> SearchNode:
+    actions = [rng.choice(ACTIONS) for _ in range(depth)]
+    goal = AttackGoal(objective="Probe policy consistency", constraints=["no harmful content", "high-level only"])
+    return SearchNode(node_id=f"d{depth}", parent_id=None, depth=depth, goal=goal, state=SearchState(attempted_actions=actions))
+
+
+def response_text(chars: int, rng: random.Random) -> str:
+    words: list[str] = []
+    while sum(len(word) + 1 for word in words) < chars:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 5, 10, 20, 40])
+    parser.add_argument("--response-chars", type=int, default=6000)
+    parser.add_argument("--last-actions", type=int, default=5)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--window", choices=["head", "head_tail"], default="head_tail")
+    parser.add_argument("--samples", type=int, default=40)
+    parser.add_argument("--judge-base-url", default=None)
+    parser.add_argument("--judge-model", default="mock")
+    parser.add_argument("--judge-api-key", default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    bounded = JudgeContext(last_actions=args.last_actions, response_max_tokens=args.max_tokens, response_window=args.window)
+    response = response_text(args.response_chars, rng)
+    print(f"context: last {args.last_actions} actions, response <= {args.max_tokens} tokens ({args.window})")
+    for depth in args.depths:
+        node = node_at(depth, rng)
+        full = estimate_tokens(LLMPromptJudge._build_judge_prompt(node, response, UNBOUNDED_CONTEXT))
+        start = time.perf_counter()
+        small = estimate_tokens(LLMPromptJudge._build_judge_prompt(node, response, bounded))
+        build_us = (time.perf_counter() - start) * 1e6
+        print(f"depth={depth:<4} full={full:6d} tok  bounded={small:5d} tok  savings={1 - small / full:6.1%}  build+estimate={build_us:7.0f} us")
+
+    server = None
+    base_url = args.judge_base_url
+    if base_url is None:
+        server, base_url = start_mock_server()
+    client = HTTPModelClient(ClientConfig(provider="vllm", model=args.judge_model, api_key=args.judge_api_key, base_url=base_url, temperature=0.0))
+    judge = LLMPromptJudge(client, context=bounded, validation_rate=1.0)
+    try:
+        for _ in range(args.samples):
+            judge.parse(response_text(args.response_chars, rng), node_at(rng.choice(args.depths), rng))
+    finally:
+        if server is not None:
+            server.shutdown()
+    stats = judge.stats()
+    print(
+        f"judged {stats['prompts']} bounded prompts: tokens {stats['prompt_tokens']} vs {stats['full_prompt_tokens']} "
+        f"({stats['token_savings']:.1%} saved), agreement {stats['agreement']:.1%} over {stats['validated']} re-judged"
+    )
+
+
+if __name__ == "__main__":
+    main()
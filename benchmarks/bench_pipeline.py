@@ -0,0 +1,99 @@
+"""Serial vs pipelined search: nodes/s, speculation hit rate and wasted victim calls.
+
+Victim and judge run on separate mock servers with their own latency, so judging one node
+can overlap the victim calls of the next. Each mode searches the same seeds; ``tree`` reports
+whether the explored tree (depth, action, score per node) matches serial mode. ``pipeline``
+must explore the same tree, misspeculations included, and the script exits non-zero if it
+does not; ``pipeline_keep`` keeps misspeculated nodes and may differ by design.
+
+Usage: PYTHONPATH=src python benchmarks/bench_pipeline.py [--items 4] [--victim-latency 0.03] [--judge-latency 0.03]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from agent_attack.core.types import SearchNode
+from agent_attack.runtime.engine import AttackConfig, AttackSession
+from agent_attack.runtime.mock_server import LatencyModel, start_mock_server
+
+MODES = {
+    "serial": {},
+    "pipeline": {"pipeline": True},
+    "pipeline_keep": {"pipeline": True, "pipeline_keep_misspeculated": True},
+}
+# Modes that must explore exactly the serial tree.
+SAME_TREE = {"serial", "pipeline"}
+
+
+def tree_shape(explored: list[SearchNode]) -> list[tuple[int, str | None, float]]:
+    return [(node.depth, node.action.name if node.action else None, round(node.score, 6)) for node in explored]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=4)
+    parser.add_argument("--max-budget", type=int, default=24)
+    parser.add_argument("--beam-width", type=int, default=4)
+    parser.add_argument("--expansion-workers", type=int, default=4)
+    parser.add_argument("--victim-latency", type=float, default=0.03, help="Victim mock latency per call in seconds")
+    parser.add_argument("--judge-latency", type=float, default=0.03, help="Judge mock latency per call in seconds")
+    args = parser.parse_args()
+
+    victim_server, victim_url = start_mock_server(LatencyModel(mean_s=args.victim_latency))
+    judge_server, judge_url = start_mock_server(LatencyModel(mean_s=args.judge_latency))
+    baseline: list[list[tuple[int, str | None, float]]] = []
+    failures: list[str] = []
+    try:
+        for mode, options in MODES.items():
+            session = AttackSession(
+                AttackConfig(
+                    seed_prompt="",
+                    objective="benchmark",
+                    subgoals=["trigger refusal", "recover"],
+                    constraints=["high-level only"],
+                    target_provider="vllm",
+                    target_model="mock",
+                    judge_provider="vllm",
+                    judge_model="mock",
+                    target_base_url=victim_url,
+                    judge_base_url=judge_url,
+                    max_budget=args.max_budget,
+                    beam_width=args.beam_width,
+                    expansion_workers=args.expansion_workers,
+                    **options,
+                )
+            )
+            totals: dict[str, int] = {}
+            shapes = []
+            start = time.perf_counter()
+            for i in range(args.items):
+                planner = session.new_planner()
+                shapes.append(tree_shape(planner.run(session.default_goal(), seed_prompt=f"seed prompt {i}")))
+                for key, value in planner.stats.items():
+                    totals[key] = totals.get(key, 0) + value
+            elapsed = time.perf_counter() - start
+            if not baseline:
+                baseline = shapes
+            nodes = sum(len(shape) for shape in shapes)
+            line = f"{mode:<14} nodes={nodes:>4}  elapsed={elapsed:6.3f}s  nodes/s={nodes / elapsed:7.1f}"
+            if "speculated" in totals:
+                line += (
+                    f"  speculated={totals['speculated']}  hits={totals['speculation_hits']}"
+                    f"  misses={totals['speculation_misses']}  wasted_calls={totals['wasted_calls']}"
+                )
+            print(f"{line}  tree={'same' if shapes == baseline else 'differs'}")
+            if mode in SAME_TREE and shapes != baseline:
+                failures.append(f"{mode}: explored tree differs from serial mode")
+            if mode == "pipeline" and not totals.get("speculation_misses"):
+                print("  note: no misspeculation happened, so the miss path was not exercised")
+    finally:
+        victim_server.shutdown()
+        judge_server.shutdown()
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
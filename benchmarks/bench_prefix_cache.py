@@ -0,0 +1,103 @@
+"""Time to first token for flat prompts vs prefix-stable chat transcripts over a search tree.
+
+Walks a synthetic tree (``--branching`` children per node, ``--depth`` levels) and streams
+one request per edge, once per layout:
+
+* ``flat``: history and action in one user message, action text first (siblings diverge early)
+* ``messages``: ``PromptRealizer.to_messages`` (stable system turn, ancestor turns, action last)
+
+Point ``--base-url`` at a local vLLM server (automatic prefix caching is on by default in
+recent versions); without it a mock server with a simulated prefix cache is started.
+
+Usage: PYTHONPATH=src python benchmarks/bench_prefix_cache.py [--base-url http://127.0.0.1:8000/v1 --model M]
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import statistics
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from agent_attack.core.types import Action, AttackGoal, Message, SearchNode, SearchState
+from agent_attack.runtime.components import PromptRealizer
+from agent_attack.runtime.mock_server import start_mock_server
+
+
+def first_token_s(base_url: str, model: str, api_key: str | None, messages: list[Message]) -> float:
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname or "127.0.0.1", parts.port or 80, timeout=120)
+    body = json.dumps({"model": model, "messages": messages, "max_tokens": 8, "temperature": 0.0, "stream": True})
+    headers = {"Content-Type": "application/json", **({"Authorization": f"Bearer {api_key}"} if api_key else {})}
+    start = time.perf_counter()
+    conn.request("POST", f"{parts.path.rstrip('/')}/chat/completions", body=body, headers=headers)
+    resp = conn.getresponse()
+    if resp.status != 200:
+        raise RuntimeError(f"{resp.status} {resp.read()[:200]!r}")
+    elapsed = None
+    for line in resp:
+        if elapsed is None and line.startswith(b"data: {") and b'"content"' in line:
+            elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed if elapsed is not None else time.perf_counter() - start
+
+
+def flat_layout(messages: list[Message]) -> list[Message]:
+    *history, last = messages
+    transcript = "\n\n".join(f"{message['role']}: {message['content']}" for message in history)
+    return [{"role": "user", "content": f"{last['content']}\n\n{transcript}"}]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible server, e.g. local vLLM")
+    parser.add_argument("--model", default="mock")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--branching", type=int, default=3)
+    parser.add_argument("--seed-chars", type=int, default=4000, help="Length of the seed prompt in the system turn")
+    parser.add_argument("--response-chars", type=int, default=1500, help="Length of each canned assistant turn")
+    parser.add_argument("--mock-prefill-ms-per-kchar", type=float, default=20.0)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_mock_server(prefill_s_per_kchar=args.mock_prefill_ms_per_kchar / 1000)
+    realizer = PromptRealizer()
+    goal = AttackGoal(objective="benchmark prefix reuse", subgoals=["probe"], constraints=["high-level only"])
+    try:
+        for layout in ("flat", "messages"):
+            # A per-layout salt keeps one layout from warming the cache for the other.
+            seed = f"[{layout} {uuid.uuid4()}] " + "lorem ipsum " * (args.seed_chars // 12)
+            level = [SearchNode(node_id="root", parent_id=None, depth=0, goal=goal, state=SearchState(history=[seed]))]
+            by_depth: dict[int, list[float]] = {}
+            for depth in range(1, args.depth + 1):
+                next_level = []
+                for parent in level:
+                    for branch in range(args.branching):
+                        action = Action(name=f"action_{depth}_{branch}", payload={"branch": branch})
+                        messages = realizer.to_messages(parent, action)
+                        request = messages if layout == "messages" else flat_layout(messages)
+                        by_depth.setdefault(depth, []).append(first_token_s(base_url, args.model, args.api_key, request))
+                        response = f"response {parent.node_id}/{branch} " + "dolor sit amet " * (args.response_chars // 15)
+                        state = SearchState(history=parent.state.history.append(messages[-1]["content"], response))
+                        next_level.append(
+                            SearchNode(node_id=f"{parent.node_id}/{branch}", parent_id=parent.node_id, depth=depth, goal=goal, state=state)
+                        )
+                level = next_level
+            ttfts = [value for values in by_depth.values() for value in values]
+            per_depth = "  ".join(f"d{depth}={statistics.fmean(values) * 1e3:6.1f}" for depth, values in by_depth.items())
+            print(
+                f"{layout:<9} requests={len(ttfts):>4}  ttft mean={statistics.fmean(ttfts) * 1e3:7.1f} ms  "
+                f"p50={statistics.median(ttfts) * 1e3:7.1f} ms  by depth (ms): {per_depth}"
+            )
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
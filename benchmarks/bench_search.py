@@ -0,0 +1,68 @@
+"""Planner throughput against the local mock server: nodes/s, model calls/node and memory/node.
+
+Runs fully offline and deterministically (mock replies are a function of the prompt),
+so numbers are comparable across commits.
+
+Usage: PYTHONPATH=src python benchmarks/bench_search.py [--items 8] [--max-budget 24] [--latency 0.0]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+from agent_attack.core.tracing import RecordingTracer, Tracer, set_tracer
+from agent_attack.runtime.engine import AttackConfig, AttackSession
+from agent_attack.runtime.mock_server import LatencyModel, start_mock_server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=8)
+    parser.add_argument("--max-budget", type=int, default=24)
+    parser.add_argument("--beam-width", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock server latency per call in seconds")
+    parser.add_argument("--expansion-workers", type=int, default=1)
+    parser.add_argument("--batch-judge", action="store_true")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(LatencyModel(mean_s=args.latency))
+    tracer = RecordingTracer()
+    set_tracer(tracer)
+    session = AttackSession(
+        AttackConfig(
+            seed_prompt="",
+            objective="benchmark",
+            subgoals=["trigger refusal", "recover"],
+            constraints=["high-level only"],
+            target_provider="vllm",
+            target_model="mock",
+            judge_provider="vllm",
+            judge_model="mock",
+            target_base_url=base_url,
+            judge_base_url=base_url,
+            max_budget=args.max_budget,
+            beam_width=args.beam_width,
+            expansion_workers=args.expansion_workers,
+            batch_judge=args.batch_judge,
+        )
+    )
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        retained = [session.run(f"seed prompt {i}") for i in range(args.items)]
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        set_tracer(Tracer())
+        server.shutdown()
+
+    nodes = sum(len(explored) for explored in retained)
+    calls = sum(1 for span in tracer.spans if span.name == "http")
+    print(f"nodes={nodes}  elapsed={elapsed:.3f}s  nodes/s={nodes / elapsed:.1f}")
+    print(f"model calls/node={calls / nodes:.2f}  peak memory/node={peak / nodes / 1024:.1f} KiB (includes tracer spans)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Cold-start cost of a persisted skill library: one JSON file per skill vs the SQLite ``SkillStore``.
+
+Also checks that concurrent ``observe`` calls from several processes are all counted.
+
+Usage: PYTHONPATH=src python benchmarks/bench_skill_store.py [--sizes 1000 10000] [--procs 4] [--observations 200]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from agent_attack.core.types import ObservationTag
+from agent_attack.memory.skills import Skill, SkillLibrary
+from agent_attack.skills.loader import SkillStore
+
+TAGS = list(ObservationTag)
+
+
+def make_skills(count: int) -> list[Skill]:
+    return [
+        Skill(
+            name=f"skill_{i}",
+            preconditions=[TAGS[i % len(TAGS)]],
+            policy_steps=["acknowledge", "shift_context", "retry_subgoal"],
+            parameters={"directness": 0.5},
+        )
+        for i in range(count)
+    ]
+
+
+def load_json_files(root: Path) -> SkillLibrary:
+    library = SkillLibrary()
+    for path in root.glob("*.json"):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        library.add_skill(
+            Skill(
+                name=data["name"],
+                preconditions=[ObservationTag(tag) for tag in data["preconditions"]],
+                policy_steps=data["policy_steps"],
+                parameters=data["parameters"],
+                termination=data["termination"],
+            )
+        )
+    return library
+
+
+def observe_worker(path: str, observations: int) -> None:
+    store = SkillStore(path)
+    skill = Skill(name="contended", preconditions=[ObservationTag.REFUSAL])
+    for i in range(observations):
+        store.observe(skill, float(i % 2))
+    store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000])
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--observations", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            skills = make_skills(size)
+            json_root = Path(tmp) / f"json_{size}"
+            json_root.mkdir()
+            for skill in skills:
+                payload = {
+                    "name": skill.name,
+                    "preconditions": [tag.value for tag in skill.preconditions],
+                    "policy_steps": skill.policy_steps,
+                    "parameters": skill.parameters,
+                    "termination": skill.termination,
+                }
+                (json_root / f"{skill.name}.json").write_text(json.dumps(payload), encoding="utf-8")
+            db_path = Path(tmp) / f"skills_{size}.sqlite"
+            writer = SkillStore(db_path)
+            writer.save_many(skills)
+            writer.close()
+
+            start = time.perf_counter()
+            load_json_files(json_root)
+            json_ms = (time.perf_counter() - start) * 1e3
+
+            start = time.perf_counter()
+            store = SkillStore(db_path)
+            store.load_into(SkillLibrary())
+            store_ms = (time.perf_counter() - start) * 1e3
+
+            start = time.perf_counter()
+            refusal = store.by_tag(ObservationTag.REFUSAL)
+            tag_ms = (time.perf_counter() - start) * 1e3
+            store.close()
+            print(
+                f"skills={size:>6}  json files={json_ms:8.1f} ms  store load_into={store_ms:7.1f} ms  "
+                f"by_tag({len(refusal)})={tag_ms:6.1f} ms"
+            )
+
+        db_path = str(Path(tmp) / "contended.sqlite")
+        SkillStore(db_path).close()
+        start = time.perf_counter()
+        procs = [
+            multiprocessing.Process(target=observe_worker, args=(db_path, args.observations)) for _ in range(args.procs)
+        ]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - start
+        stored = SkillStore(db_path).get("contended")
+        expected = args.procs * args.observations
+        count = stored.stats.count if stored else 0
+        print(
+            f"procs={args.procs}  observations={expected}  stored count={count}  "
+            f"throughput={expected / elapsed:8.0f} obs/s"
+        )
+        if count != expected:
+            raise SystemExit(f"lost updates: stored {count} of {expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""``SkillLibrary.suggest``/``observe_transition`` cost as the library and its history grow.
+
+Usage: PYTHONPATH=src python benchmarks/bench_skills.py [--sizes 10 1000 10000] [--calls 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from agent_attack.core.types import Action, AttackGoal, Observation, ObservationTag, SearchNode, SearchState
+from agent_attack.memory.skills import Skill, SkillLibrary
+
+TAGS = [ObservationTag.REFUSAL, ObservationTag.DRIFT, ObservationTag.REPETITION, ObservationTag.PROGRESS, ObservationTag.UNKNOWN]
+
+
+def node_with(tags: list[ObservationTag], action: Action | None = None) -> SearchNode:
+    return SearchNode(
+        node_id="n",
+        parent_id=None,
+        depth=1,
+        goal=AttackGoal(objective="bench"),
+        state=SearchState(),
+        action=action,
+        observation=Observation(raw_response="", tags=tags),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 1000, 10000])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for size in args.sizes:
+        library = SkillLibrary()
+        for i in range(size):
+            library.add_skill(Skill(name=f"skill_{i}", preconditions=[TAGS[i % len(TAGS)]], parameters={"directness": 0.5}))
+        names = list(library.skills)
+        parents = [node_with([rng.choice(TAGS)]) for _ in range(256)]
+        children = [
+            node_with([rng.choice(TAGS)], Action(name=rng.choice(names), source="skill"))
+            for _ in range(256)
+        ]
+
+        start = time.perf_counter()
+        for i in range(args.calls):
+            library.observe_transition(parents[i % 256], children[i % 256])
+        observe_us = (time.perf_counter() - start) / args.calls * 1e6
+
+        start = time.perf_counter()
+        for i in range(args.calls // 10):
+            library.suggest(parents[i % 256])
+        suggest_us = (time.perf_counter() - start) / (args.calls // 10) * 1e6
+        print(f"skills={size:>6}  observe_transition={observe_us:7.2f} us/call  suggest={suggest_us:9.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Victim call latency with full generations vs max_tokens limits and streamed early aborts.
+
+A mock server generates long replies at ``--decode-ms-per-token``; half of them open with a
+refusal. Each row sends the same ``--calls`` prompts with one generation policy and reports
+mean latency per call, mean response length and how many streams were aborted.
+
+Usage: PYTHONPATH=src python benchmarks/bench_streaming.py [--calls 40] [--decode-ms-per-token 0.5]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_attack.runtime.mock_server import MockResponder, start_mock_server
+from agent_attack.runtime.model_clients import ClientConfig, HTTPModelClient
+from agent_attack.runtime.streaming import build_stop_predicate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--reply-tokens", type=int, default=1500, help="Length of each mock reply")
+    parser.add_argument("--decode-ms-per-token", type=float, default=0.5)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--stop-after", type=int, default=128)
+    args = parser.parse_args()
+
+    filler = "The assistant continues with general, policy-consistent detail. "
+    body = filler * (args.reply_tokens * 4 // len(filler))
+    responder = MockResponder(
+        victim_replies=["I can't help with that request. " + body, "Here is a general overview of the topic. " + body]
+    )
+    server, base_url = start_mock_server(responder=responder, decode_s_per_token=args.decode_ms_per_token / 1000)
+    policies = [
+        ("full", {}),
+        (f"max_tokens={args.max_tokens}", {"max_tokens": args.max_tokens}),
+        ("stream", {"stream": True}),
+        ("stream+refusal", {"stream": True, "stop_predicate": build_stop_predicate(on_refusal=True)}),
+        (
+            f"stream+refusal+{args.stop_after}tok",
+            {"stream": True, "stop_predicate": build_stop_predicate(args.stop_after, on_refusal=True)},
+        ),
+    ]
+    try:
+        for label, options in policies:
+            client = HTTPModelClient(ClientConfig(provider="vllm", model="mock", base_url=base_url, **options))
+
+            def call(index: int) -> tuple[float, int]:
+                start = time.perf_counter()
+                text = client.respond(f"prompt {index}")
+                return time.perf_counter() - start, len(text)
+
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                results = list(pool.map(call, range(args.calls)))
+            latencies = [latency for latency, _ in results]
+            chars = statistics.fmean(length for _, length in results)
+            print(
+                f"{label:<28} mean={statistics.fmean(latencies) * 1e3:8.1f} ms  p50={statistics.median(latencies) * 1e3:8.1f} ms  "
+                f"reply={chars:7.0f} chars  aborted={client.stream_counts['aborted']}/{args.calls}"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
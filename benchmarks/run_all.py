@@ -0,0 +1,44 @@
+"""Run every benchmark with small, CI-sized settings; needs no network or model endpoint.
+
+Usage: PYTHONPATH=src python benchmarks/run_all.py
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+SUITE: list[list[str]] = [
+    ["bench_search.py", "--items", "4", "--max-budget", "16"],
+    ["bench_concurrency.py", "--items", "16", "--latency", "0.01", "--workers", "1", "8"],
+    ["bench_frontier.py", "--steps", "500"],
+    ["bench_history_memory.py"],
+    ["bench_skills.py", "--sizes", "10", "1000", "--calls", "5000"],
+    ["bench_balancer.py", "--requests", "120"],
+    ["bench_prefix_cache.py", "--depth", "2"],
+    ["bench_skill_store.py", "--sizes", "1000", "--procs", "2", "--observations", "50"],
+    ["bench_images.py", "--images", "20", "--side", "256"],
+    ["bench_judge_context.py", "--samples", "10"],
+    ["bench_streaming.py", "--calls", "16", "--reply-tokens", "400"],
+    ["bench_batch_judge.py", "--items", "4", "--judge-latency", "0.005"],
+    ["bench_campaign.py", "--items", "16", "--work-ms", "5", "--processes", "1", "2"],
+    ["bench_pipeline.py", "--items", "2", "--max-budget", "12", "--victim-latency", "0.01", "--judge-latency", "0.01"],
+]
+
+
+def main() -> None:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(HERE.parent / "src"), env.get("PYTHONPATH")]))
+    failed = 0
+    for script, *args in SUITE:
+        print(f"== {script} {' '.join(args)}", flush=True)
+        result = subprocess.run([sys.executable, str(HERE / script), *args], env=env)
+        failed += result.returncode != 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from agent_attack.runtime.engine import AttackConfig, CATSAttackEngine
+from agent_attack.runtime.engine import AttackConfig, AttackSession, CATSAttackEngine
 
-__all__ = ["AttackConfig", "CATSAttackEngine"]
+__all__ = ["AttackConfig", "AttackSession", "CATSAttackEngine"]
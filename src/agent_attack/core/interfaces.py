@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 
-from .types import Action, Observation, SearchNode
+from .types import Action, Message, Observation, SearchNode
 
 
 class VictimModel(ABC):
@@ -10,12 +12,22 @@ class VictimModel(ABC):
     def respond(self, prompt: str) -> str:
         raise NotImplementedError
 
+    def respond_messages(self, messages: list[Message]) -> str:
+        """Answer a chat transcript; models without native chat support see it flattened."""
+        return self.respond(flatten_messages(messages))
+
+    async def arespond(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.respond, prompt)
+
 
 class ParserTagger(ABC):
     @abstractmethod
     def parse(self, response: str, node: SearchNode) -> Observation:
         raise NotImplementedError
 
+    def parse_batch(self, responses: list[str], node: SearchNode) -> list[Observation]:
+        return [self.parse(response, node) for response in responses]
+
 
 class Checker(ABC):
     @abstractmethod
@@ -31,3 +43,30 @@ class ActionRealizer(ABC):
     @abstractmethod
     def to_prompt(self, node: SearchNode, action: Action) -> str:
         raise NotImplementedError
+
+    def to_messages(self, node: SearchNode, action: Action) -> list[Message]:
+        """Chat transcript for ``action``: the node's earlier turns, then the new prompt as the last user turn."""
+        turns = list(node.state.history)
+        messages: list[Message] = []
+        for prompt, response in zip(turns[1::2], turns[2::2]):
+            messages.append({"role": "user", "content": prompt})
+            messages.append({"role": "assistant", "content": response})
+        messages.append({"role": "user", "content": self.to_prompt(node, action)})
+        return attach_images(messages, node.state.images)
+
+
+def attach_images(messages: list[Message], images: Sequence[str]) -> list[Message]:
+    """Put ``images`` on the first user turn, so they sit in the prefix every later turn shares."""
+    if images:
+        for message in messages:
+            if message["role"] == "user":
+                message["images"] = list(images)
+                break
+    return messages
+
+
+def flatten_messages(messages: list[Message]) -> str:
+    """Single-prompt rendering of a transcript; a lone user message is passed through unchanged."""
+    if len(messages) == 1 and messages[0]["role"] == "user":
+        return messages[0]["content"]
+    return "\n\n".join(f"{message['role']}: {message['content']}" for message in messages)
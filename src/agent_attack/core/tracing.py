@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+
+class Tracer:
+    """No-op tracer. ``span`` yields a mutable attribute dict callers may annotate."""
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+        yield attrs
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    start_ns: int
+    duration_ns: int
+    thread_id: int
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+
+class RecordingTracer(Tracer):
+    """Keep every span in memory for percentile summaries and trace export."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+        wall_ns = time.time_ns()
+        start = time.perf_counter_ns()
+        try:
+            yield attrs
+        except BaseException as exc:
+            attrs.setdefault("error", type(exc).__name__)
+            raise
+        finally:
+            record = Span(name, wall_ns, time.perf_counter_ns() - start, threading.get_ident(), attrs)
+            with self._lock:
+                self.spans.append(record)
+
+    def summary(self) -> dict[str, Any]:
+        """Latency percentiles (ms) per phase, and per provider and phase for spans tagged with one."""
+        with self._lock:
+            spans = list(self.spans)
+        by_phase: dict[str, list[int]] = {}
+        by_provider: dict[str, dict[str, list[int]]] = {}
+        for span in spans:
+            by_phase.setdefault(span.name, []).append(span.duration_ns)
+            provider = span.attrs.get("provider")
+            if provider:
+                by_provider.setdefault(str(provider), {}).setdefault(span.name, []).append(span.duration_ns)
+        return {
+            "phases": {name: _latency_stats(values) for name, values in by_phase.items()},
+            "providers": {
+                provider: {name: _latency_stats(values) for name, values in phases.items()}
+                for provider, phases in by_provider.items()
+            },
+        }
+
+    def export_chrome_trace(self, path: str | Path) -> None:
+        """Write Chrome trace-event JSON (chrome://tracing, Perfetto); timestamps are wall-clock µs."""
+        pid = os.getpid()
+        with self._lock:
+            events = [
+                {
+                    "name": span.name,
+                    "cat": str(span.attrs.get("provider", "search")),
+                    "ph": "X",
+                    "ts": span.start_ns / 1000,
+                    "dur": span.duration_ns / 1000,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": span.attrs,
+                }
+                for span in self.spans
+            ]
+        Path(path).write_text(json.dumps({"traceEvents": events}, ensure_ascii=False, default=str), encoding="utf-8")
+
+    def export_otlp_json(self, path: str | Path, service_name: str = "agent_attack") -> None:
+        """Write spans in the OTLP/JSON ``resourceSpans`` layout accepted by OpenTelemetry collectors."""
+        trace_id = os.urandom(16).hex()
+        with self._lock:
+            otel_spans = [
+                {
+                    "traceId": trace_id,
+                    "spanId": os.urandom(8).hex(),
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.start_ns + span.duration_ns),
+                    "attributes": [_otel_attribute(key, value) for key, value in span.attrs.items()],
+                }
+                for span in self.spans
+            ]
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otel_attribute("service.name", service_name)]},
+                    "scopeSpans": [{"scope": {"name": "agent_attack"}, "spans": otel_spans}],
+                }
+            ]
+        }
+        Path(path).write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+
+def _latency_stats(durations_ns: list[int]) -> dict[str, float]:
+    values = sorted(durations_ns)
+    return {
+        "count": len(values),
+        "total_ms": round(sum(values) / 1e6, 3),
+        "p50_ms": round(_percentile(values, 0.50) / 1e6, 3),
+        "p95_ms": round(_percentile(values, 0.95) / 1e6, 3),
+        "p99_ms": round(_percentile(values, 0.99) / 1e6, 3),
+    }
+
+
+def _percentile(sorted_values: list[int], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = q * (len(sorted_values) - 1)
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def _otel_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+_tracer: Tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    global _tracer
+    _tracer = tracer
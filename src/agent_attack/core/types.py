@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import sys
+from collections.abc import Iterable, Iterator, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, overload
+
+
+Message = dict[str, Any]
+"""One chat turn: ``{"role": "system" | "user" | "assistant", "content": ...}``.
+
+A user turn may also carry ``"images": [path, ...]``, sent ahead of the text by clients
+that support image input and ignored by the rest.
+"""
 
 
 class ObservationTag(str, Enum):
@@ -34,11 +44,86 @@ class Action:
     source: str = "operator"
 
 
+class TurnChain(Sequence[str]):
+    """Immutable parent-pointer sequence of strings.
+
+    ``append`` returns a new chain that shares every existing entry with its parent, so a
+    child node's history costs one link per turn instead of a copy of its ancestors'
+    transcript. Entries are interned. Reads behave like a ``list`` (including ``repr``).
+    """
+
+    __slots__ = ("_parent", "_value", "_length")
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        self._parent: TurnChain | None = None
+        self._value: str = ""
+        self._length = 0
+        initial = list(values)
+        if initial:
+            tail = TurnChain().append(*initial)
+            self._parent, self._value, self._length = tail._parent, tail._value, tail._length
+
+    def append(self, *values: str) -> TurnChain:
+        chain = self
+        for value in values:
+            link = TurnChain.__new__(TurnChain)
+            link._parent = chain
+            link._value = sys.intern(value)
+            link._length = chain._length + 1
+            chain = link
+        return chain
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("TurnChain index out of range")
+        chain = self
+        for _ in range(self._length - 1 - index):
+            chain = chain._parent  # type: ignore[assignment]
+        return chain._value
+
+    def __reversed__(self) -> Iterator[str]:
+        chain: TurnChain | None = self
+        while chain is not None and chain._length:
+            yield chain._value
+            chain = chain._parent
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(reversed(self))[::-1])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (TurnChain, list, tuple)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
 @dataclass(slots=True)
 class SearchState:
-    history: list[str] = field(default_factory=list)
-    attempted_actions: list[str] = field(default_factory=list)
+    history: TurnChain = field(default_factory=TurnChain)
+    attempted_actions: TurnChain = field(default_factory=TurnChain)
     budget_used: int = 0
+    images: tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.history, TurnChain):
+            self.history = TurnChain(self.history)
+        if not isinstance(self.attempted_actions, TurnChain):
+            self.attempted_actions = TurnChain(self.attempted_actions)
 
 
 @dataclass(slots=True)
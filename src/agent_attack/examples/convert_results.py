@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from agent_attack.runtime.benchmark import jsonl_to_json
+from agent_attack.runtime.campaign import Campaign
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert streamed JSONL benchmark results into the JSON array format")
+    parser.add_argument("src", help="Path to results JSONL file, or a --campaign-dir to merge")
+    parser.add_argument("dst", help="Path to output JSON file")
+    args = parser.parse_args()
+    if Path(args.src).is_dir():
+        campaign = Campaign.open(args.src)
+        summary = campaign.merge(args.dst)
+        print(f"done: {summary['records']} samples -> {args.dst} ({summary['duplicates_dropped']} duplicates dropped)")
+        if not campaign.is_done():
+            print(f"warning: shards {campaign.pending()} are not finished yet")
+        print(f"campaign: {campaign.report()}")
+        return
+    count = jsonl_to_json(args.src, args.dst)
+    print(f"done: {count} samples -> {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from agent_attack.core.types import AttackGoal
+from agent_attack.runtime.batch_judge import (
+    AnthropicBatchBackend,
+    BatchBackend,
+    BatchRescorer,
+    LocalBatchBackend,
+    OpenAIBatchBackend,
+    read_batch_output,
+)
+from agent_attack.runtime.benchmark import dump_results, read_jsonl_results
+from agent_attack.runtime.judge import JudgeContext, LLMPromptJudge
+from agent_attack.runtime.model_clients import ClientConfig, HTTPModelClient
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-judge agent results offline through a batch API, without re-querying the target")
+    parser.add_argument("src", help="Agent results (JSON array or JSONL)")
+    parser.add_argument("dst", help="Path to the re-scored JSON output")
+    parser.add_argument("--backend", choices=["local", "openai", "anthropic"], default="local")
+    parser.add_argument("--batch-dir", default="judge_batches", help="Where the request file (and local batch output) is written")
+    parser.add_argument("--batch-workers", type=int, default=8, help="Concurrent judge calls of the local backend")
+    parser.add_argument("--requests-only", action="store_true", help="Only write the request file, e.g. for vLLM run_batch")
+    parser.add_argument("--batch-output", default=None, help="Join an existing batch output file instead of submitting")
+    parser.add_argument("--poll-interval", type=float, default=10.0)
+    parser.add_argument("--batch-timeout", type=float, default=None, help="Give up after this many seconds")
+    parser.add_argument("--judge-provider", default="openai", choices=["vllm", "openai", "gemini", "anthropic", "mock"])
+    parser.add_argument("--judge-model", default="gpt-4o-mini")
+    parser.add_argument("--judge-api-key", default=None)
+    parser.add_argument("--judge-base-url", default=None)
+    parser.add_argument("--judge-max-tokens", type=int, default=None)
+    parser.add_argument("--judge-last-actions", type=int, default=None)
+    parser.add_argument("--judge-response-max-tokens", type=int, default=None)
+    parser.add_argument("--judge-response-window", choices=["head", "head_tail"], default="head")
+    parser.add_argument("--objective", default="Probe policy consistency against unsafe intent over multiple turns.")
+    parser.add_argument("--constraints", nargs="*", default=["no harmful content", "high-level only"])
+    args = parser.parse_args()
+
+    src = Path(args.src)
+    records = read_jsonl_results(src) if src.suffix == ".jsonl" else json.loads(src.read_text(encoding="utf-8"))
+    records = list(records)
+    judge_client = HTTPModelClient(
+        ClientConfig(
+            provider=args.judge_provider,
+            model=args.judge_model,
+            api_key=args.judge_api_key,
+            base_url=args.judge_base_url,
+            temperature=0.0,
+            max_tokens=args.judge_max_tokens,
+        )
+    )
+    judge = LLMPromptJudge(
+        judge_client,
+        context=JudgeContext(
+            last_actions=args.judge_last_actions,
+            response_max_tokens=args.judge_response_max_tokens,
+            response_window=args.judge_response_window,
+        ),
+    )
+    rescorer = BatchRescorer(judge, AttackGoal(objective=args.objective, constraints=list(args.constraints)))
+    batch_dir = Path(args.batch_dir)
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    requests_path = batch_dir / f"{src.stem}.judge_requests.jsonl"
+    count = rescorer.write(records, requests_path, args.judge_model, args.judge_max_tokens)
+    print(f"requests: {count} -> {requests_path}")
+    if args.requests_only:
+        return
+
+    if args.batch_output:
+        with open(args.batch_output, "r", encoding="utf-8") as fh:
+            summary = rescorer.apply(read_batch_output(fh))
+    else:
+        backend: BatchBackend
+        if args.backend == "openai":
+            backend = OpenAIBatchBackend(args.judge_api_key, args.judge_base_url)
+        elif args.backend == "anthropic":
+            backend = AnthropicBatchBackend(args.judge_api_key, args.judge_base_url)
+        else:
+            backend = LocalBatchBackend(judge_client, batch_dir, workers=args.batch_workers)
+        summary = rescorer.submit(backend, requests_path, args.poll_interval, args.batch_timeout)
+    dump_results(args.dst, records)
+    print(f"done: {len(records)} samples -> {args.dst}")
+    print(f"rescore: {summary}")
+    if judge.context.bounded:
+        print(f"judge context: {judge.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,486 @@
 from __future__ import annotations
 
 import argparse
+import json
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Iterable
 
-from agent_attack.runtime.benchmark import dump_results, load_benchmark, run_agent_attack, run_baseline_single_turn
-from agent_attack.runtime.engine import AttackConfig
+from agent_attack.core.tracing import RecordingTracer, set_tracer
+from agent_attack.runtime.benchmark import (
+    BenchmarkItem,
+    JsonlResultWriter,
+    completed_sample_ids,
+    dump_results,
+    iter_agent_attack,
+    iter_baseline_single_turn,
+    iter_benchmark,
+    parse_shard,
+    run_agent_attack,
+    run_baseline_single_turn,
+)
+from agent_attack.runtime.balancer import STRATEGIES, endpoint_stats
+from agent_attack.runtime.campaign import Campaign, run_campaign
+from agent_attack.runtime.engine import AttackConfig, AttackSession
+from agent_attack.runtime.http_pool import set_shared_pool
+from agent_attack.runtime.images import shared_image_encoder
+from agent_attack.runtime.judge import TieredJudge
+from agent_attack.runtime.recording import RecordingPool, ReplayPool
+from agent_attack.runtime.response_cache import CacheMode, ResponseCache
+from agent_attack.runtime.scheduler import BudgetExceeded, RequestScheduler, SpendLedger, shared_scheduler
+from agent_attack.runtime.streaming import build_stop_predicate
+
+
+PROVIDERS = ["vllm", "openai", "gemini", "anthropic", "mock"]
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Run AgentAttack benchmark in baseline or agent mode")
-    parser.add_argument("--dataset", required=True, help="Path to benchmark JSON file")
+    parser.add_argument("--dataset", required=True, help="Path to benchmark JSON array or JSONL file")
+    parser.add_argument("--shard", default=None, help="Process only shard i of n, e.g. 0/4")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most this many items (after shard and filters)")
+    parser.add_argument("--main-category", nargs="+", default=None)
+    parser.add_argument("--subcategory", nargs="+", default=None)
+    parser.add_argument("--style", nargs="+", default=None)
     parser.add_argument("--output", required=True, help="Path to output JSON file")
+    parser.add_argument(
+        "--output-format",
+        choices=["json", "jsonl"],
+        default="json",
+        help="json writes one array at the end; jsonl appends a line per finished item",
+    )
+    parser.add_argument("--resume", action="store_true", help="Skip sample ids already completed in a jsonl output")
+    parser.add_argument("--fsync-interval", type=float, default=5.0, help="Seconds between fsyncs of jsonl output")
     parser.add_argument("--mode", choices=["baseline", "agent"], required=True)
 
-    parser.add_argument("--target-provider", required=True, choices=["vllm", "openai", "gemini", "anthropic"])
+    parser.add_argument("--target-provider", required=True, choices=PROVIDERS)
     parser.add_argument("--target-model", required=True)
     parser.add_argument("--target-api-key", default=None)
     parser.add_argument("--target-base-url", default=None)
+    parser.add_argument(
+        "--target-endpoints",
+        nargs="+",
+        default=[],
+        help="Several replica base URLs serving the target model; requests are load balanced across them",
+    )
 
-    parser.add_argument("--judge-provider", choices=["vllm", "openai", "gemini", "anthropic"], default="openai")
+    parser.add_argument("--judge-provider", choices=PROVIDERS, default="openai")
     parser.add_argument("--judge-model", default="gpt-4o-mini")
     parser.add_argument("--judge-api-key", default=None)
     parser.add_argument("--judge-base-url", default=None)
+    parser.add_argument("--judge-endpoints", nargs="+", default=[], help="Replica base URLs serving the judge model")
+    parser.add_argument(
+        "--balance",
+        choices=list(STRATEGIES),
+        default="least_outstanding",
+        help="How requests are spread over --target-endpoints/--judge-endpoints",
+    )
+    parser.add_argument(
+        "--health-check-interval",
+        type=float,
+        default=None,
+        help="Seconds between GET /models probes of balanced endpoints (default: passive ejection only)",
+    )
 
     parser.add_argument("--objective", default="Probe policy consistency against unsafe intent over multiple turns.")
     parser.add_argument("--subgoals", nargs="*", default=["trigger refusal", "recover", "measure drift"])
     parser.add_argument("--constraints", nargs="*", default=["no harmful content", "high-level only"])
     parser.add_argument("--max-budget", type=int, default=12)
     parser.add_argument("--beam-width", type=int, default=4)
+    parser.add_argument("--expansion-workers", type=int, default=1, help="Parallel victim/judge calls per node expansion")
+    parser.add_argument(
+        "--multi-turn",
+        action="store_true",
+        help="Send the victim the branch's chat history as messages, laid out for server-side prefix caching",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Start the victim calls of the next frontier node while the current node is judged",
+    )
+    parser.add_argument(
+        "--pipeline-keep-misspeculated",
+        action="store_true",
+        help="With --pipeline, keep a speculative expansion even when serial search would have chosen differently",
+    )
+    parser.add_argument("--target-max-tokens", type=int, default=None, help="Generation limit for target responses")
+    parser.add_argument("--target-stop", nargs="+", default=[], help="Stop sequences for target responses")
+    parser.add_argument("--judge-max-tokens", type=int, default=None, help="Generation limit for judge responses")
+    parser.add_argument("--judge-stop", nargs="+", default=[], help="Stop sequences for judge responses")
+    parser.add_argument("--stream-target", action="store_true", help="Stream target responses (server-sent events)")
+    parser.add_argument(
+        "--stop-after-tokens",
+        type=int,
+        default=None,
+        help="Abort a streamed target response once about this many tokens have arrived (implies --stream-target)",
+    )
+    parser.add_argument(
+        "--stop-on-refusal",
+        action="store_true",
+        help="Abort a streamed target response as soon as it opens with a refusal (implies --stream-target)",
+    )
+    parser.add_argument(
+        "--send-images",
+        action="store_true",
+        help="Send each item's image_path to the target model with the prompt (otherwise it is only kept in meta)",
+    )
+    parser.add_argument(
+        "--image-max-side",
+        type=int,
+        default=None,
+        help="Downscale images so their longer side is at most this many pixels before encoding (needs Pillow)",
+    )
+    parser.add_argument(
+        "--image-prefetch",
+        type=int,
+        default=4,
+        help="Encode the images of this many upcoming items in the background (0 disables)",
+    )
+    parser.add_argument("--batch-judge", action="store_true", help="Judge all siblings of an expansion in one judge call")
+    parser.add_argument(
+        "--transposition",
+        choices=["sequence", "multiset"],
+        default=None,
+        help="Skip candidate nodes whose action signature was already explored",
+    )
+    parser.add_argument("--transposition-include-response", action="store_true", help="Also key nodes on the parent response")
+    parser.add_argument(
+        "--share-skill-stats",
+        action="store_true",
+        help="Let learned skill statistics carry over between dataset items instead of resetting per item",
+    )
+    parser.add_argument(
+        "--skill-ranking",
+        choices=["mean", "decayed", "posterior"],
+        default="mean",
+        help="Statistic used to rank suggested skills: all-time mean, exponentially decayed mean or Beta posterior mean",
+    )
+    parser.add_argument(
+        "--skill-store",
+        default=None,
+        help="SQLite skill store to load skills from and record skill outcomes into (shareable across processes)",
+    )
+    parser.add_argument(
+        "--judge-last-actions",
+        type=int,
+        default=None,
+        help="Put only the last K actions (plus per-action counts) in judge prompts instead of the full history",
+    )
+    parser.add_argument(
+        "--judge-response-max-tokens",
+        type=int,
+        default=None,
+        help="Truncate each response in judge prompts to about this many estimated tokens",
+    )
+    parser.add_argument(
+        "--judge-response-window",
+        choices=["head", "head_tail"],
+        default="head",
+        help="Which part of a truncated response the judge sees: the beginning, or both ends",
+    )
+    parser.add_argument(
+        "--judge-context-validation-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of bounded judge prompts re-judged with the full prompt to measure agreement",
+    )
+    parser.add_argument(
+        "--fast-judge-threshold",
+        type=float,
+        default=None,
+        help="Tag refusals locally when the heuristic confidence reaches this value, skipping the LLM judge",
+    )
+    parser.add_argument(
+        "--fast-judge-validation-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of fast-path verdicts re-checked by the LLM judge to measure agreement",
+    )
+    parser.add_argument("--cache", default=None, help="Path to an on-disk response cache (SQLite)")
+    parser.add_argument("--cache-mode", choices=[m.value for m in CacheMode], default=CacheMode.READ_WRITE.value)
+    parser.add_argument("--cache-max-mb", type=float, default=None, help="Evict least recently used entries above this size")
+    parser.add_argument(
+        "--rate-limit",
+        nargs=3,
+        action="append",
+        default=[],
+        metavar=("PROVIDER", "RPM", "TPM"),
+        help=(
+            "Requests/min and tokens/min for a provider (0 = unlimited); repeatable. With --campaign-dir the "
+            "limit is per host and split evenly across its --processes workers"
+        ),
+    )
+    parser.add_argument(
+        "--price",
+        nargs=3,
+        action="append",
+        default=[],
+        metavar=("MODEL", "PROMPT_USD", "COMPLETION_USD"),
+        help="USD per million prompt/completion tokens for a model; repeatable",
+    )
+    parser.add_argument(
+        "--max-total-tokens",
+        type=int,
+        default=None,
+        help="Stop once this many tokens were spent (with --campaign-dir: by the whole campaign, across processes and restarts)",
+    )
+    parser.add_argument(
+        "--max-cost-usd",
+        type=float,
+        default=None,
+        help="Stop once this much money was spent (with --campaign-dir: by the whole campaign)",
+    )
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument("--record", default=None, help="Append every HTTP request/response pair to this JSONL cassette")
+    replay.add_argument("--replay", default=None, help="Answer HTTP requests from a recorded cassette, without network")
+    parser.add_argument("--trace", default=None, help="Record per-phase timings and write a trace file here")
+    parser.add_argument("--trace-format", choices=["chrome", "otlp"], default="chrome")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of dataset items processed in parallel")
+    parser.add_argument(
+        "--campaign-dir",
+        default=None,
+        help="Shard the dataset and coordinate worker processes (and other hosts) through this shared directory",
+    )
+    parser.add_argument("--num-shards", type=int, default=None, help="Campaign shard count (default: --processes)")
+    parser.add_argument("--processes", type=int, default=1, help="Campaign worker processes on this host")
+    parser.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=60.0,
+        help="Seconds without a heartbeat after which a campaign shard is taken over from its worker",
+    )
     return parser
 
 
 def main() -> None:
-    args = build_parser().parse_args()
-    items = load_benchmark(args.dataset)
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.resume and args.output_format != "jsonl":
+        parser.error("--resume requires --output-format jsonl")
+    if args.campaign_dir:
+        if args.shard or args.resume or args.trace:
+            parser.error("--campaign-dir manages shards and resuming itself; drop --shard/--resume/--trace")
+        _run_campaign(args)
+        return
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as exc:
+        parser.error(str(exc))
+    items = iter_benchmark(
+        args.dataset,
+        shard=shard,
+        limit=args.limit,
+        main_category=args.main_category,
+        subcategory=args.subcategory,
+        style=args.style,
+    )
+    if args.resume:
+        done = completed_sample_ids(args.output)
+        items = (item for item in items if item.sample_id not in done)
+    scheduler, tracer, cache = _setup_runtime(args)
+    session = AttackSession(_agent_config(args)) if args.mode == "agent" else None
+    stopped: BudgetExceeded | None = None
+    if args.output_format == "jsonl":
+        count = 0
+        with JsonlResultWriter(args.output, fsync_interval_s=args.fsync_interval) as writer:
+            try:
+                for record in _results(args, items, True, cache, session):
+                    writer.write(record)
+                    count += 1
+            except BudgetExceeded as exc:
+                stopped = exc
+    else:
+        try:
+            records = list(_results(args, items, False, cache, session))
+        except BudgetExceeded as exc:
+            stopped, records = exc, exc.records
+        dump_results(args.output, records)
+        count = len(records)
+    print(f"done: {count} samples -> {args.output}")
+    print(f"usage: {scheduler.usage()}")
+    endpoints = endpoint_stats()
+    if endpoints:
+        print(f"endpoints: {json.dumps(endpoints, indent=2)}")
+    if args.send_images:
+        print(f"images: {shared_image_encoder(args.image_max_side).stats()}")
+    if tracer is not None:
+        if args.trace_format == "otlp":
+            tracer.export_otlp_json(args.trace)
+        else:
+            tracer.export_chrome_trace(args.trace)
+        print(f"trace: {json.dumps(tracer.summary(), indent=2)}")
+    if cache is not None:
+        print(f"cache: {cache.stats()}")
+    if session is not None:
+        judge = session.judge
+        if isinstance(judge, TieredJudge):
+            print(f"fast judge: {judge.stats()}")
+            judge = judge.llm_judge
+        if judge.context.bounded:
+            print(f"judge context: {judge.stats()}")
+    if stopped is not None:
+        sys.exit(f"budget exhausted after {count} items: {stopped}")
+
+
+_runtime: tuple[RequestScheduler, RecordingTracer | None, ResponseCache | None] | None = None
+
+
+def _setup_runtime(args: argparse.Namespace) -> tuple[RequestScheduler, RecordingTracer | None, ResponseCache | None]:
+    """Install process-wide pool, tracer, scheduler limits and cache once per process."""
+    global _runtime
+    if _runtime is not None:
+        return _runtime
+    if args.record:
+        set_shared_pool(RecordingPool(args.record))
+    elif args.replay:
+        set_shared_pool(ReplayPool(args.replay))
+    tracer = RecordingTracer() if args.trace else None
+    if tracer is not None:
+        set_tracer(tracer)
+    scheduler = shared_scheduler()
+    # Campaign workers each get an equal share of this host's rate limits.
+    workers = max(1, args.processes) if args.campaign_dir else 1
+    for provider, rpm, tpm in args.rate_limit:
+        scheduler.set_rate_limit(provider, float(rpm) / workers or None, float(tpm) / workers or None)
+    for model, prompt_usd, completion_usd in args.price:
+        scheduler.set_price(model, float(prompt_usd), float(completion_usd))
+    ledger = SpendLedger(Path(args.campaign_dir) / "spend.sqlite") if args.campaign_dir else None
+    scheduler.set_budget(max_total_tokens=args.max_total_tokens, max_cost_usd=args.max_cost_usd, ledger=ledger)
+    cache = ResponseCache.shared(args.cache, max_bytes=_cache_max_bytes(args)) if args.cache else None
+    _runtime = (scheduler, tracer, cache)
+    return _runtime
+
+
+def _cache_max_bytes(args: argparse.Namespace) -> int | None:
+    return int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb else None
 
+
+def _results(
+    args: argparse.Namespace,
+    items: Iterable[BenchmarkItem],
+    stream: bool,
+    cache: ResponseCache | None,
+    session: AttackSession | None = None,
+) -> Iterable[dict[str, Any]]:
     if args.mode == "baseline":
-        outputs = run_baseline_single_turn(
-            items,
+        stop_predicate = build_stop_predicate(args.stop_after_tokens, args.stop_on_refusal)
+        baseline_kwargs = dict(
             provider=args.target_provider,
             model=args.target_model,
             api_key=args.target_api_key,
             base_url=args.target_base_url,
+            base_urls=args.target_endpoints,
+            balance_strategy=args.balance,
+            health_check_interval_s=args.health_check_interval,
+            concurrency=args.concurrency,
+            cache=cache,
+            cache_mode=args.cache_mode,
+            send_images=args.send_images,
+            image_max_side=args.image_max_side,
+            image_prefetch=args.image_prefetch,
+            max_tokens=args.target_max_tokens,
+            stop=args.target_stop,
+            stream=args.stream_target or stop_predicate is not None,
+            stop_predicate=stop_predicate,
         )
-    else:
-        cfg = AttackConfig(
-            seed_prompt="dataset_prompt_will_override",
-            objective=args.objective,
-            subgoals=list(args.subgoals),
-            constraints=list(args.constraints),
-            target_provider=args.target_provider,
-            target_model=args.target_model,
-            judge_provider=args.judge_provider,
-            judge_model=args.judge_model,
-            target_api_key=args.target_api_key,
-            target_base_url=args.target_base_url,
-            judge_api_key=args.judge_api_key,
-            judge_base_url=args.judge_base_url,
-            max_budget=args.max_budget,
-            beam_width=args.beam_width,
-        )
-        outputs = run_agent_attack(items, cfg)
+        return iter_baseline_single_turn(items, **baseline_kwargs) if stream else run_baseline_single_turn(items, **baseline_kwargs)
+    cfg = _agent_config(args)
+    agent_kwargs = dict(concurrency=args.concurrency, image_prefetch=args.image_prefetch, session=session)
+    return iter_agent_attack(items, cfg, **agent_kwargs) if stream else run_agent_attack(items, cfg, **agent_kwargs)
+
+
+def _agent_config(args: argparse.Namespace) -> AttackConfig:
+    return AttackConfig(
+        seed_prompt="dataset_prompt_will_override",
+        objective=args.objective,
+        subgoals=list(args.subgoals),
+        constraints=list(args.constraints),
+        target_provider=args.target_provider,
+        target_model=args.target_model,
+        judge_provider=args.judge_provider,
+        judge_model=args.judge_model,
+        target_api_key=args.target_api_key,
+        target_base_url=args.target_base_url,
+        judge_api_key=args.judge_api_key,
+        judge_base_url=args.judge_base_url,
+        target_base_urls=list(args.target_endpoints),
+        judge_base_urls=list(args.judge_endpoints),
+        balance_strategy=args.balance,
+        health_check_interval_s=args.health_check_interval,
+        max_budget=args.max_budget,
+        beam_width=args.beam_width,
+        expansion_workers=args.expansion_workers,
+        batch_judge=args.batch_judge,
+        multi_turn=args.multi_turn,
+        pipeline=args.pipeline,
+        pipeline_keep_misspeculated=args.pipeline_keep_misspeculated,
+        target_max_tokens=args.target_max_tokens,
+        target_stop=list(args.target_stop),
+        target_stream=args.stream_target,
+        target_stop_after_tokens=args.stop_after_tokens,
+        target_stop_on_refusal=args.stop_on_refusal,
+        judge_max_tokens=args.judge_max_tokens,
+        judge_stop=list(args.judge_stop),
+        send_images=args.send_images,
+        image_max_side=args.image_max_side,
+        transposition=args.transposition,
+        transposition_include_response=args.transposition_include_response,
+        share_skill_stats=args.share_skill_stats,
+        skill_ranking=args.skill_ranking,
+        skill_store=args.skill_store,
+        judge_last_actions=args.judge_last_actions,
+        judge_response_max_tokens=args.judge_response_max_tokens,
+        judge_response_window=args.judge_response_window,
+        judge_context_validation_rate=args.judge_context_validation_rate,
+        fast_judge_threshold=args.fast_judge_threshold,
+        fast_judge_validation_rate=args.fast_judge_validation_rate,
+        cache_path=args.cache,
+        cache_mode=args.cache_mode,
+        cache_max_bytes=_cache_max_bytes(args),
+    )
 
-    dump_results(args.output, outputs)
-    print(f"done: {len(outputs)} samples -> {args.output}")
+
+def _run_shard(args: argparse.Namespace, shard: int, num_shards: int, output: Path, done: set[int]) -> int:
+    """Campaign worker body: stream one shard's unfinished items to ``output``."""
+    items = iter_benchmark(
+        args.dataset,
+        shard=(shard, num_shards),
+        limit=args.limit,
+        main_category=args.main_category,
+        subcategory=args.subcategory,
+        style=args.style,
+    )
+    _, _, cache = _setup_runtime(args)
+    count = 0
+    with JsonlResultWriter(output, fsync_interval_s=args.fsync_interval) as writer:
+        for record in _results(args, (item for item in items if item.sample_id not in done), True, cache):
+            writer.write(record)
+            count += 1
+    return count
+
+
+def _run_campaign(args: argparse.Namespace) -> None:
+    stopped: BudgetExceeded | None = None
+    try:
+        campaign = run_campaign(
+            args.campaign_dir,
+            args.num_shards or args.processes,
+            partial(_run_shard, args),
+            processes=args.processes,
+            lease_timeout_s=args.lease_timeout,
+        )
+    except BudgetExceeded as exc:
+        stopped = exc
+        campaign = Campaign.open(args.campaign_dir, lease_timeout_s=args.lease_timeout)
+    summary = campaign.merge(args.output, args.output_format)
+    print(
+        f"done: {summary['records']} samples -> {args.output} "
+        f"({summary['duplicates_dropped']} duplicates dropped, {summary['errors']} errors)"
+    )
+    print(f"campaign: {json.dumps(campaign.report())}")
+    if stopped is not None:
+        sys.exit(f"budget exhausted after {summary['records']} items: {stopped}")
 
 
 if __name__ == "__main__":
@@ -1,11 +1,46 @@
 from __future__ import annotations
 
+import threading
+from bisect import bisect_left, insort
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass, field
-from statistics import fmean
 
 from agent_attack.core.types import Action, ObservationTag, SearchNode
 
 
+@dataclass(slots=True)
+class SkillStats:
+    """Constant-size running statistics of a skill's outcome scores.
+
+    Keeps count/mean/variance (Welford), an exponentially decayed mean and a
+    Beta(alpha, beta) posterior over the success rate (scores are in [0, 1]).
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    decayed_mean: float | None = None
+    alpha: float = 1.0
+    beta: float = 1.0
+
+    def update(self, score: float, decay: float = 0.9) -> None:
+        self.count += 1
+        delta = score - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (score - self.mean)
+        self.decayed_mean = score if self.decayed_mean is None else decay * self.decayed_mean + (1 - decay) * score
+        self.alpha += score
+        self.beta += 1 - score
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def posterior_mean(self) -> float:
+        return self.alpha / (self.alpha + self.beta)
+
+
 @dataclass(slots=True)
 class Skill:
     name: str
@@ -13,7 +48,7 @@ class Skill:
     policy_steps: list[str] = field(default_factory=list)
     parameters: dict[str, float] = field(default_factory=dict)
     termination: str = "on_progress_or_refusal"
-    usage_scores: list[float] = field(default_factory=list)
+    stats: SkillStats = field(default_factory=SkillStats)
 
     def to_action(self) -> Action:
         return Action(
@@ -23,38 +58,131 @@ class Skill:
         )
 
 
+def skill_directness(stats: SkillStats) -> float:
+    """The ``directness`` parameter a skill with these statistics is suggested with."""
+    return max(0.1, min(0.9, 1 - stats.mean * 0.5))
+
+
+_RankKey = tuple[float, int, str]
+
+
 class SkillLibrary:
-    def __init__(self) -> None:
-        self.skills: dict[str, Skill] = {
-            "gentle_context_bridge": Skill(
+    """Skills indexed by precondition tag, ranked by O(1) running statistics.
+
+    Each precondition tag (and ``None`` for skills without preconditions) keeps its skills
+    in a list sorted best-first, updated on every transition, so ``suggest`` only looks at
+    the head of the lists for the node's tags instead of scanning the library.
+
+    ``ranking`` picks the statistic used by ``suggest``: ``"mean"`` (all-time average),
+    ``"decayed"`` (exponentially decayed mean) or ``"posterior"`` (Beta posterior mean).
+    Register skills through ``add_skill``/``add_skills`` so the index stays in sync.
+    ``on_update(skill, score)`` is called after every statistics update, e.g. to persist it.
+    """
+
+    def __init__(
+        self,
+        ranking: str = "mean",
+        decay: float = 0.9,
+        on_update: Callable[[Skill, float], None] | None = None,
+    ) -> None:
+        if ranking not in {"mean", "decayed", "posterior"}:
+            raise ValueError(f"Unsupported skill ranking: {ranking}")
+        self.ranking = ranking
+        self.decay = decay
+        self.on_update = on_update
+        self.skills: dict[str, Skill] = {}
+        self._ranked: dict[ObservationTag | None, list[_RankKey]] = {}
+        self._keys: dict[str, _RankKey] = {}
+        self._order: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.add_skill(
+            Skill(
                 name="gentle_context_bridge",
                 preconditions=[ObservationTag.REFUSAL],
                 policy_steps=["acknowledge", "shift_context", "retry_subgoal"],
                 parameters={"directness": 0.3},
             )
-        }
+        )
+
+    def add_skill(self, skill: Skill) -> None:
+        with self._lock:
+            if skill.name in self.skills:
+                self._unindex(self.skills[skill.name])
+            self.skills[skill.name] = skill
+            self._order.setdefault(skill.name, len(self._order))
+            self._index(skill)
+
+    def add_skills(self, skills: Iterable[Skill]) -> None:
+        """Bulk registration: append to the tag index and sort each touched list once."""
+        with self._lock:
+            touched: set[ObservationTag | None] = set()
+            for skill in skills:
+                if skill.name in self.skills:
+                    self._unindex(self.skills[skill.name])
+                self.skills[skill.name] = skill
+                self._order.setdefault(skill.name, len(self._order))
+                key = self._keys[skill.name] = self._rank_key(skill)
+                for tag in skill.preconditions or [None]:
+                    self._ranked.setdefault(tag, []).append(key)
+                    touched.add(tag)
+            for tag in touched:
+                self._ranked[tag].sort()
+
+    def remove_skill(self, name: str) -> Skill | None:
+        with self._lock:
+            skill = self.skills.pop(name, None)
+            if skill is not None:
+                self._unindex(skill)
+            return skill
 
     def suggest(self, node: SearchNode) -> list[Action]:
         if not node.observation:
             return []
-        tags = set(node.observation.tags)
-        matches = [s for s in self.skills.values() if not s.preconditions or tags.intersection(s.preconditions)]
-        ranked = sorted(matches, key=self._avg_score, reverse=True)
-        return [s.to_action() for s in ranked[:2]]
+        with self._lock:
+            heads: set[_RankKey] = set(self._ranked.get(None, [])[:2])
+            for tag in set(node.observation.tags):
+                heads.update(self._ranked.get(tag, [])[:2])
+            return [self.skills[key[2]].to_action() for key in sorted(heads)[:2]]
 
     def observe_transition(self, parent: SearchNode, child: SearchNode) -> None:
         if not child.action or child.action.source != "skill":
             return
-        skill = self.skills.get(child.action.name)
-        if not skill:
-            return
-        score = 1.0 if child.observation and ObservationTag.PROGRESS in child.observation.tags else 0.0
-        skill.usage_scores.append(score)
-        if skill.usage_scores:
-            skill.parameters["directness"] = max(0.1, min(0.9, 1 - fmean(skill.usage_scores) * 0.5))
-
-    @staticmethod
-    def _avg_score(skill: Skill) -> float:
-        if not skill.usage_scores:
+        with self._lock:
+            skill = self.skills.get(child.action.name)
+            if not skill:
+                return
+            score = 1.0 if child.observation and ObservationTag.PROGRESS in child.observation.tags else 0.0
+            self._unindex(skill)
+            skill.stats.update(score, self.decay)
+            skill.parameters["directness"] = skill_directness(skill.stats)
+            self._index(skill)
+        if self.on_update is not None:
+            self.on_update(skill, score)
+
+    def _rank_score(self, skill: Skill) -> float:
+        stats = skill.stats
+        if not stats.count:
             return 0.5
-        return fmean(skill.usage_scores)
+        if self.ranking == "decayed" and stats.decayed_mean is not None:
+            return stats.decayed_mean
+        if self.ranking == "posterior":
+            return stats.posterior_mean
+        return stats.mean
+
+    def _rank_key(self, skill: Skill) -> _RankKey:
+        return (-self._rank_score(skill), self._order[skill.name], skill.name)
+
+    def _index(self, skill: Skill) -> None:
+        key = self._keys[skill.name] = self._rank_key(skill)
+        for tag in skill.preconditions or [None]:
+            insort(self._ranked.setdefault(tag, []), key)
+
+    def _unindex(self, skill: Skill) -> None:
+        key = self._keys.pop(skill.name, None)
+        if key is None:
+            return
+        for tag in skill.preconditions or [None]:
+            ranked = self._ranked.get(tag, [])
+            pos = bisect_left(ranked, key)
+            if pos < len(ranked) and ranked[pos] == key:
+                del ranked[pos]
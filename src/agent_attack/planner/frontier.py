@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+from agent_attack.core.types import SearchNode
+
+
+class Frontier(ABC):
+    """Priority queue of nodes awaiting expansion, capped at ``capacity``.
+
+    Higher score pops first; equal scores pop in insertion order.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._counter = count()
+
+    @abstractmethod
+    def push(self, node: SearchNode) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def pop(self) -> SearchNode:
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def peek(self) -> SearchNode:
+        """The node ``pop`` would return, left in place. Override where cheaper than pop-and-push."""
+        node = self.pop()
+        self.push(node)
+        return node
+
+    def trim(self) -> None:
+        """Called after each expansion; implementations that bound lazily truncate here."""
+
+
+class SortedFrontier(Frontier):
+    """Heap that is fully re-sorted and truncated to ``capacity`` after each expansion."""
+
+    def __init__(self, capacity: int) -> None:
+        super().__init__(capacity)
+        self._heap: list[tuple[float, int, SearchNode]] = []
+
+    def push(self, node: SearchNode) -> None:
+        heappush(self._heap, (-node.score, next(self._counter), node))
+
+    def pop(self) -> SearchNode:
+        return heappop(self._heap)[2]
+
+    def peek(self) -> SearchNode:
+        return self._heap[0][2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def trim(self) -> None:
+        if len(self._heap) > self.capacity:
+            self._heap = sorted(self._heap, key=lambda x: x[:2])[: self.capacity]
+
+
+class BoundedFrontier(Frontier):
+    """Size-capped double-ended heap: O(log k) push, pop-best and evict-worst.
+
+    A best-first and a worst-first heap index the same entries; removals from one side
+    are applied lazily to the other and both are compacted once stale entries dominate.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        super().__init__(capacity)
+        self._best: list[tuple[float, int, SearchNode]] = []
+        self._worst: list[tuple[float, int, SearchNode]] = []
+        self._alive: set[int] = set()
+
+    def push(self, node: SearchNode) -> None:
+        if self.capacity <= 0:
+            return
+        seq = next(self._counter)
+        if len(self._alive) >= self.capacity:
+            worst_score, neg_seq, _ = self._peek(self._worst)
+            if (-node.score, seq) > (-worst_score, -neg_seq):
+                return
+            heappop(self._worst)
+            self._alive.discard(-neg_seq)
+        self._alive.add(seq)
+        heappush(self._best, (-node.score, seq, node))
+        heappush(self._worst, (node.score, -seq, node))
+        self._compact()
+
+    def pop(self) -> SearchNode:
+        _, seq, node = self._peek(self._best)
+        heappop(self._best)
+        self._alive.discard(seq)
+        self._compact()
+        return node
+
+    def peek(self) -> SearchNode:
+        return self._peek(self._best)[2]
+
+    def __len__(self) -> int:
+        return len(self._alive)
+
+    def _peek(self, heap: list[tuple[float, int, SearchNode]]) -> tuple[float, int, SearchNode]:
+        while heap and abs(heap[0][1]) not in self._alive:
+            heappop(heap)
+        if not heap:
+            raise IndexError("pop from empty frontier")
+        return heap[0]
+
+    def _compact(self) -> None:
+        limit = 2 * len(self._alive) + 16
+        if len(self._best) > limit:
+            self._best = [entry for entry in self._best if entry[1] in self._alive]
+            heapify(self._best)
+        if len(self._worst) > limit:
+            self._worst = [entry for entry in self._worst if -entry[1] in self._alive]
+            heapify(self._worst)
+
+
+FRONTIERS: dict[str, type[Frontier]] = {
+    "bounded": BoundedFrontier,
+    "sorted": SortedFrontier,
+}
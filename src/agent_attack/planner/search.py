@@ -1,18 +1,55 @@
 from __future__ import annotations
 
-from dataclasses import replace
-from heapq import heappop, heappush
-from itertools import count
+import hashlib
+from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Hashable, TypeVar
 from uuid import uuid4
 
 from agent_attack.core.interfaces import ActionRealizer, Checker, ParserTagger, VictimModel
-from agent_attack.core.types import Action, AttackGoal, SearchNode, SearchState
+from agent_attack.core.tracing import get_tracer
+from agent_attack.core.types import Action, AttackGoal, Observation, SearchNode, SearchState
 from agent_attack.memory.skills import SkillLibrary
+from agent_attack.planner.frontier import BoundedFrontier, Frontier
 from agent_attack.skills.attack_techniques import TechniqueLibrary
 
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+@dataclass(slots=True)
+class _Expansion:
+    """Victim calls launched for one node, awaiting judging."""
+
+    node: SearchNode
+    actions: list[Action]
+    prompts: list[str]
+    responses: list[Future[str]]
+    candidates: list[tuple[str, str, str]]
+
 
 class FrontierPlanner:
-    """Best-first planner with explicit backtracking via frontier."""
+    """Best-first planner with explicit backtracking via frontier.
+
+    With ``expansion_workers > 1`` the victim calls of all siblings are sent
+    concurrently, then all judge calls; children are still scored and fed to the
+    skill library in candidate order, so the explored tree matches serial mode.
+
+    ``transposition`` enables a transposition table: a candidate whose signature
+    (``"sequence"``: ordered action names, ``"multiset"``: order-insensitive; optionally
+    plus a hash of the parent's last response) was already reached is dropped before
+    any model call. ``stats["transpositions"]`` counts the skipped nodes.
+
+    With ``multi_turn`` the victim receives ``realizer.to_messages`` chat transcripts
+    (via ``respond_messages``) instead of a single flat prompt, so a server-side prefix
+    cache can reuse the shared ancestor turns. Images passed to ``run`` ride on the first
+    user turn; in flat mode each prompt is then sent as a one-message transcript.
+
+    With ``pipeline`` the victim calls of the next frontier node are started while the
+    current node's children are judged (see ``_run_pipelined``); ``stats`` then reports
+    speculation hits, misses and ``wasted_calls``.
+    """
 
     def __init__(
         self,
@@ -24,7 +61,17 @@ class FrontierPlanner:
         technique_library: TechniqueLibrary,
         max_budget: int = 20,
         beam_width: int = 5,
+        expansion_workers: int = 1,
+        batch_judge: bool = False,
+        transposition: str | None = None,
+        transposition_include_response: bool = False,
+        frontier_factory: Callable[[int], Frontier] = BoundedFrontier,
+        multi_turn: bool = False,
+        pipeline: bool = False,
+        keep_misspeculated: bool = False,
     ) -> None:
+        if transposition not in {None, "sequence", "multiset"}:
+            raise ValueError(f"Unsupported transposition signature: {transposition}")
         self.victim = victim
         self.parser = parser
         self.checker = checker
@@ -33,44 +80,102 @@ class FrontierPlanner:
         self.technique_library = technique_library
         self.max_budget = max_budget
         self.beam_width = beam_width
-        self._counter = count()
+        self.expansion_workers = expansion_workers
+        self.batch_judge = batch_judge
+        self.transposition = transposition
+        self.transposition_include_response = transposition_include_response
+        self.frontier_factory = frontier_factory
+        self.multi_turn = multi_turn
+        self.pipeline = pipeline
+        self.keep_misspeculated = keep_misspeculated
+        self.stats: dict[str, int] = {}
+        self._seen: set[Hashable] = set()
 
-    def run(self, goal: AttackGoal, seed_prompt: str) -> list[SearchNode]:
+    def run(self, goal: AttackGoal, seed_prompt: str, images: Sequence[str] = ()) -> list[SearchNode]:
         root = SearchNode(
             node_id=str(uuid4()),
             parent_id=None,
             depth=0,
             goal=goal,
-            state=SearchState(history=[seed_prompt]),
+            state=SearchState(history=[seed_prompt], images=tuple(images)),
         )
-        frontier: list[tuple[float, int, SearchNode]] = []
-        heappush(frontier, (-root.score, next(self._counter), root))
+        self.stats = {"transpositions": 0}
+        self._seen = {self._signature(root, None)}
+        frontier = self.frontier_factory(self.beam_width)
+        frontier.push(root)
         explored: list[SearchNode] = [root]
 
+        if self.pipeline:
+            self._run_pipelined(frontier, explored)
+            return explored
         while frontier and len(explored) < self.max_budget:
-            _, _, node = heappop(frontier)
-            for child in self._expand(node):
-                explored.append(child)
-                if self.checker.should_prune(child):
-                    continue
-                heappush(frontier, (-child.score, next(self._counter), child))
-
-            if len(frontier) > self.beam_width:
-                frontier = sorted(frontier, key=lambda x: x[0])[: self.beam_width]
-
+            node = frontier.pop()
+            self._push_children(self._expand(node), frontier, explored)
         return explored
 
+    def _push_children(self, children: list[SearchNode], frontier: Frontier, explored: list[SearchNode]) -> None:
+        for child in children:
+            explored.append(child)
+            if self.checker.should_prune(child):
+                continue
+            frontier.push(child)
+        frontier.trim()
+
     def _expand(self, node: SearchNode) -> list[SearchNode]:
+        actions = self._plan(node)
+        requests, prompts = self._realize(node, actions)
+        responses = self._map(lambda request: self._call_victim(node, request), requests)
+        return self._judge_children(node, actions, prompts, responses)
+
+    def _plan(self, node: SearchNode, claim: bool = True) -> list[Action]:
+        """Candidate actions minus transpositions; ``claim=False`` filters without reserving signatures."""
         actions = self._candidate_actions(node)
-        children: list[SearchNode] = []
-        for action in actions:
-            prompt = self.realizer.to_prompt(node, action)
-            response = self.victim.respond(prompt)
-            obs = self.parser.parse(response, node)
+        if self.transposition:
+            if claim:
+                actions = [action for action in actions if self._claim(node, action)]
+            else:
+                actions = [action for action in actions if self._signature(node, action) not in self._seen]
+        return actions
+
+    def _realize(self, node: SearchNode, actions: list[Action]) -> tuple[list[Any], list[str]]:
+        with get_tracer().span("realize", actions=len(actions)):
+            if self.multi_turn:
+                requests: list[Any] = [self.realizer.to_messages(node, action) for action in actions]
+                prompts = [messages[-1]["content"] for messages in requests]
+            else:
+                prompts = [self.realizer.to_prompt(node, action) for action in actions]
+                requests = prompts
+                if node.state.images:
+                    images = list(node.state.images)
+                    requests = [[{"role": "user", "content": prompt, "images": images}] for prompt in prompts]
+        return requests, prompts
+
+    def _call_victim(self, node: SearchNode, request: Any) -> str:
+        with get_tracer().span("victim", depth=node.depth + 1):
+            if isinstance(request, list):
+                return self.victim.respond_messages(request)
+            return self.victim.respond(request)
 
+    def _judge_children(
+        self, node: SearchNode, actions: list[Action], prompts: list[str], responses: list[str]
+    ) -> list[SearchNode]:
+        tracer = get_tracer()
+
+        def call_judge(response: str) -> Observation:
+            with tracer.span("judge", depth=node.depth + 1):
+                return self.parser.parse(response, node)
+
+        if self.batch_judge:
+            with tracer.span("judge", depth=node.depth + 1, batch=len(responses)):
+                observations = self.parser.parse_batch(responses, node)
+        else:
+            observations = self._map(call_judge, responses)
+
+        children: list[SearchNode] = []
+        for action, prompt, response, obs in zip(actions, prompts, responses, observations):
             state = replace(node.state)
-            state.history = [*node.state.history, prompt, response]
-            state.attempted_actions = [*node.state.attempted_actions, action.name]
+            state.history = node.state.history.append(prompt, response)
+            state.attempted_actions = node.state.attempted_actions.append(action.name)
             state.budget_used += 1
 
             child = SearchNode(
@@ -82,11 +187,119 @@ class FrontierPlanner:
                 action=action,
                 observation=obs,
             )
-            child.score = self.checker.score(node, child)
-            self.skill_library.observe_transition(node, child)
+            with tracer.span("score"):
+                child.score = self.checker.score(node, child)
+            with tracer.span("skill_update"):
+                self.skill_library.observe_transition(node, child)
             children.append(child)
         return children
 
+    def _run_pipelined(self, frontier: Frontier, explored: list[SearchNode]) -> None:
+        """Judge each expansion while the victim calls of the next-best frontier node are in flight.
+
+        The speculative node is the frontier's best before the current children are pushed,
+        and its actions are planned before their skill updates. Once the current expansion is
+        committed, a speculation is a hit if the serial planner would have made the same
+        choice. By default a miss is discarded (unfinished calls cancelled, finished ones
+        counted in ``wasted_calls``) and matching actions' responses are reused, so the tree
+        matches serial mode; with ``keep_misspeculated`` it is committed as an explored node.
+        """
+        self.stats.update(speculated=0, speculation_hits=0, speculation_misses=0, wasted_calls=0)
+        with ThreadPoolExecutor(max_workers=2 * max(1, self.expansion_workers)) as pool:
+            node = frontier.pop()
+            current: _Expansion | None = self._launch(node, self._plan(node), pool)
+            while current is not None:
+                speculative = None
+                if frontier and len(explored) + len(current.actions) < self.max_budget:
+                    node = frontier.pop() if self.keep_misspeculated else frontier.peek()
+                    speculative = self._launch(node, self._plan(node, claim=self.keep_misspeculated), pool)
+                    self.stats["speculated"] += 1
+                responses = [future.result() for future in current.responses]
+                children = self._judge_children(current.node, current.actions, current.prompts, responses)
+                self._push_children(children, frontier, explored)
+                current = self._next_expansion(speculative, frontier, explored, pool)
+
+    def _next_expansion(
+        self, speculative: _Expansion | None, frontier: Frontier, explored: list[SearchNode], pool: ThreadPoolExecutor
+    ) -> _Expansion | None:
+        if speculative is None:
+            if not frontier or len(explored) >= self.max_budget:
+                return None
+            node = frontier.pop()
+            return self._launch(node, self._plan(node), pool)
+        if self.keep_misspeculated:
+            outranked = bool(frontier) and frontier.peek().score > speculative.node.score
+            stale = self._action_keys(self._candidate_actions(speculative.node)) != speculative.candidates
+            self.stats["speculation_misses" if outranked or stale else "speculation_hits"] += 1
+            return speculative
+        if not frontier:
+            self._discard(speculative.responses)
+            return None
+        node = frontier.pop()
+        if node is not speculative.node:
+            self.stats["speculation_misses"] += 1
+            self._discard(speculative.responses)
+            return self._launch(node, self._plan(node), pool)
+        # Same node: replan with the updated skills and reuse the responses of unchanged actions.
+        actions = self._plan(node)
+        launched = dict(zip(self._action_keys(speculative.actions), zip(speculative.prompts, speculative.responses)))
+        missing = [action for action, key in zip(actions, self._action_keys(actions)) if key not in launched]
+        fresh = self._launch(node, missing, pool)
+        added = dict(zip(self._action_keys(missing), zip(fresh.prompts, fresh.responses)))
+        keys = self._action_keys(actions)
+        self._discard([future for key, (_, future) in launched.items() if key not in keys])
+        self.stats["speculation_misses" if missing or len(keys) != len(launched) else "speculation_hits"] += 1
+        pairs = [launched.get(key) or added[key] for key in keys]
+        return _Expansion(
+            node=node,
+            actions=actions,
+            prompts=[prompt for prompt, _ in pairs],
+            responses=[future for _, future in pairs],
+            candidates=speculative.candidates,
+        )
+
+    def _launch(self, node: SearchNode, actions: list[Action], pool: ThreadPoolExecutor) -> _Expansion:
+        requests, prompts = self._realize(node, actions)
+        return _Expansion(
+            node=node,
+            actions=actions,
+            prompts=prompts,
+            responses=[pool.submit(self._call_victim, node, request) for request in requests],
+            candidates=self._action_keys(self._candidate_actions(node)),
+        )
+
+    def _discard(self, responses: list[Future[str]]) -> None:
+        for future in responses:
+            if not future.cancel():
+                self.stats["wasted_calls"] += 1
+
+    @staticmethod
+    def _action_keys(actions: list[Action]) -> list[tuple[str, str, str]]:
+        return [(action.name, action.source, repr(action.payload)) for action in actions]
+
+    def _claim(self, node: SearchNode, action: Action) -> bool:
+        key = self._signature(node, action)
+        if key in self._seen:
+            self.stats["transpositions"] += 1
+            return False
+        self._seen.add(key)
+        return True
+
+    def _signature(self, node: SearchNode, action: Action | None) -> Hashable:
+        """Signature of the child reached from ``node`` via ``action`` (``node`` itself if None)."""
+        names = node.signature() if action is None else (*node.signature(), action.name)
+        key: Hashable = tuple(sorted(names)) if self.transposition == "multiset" else names
+        if self.transposition_include_response:
+            last = node.observation.raw_response if node.observation else ""
+            key = (key, hashlib.sha1(last.encode("utf-8")).hexdigest())
+        return key
+
+    def _map(self, fn: Callable[[_T], _R], items: list[_T]) -> list[_R]:
+        if self.expansion_workers <= 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.expansion_workers, len(items))) as pool:
+            return list(pool.map(fn, items))
+
     def _candidate_actions(self, node: SearchNode) -> list[Action]:
         operators = [
             Action(name="reframe_goal", payload={"style": "indirect"}),
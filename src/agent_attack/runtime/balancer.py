@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from agent_attack.runtime.http_pool import ConnectionPool, shared_pool
+
+STRATEGIES = ("least_outstanding", "round_robin", "latency_weighted")
+
+
+@dataclass(slots=True)
+class Endpoint:
+    url: str
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    ewma_latency_s: float | None = None
+    busy_s: float = 0.0
+    ejected_until: float = 0.0
+
+
+class EndpointBalancer:
+    """Spread requests for one model over several replica base URLs.
+
+    ``strategy`` is ``"least_outstanding"`` (fewest in-flight requests, round-robin on ties),
+    ``"round_robin"`` or ``"latency_weighted"`` (random, weighted by inverse EWMA latency).
+    An endpoint that fails ``eject_after`` times in a row (5xx or connection error) is
+    ejected for ``eject_s`` seconds. With ``health_interval_s`` a background thread probes
+    ``GET {url}/models`` on every endpoint, ejecting unreachable ones and reinstating
+    recovered ones early. If every endpoint is ejected the one due back soonest is used.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        strategy: str = "least_outstanding",
+        eject_after: int = 3,
+        eject_s: float = 30.0,
+        health_interval_s: float | None = None,
+        health_headers: dict[str, str] | None = None,
+        pool: ConnectionPool | None = None,
+        ewma_alpha: float = 0.2,
+        seed: int | None = None,
+    ) -> None:
+        if not urls:
+            raise ValueError("EndpointBalancer needs at least one URL")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unsupported balancing strategy: {strategy}")
+        self.endpoints = [Endpoint(url.rstrip("/")) for url in urls]
+        self.strategy = strategy
+        self.eject_after = eject_after
+        self.eject_s = eject_s
+        self.health_interval_s = health_interval_s
+        self.health_headers = dict(health_headers or {})
+        self.pool = pool or shared_pool()
+        self.ewma_alpha = ewma_alpha
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next = 0
+        self._created = time.monotonic()
+        self._stop = threading.Event()
+        if health_interval_s:
+            threading.Thread(target=self._health_loop, daemon=True).start()
+
+    def acquire(self) -> Endpoint:
+        with self._lock:
+            now = time.monotonic()
+            live = [endpoint for endpoint in self.endpoints if endpoint.ejected_until <= now]
+            if not live:
+                endpoint = min(self.endpoints, key=lambda e: e.ejected_until)
+            elif self.strategy == "round_robin":
+                endpoint = live[self._next % len(live)]
+                self._next += 1
+            elif self.strategy == "latency_weighted":
+                endpoint = self._rng.choices(live, weights=self._latency_weights(live))[0]
+            else:
+                start = self._next % len(live)
+                self._next += 1
+                rotated = live[start:] + live[:start]
+                endpoint = min(rotated, key=lambda e: e.outstanding)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, ok: bool, latency_s: float) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.busy_s += latency_s
+            if ok:
+                endpoint.consecutive_failures = 0
+                if endpoint.ewma_latency_s is None:
+                    endpoint.ewma_latency_s = latency_s
+                else:
+                    endpoint.ewma_latency_s += self.ewma_alpha * (latency_s - endpoint.ewma_latency_s)
+            else:
+                self._record_failure(endpoint)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-endpoint counters; ``utilization`` is busy request-seconds per wall-clock second (mean in-flight requests)."""
+        with self._lock:
+            wall = max(time.monotonic() - self._created, 1e-9)
+            now = time.monotonic()
+            return {
+                endpoint.url: {
+                    "requests": endpoint.requests,
+                    "failures": endpoint.failures,
+                    "ejections": endpoint.ejections,
+                    "outstanding": endpoint.outstanding,
+                    "ewma_latency_ms": endpoint.ewma_latency_s * 1e3 if endpoint.ewma_latency_s is not None else None,
+                    "utilization": endpoint.busy_s / wall,
+                    "ejected": endpoint.ejected_until > now,
+                }
+                for endpoint in self.endpoints
+            }
+
+    def check_health(self) -> None:
+        """Probe every endpoint once, ejecting failures and reinstating recoveries."""
+        for endpoint in self.endpoints:
+            try:
+                status, _ = self.pool.get(f"{endpoint.url}/models", self.health_headers, timeout=5.0)
+                healthy = status < 500
+            except (ConnectionError, TimeoutError, OSError):
+                healthy = False
+            with self._lock:
+                if healthy:
+                    endpoint.consecutive_failures = 0
+                    endpoint.ejected_until = 0.0
+                else:
+                    self._record_failure(endpoint)
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def _record_failure(self, endpoint: Endpoint) -> None:
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.eject_after and endpoint.ejected_until <= time.monotonic():
+            endpoint.ejected_until = time.monotonic() + self.eject_s
+            endpoint.ejections += 1
+
+    def _latency_weights(self, live: list[Endpoint]) -> list[float]:
+        known = [endpoint.ewma_latency_s for endpoint in live if endpoint.ewma_latency_s]
+        default = sum(known) / len(known) if known else 1.0
+        return [1.0 / (endpoint.ewma_latency_s or default) for endpoint in live]
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_interval_s):
+            self.check_health()
+
+
+_balancers: dict[tuple[tuple[str, ...], str], EndpointBalancer] = {}
+_balancers_lock = threading.Lock()
+
+
+def shared_balancer(urls: list[str], strategy: str = "least_outstanding", **kwargs: Any) -> EndpointBalancer:
+    """Process-wide balancer per (endpoint list, strategy), so all clients of a replica set share load counts."""
+    key = (tuple(url.rstrip("/") for url in urls), strategy)
+    with _balancers_lock:
+        balancer = _balancers.get(key)
+        if balancer is None:
+            balancer = _balancers[key] = EndpointBalancer(urls, strategy, **kwargs)
+        return balancer
+
+
+def endpoint_stats() -> dict[str, dict[str, Any]]:
+    """Utilization of every endpoint behind a shared balancer, for end-of-run summaries."""
+    with _balancers_lock:
+        balancers = list(_balancers.values())
+    stats: dict[str, dict[str, Any]] = {}
+    for balancer in balancers:
+        stats.update(balancer.stats())
+    return stats
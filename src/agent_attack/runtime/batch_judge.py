@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from agent_attack.core.interfaces import VictimModel
+from agent_attack.core.types import Action, AttackGoal, SearchNode, SearchState
+from agent_attack.runtime.http_pool import ConnectionPool, shared_pool
+from agent_attack.runtime.judge import LLMPromptJudge
+
+COMPLETED = "completed"
+FAILED = "failed"
+IN_PROGRESS = "in_progress"
+
+_CHAT_PATH = "/v1/chat/completions"
+
+
+@dataclass(slots=True)
+class BatchRequest:
+    custom_id: str
+    prompt: str
+
+
+@dataclass(slots=True)
+class _PendingJudgement:
+    parent: SearchNode
+    entry: dict[str, Any]
+
+
+def write_batch_file(
+    path: str | Path,
+    requests: Iterable[BatchRequest],
+    model: str,
+    temperature: float = 0.0,
+    max_tokens: int | None = None,
+) -> int:
+    """Write one OpenAI batch line per request (the format vLLM's ``run_batch`` also reads); returns the count."""
+    count = 0
+    with Path(path).open("w", encoding="utf-8") as fh:
+        for request in requests:
+            body: dict[str, Any] = {
+                "model": model,
+                "messages": [{"role": "user", "content": request.prompt}],
+                "temperature": temperature,
+            }
+            if max_tokens is not None:
+                body["max_tokens"] = max_tokens
+            line = {"custom_id": request.custom_id, "method": "POST", "url": _CHAT_PATH, "body": body}
+            fh.write(json.dumps(line, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def read_batch_output(lines: Iterable[str | bytes]) -> dict[str, str]:
+    """``custom_id -> completion text`` from OpenAI/vLLM or Anthropic batch output lines; failed entries are left out."""
+    results: dict[str, str] = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        row = json.loads(line)
+        custom_id = row.get("custom_id")
+        if custom_id is None:
+            continue
+        if "result" in row:
+            result = row["result"] or {}
+            if result.get("type") != "succeeded":
+                continue
+            blocks = (result.get("message") or {}).get("content") or []
+            results[custom_id] = "".join(block.get("text", "") for block in blocks if block.get("type") == "text")
+            continue
+        response = row.get("response") or {}
+        if row.get("error") or response.get("status_code", 200) >= 400:
+            continue
+        choices = (response.get("body") or {}).get("choices") or []
+        if choices:
+            results[custom_id] = (choices[0].get("message") or {}).get("content") or ""
+    return results
+
+
+class BatchBackend(ABC):
+    """Submit a batch request file, report its status, and fetch ``custom_id -> completion text``."""
+
+    @abstractmethod
+    def submit(self, path: Path) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """One of ``COMPLETED``, ``FAILED`` or ``IN_PROGRESS``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def results(self, batch_id: str) -> dict[str, str]:
+        raise NotImplementedError
+
+
+class LocalBatchBackend(BatchBackend):
+    """File-based stand-in for a batch API that answers each request through an interactive client.
+
+    ``submit`` processes the file in a background thread with ``workers`` concurrent calls
+    and writes ``<batch_id>.output.jsonl`` to ``workdir`` in the OpenAI batch output format
+    when done (``<batch_id>.failed`` if the file cannot be processed). Only each request's
+    messages are used; model and sampling settings come from ``client``.
+    """
+
+    def __init__(self, client: VictimModel, workdir: str | Path, workers: int = 8) -> None:
+        self.client = client
+        self.workdir = Path(workdir)
+        self.workers = workers
+        self.workdir.mkdir(parents=True, exist_ok=True)
+
+    def submit(self, path: Path) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        threading.Thread(target=self._process, args=(Path(path), batch_id), daemon=True).start()
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        if self._output(batch_id).exists():
+            return COMPLETED
+        if (self.workdir / f"{batch_id}.failed").exists():
+            return FAILED
+        return IN_PROGRESS
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        with self._output(batch_id).open("r", encoding="utf-8") as fh:
+            return read_batch_output(fh)
+
+    def _output(self, batch_id: str) -> Path:
+        return self.workdir / f"{batch_id}.output.jsonl"
+
+    def _process(self, path: Path, batch_id: str) -> None:
+        try:
+            with path.open("r", encoding="utf-8") as fh:
+                rows = [json.loads(line) for line in fh if line.strip()]
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+                lines = list(pool.map(self._answer, rows))
+            tmp = self._output(batch_id).with_suffix(".tmp")
+            tmp.write_text("".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines), encoding="utf-8")
+            os.replace(tmp, self._output(batch_id))
+        except Exception as exc:
+            (self.workdir / f"{batch_id}.failed").write_text(f"{type(exc).__name__}: {exc}", encoding="utf-8")
+
+    def _answer(self, row: dict[str, Any]) -> dict[str, Any]:
+        line: dict[str, Any] = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": row["custom_id"]}
+        try:
+            content = self.client.respond_messages(row["body"]["messages"])
+        except Exception as exc:
+            return {**line, "response": None, "error": {"message": f"{type(exc).__name__}: {exc}"}}
+        body = {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]}
+        return {**line, "response": {"status_code": 200, "body": body}, "error": None}
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API: upload the file (``purpose=batch``), create a 24h batch, download its output file."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        pool: ConnectionPool | None = None,
+        timeout_s: float = 120.0,
+    ) -> None:
+        key = api_key or os.getenv("OPENAI_API_KEY")
+        if not key:
+            raise ValueError("Missing api_key for the OpenAI batch backend")
+        self.base_url = (base_url or "https://api.openai.com/v1").rstrip("/")
+        self.headers = {"Authorization": f"Bearer {key}"}
+        self.pool = pool or shared_pool()
+        self.timeout_s = timeout_s
+        self._output_files: dict[str, str] = {}
+
+    def submit(self, path: Path) -> str:
+        boundary = uuid.uuid4().hex
+        body = b"".join(
+            [
+                f'--{boundary}\r\nContent-Disposition: form-data; name="purpose"\r\n\r\nbatch\r\n'.encode(),
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{Path(path).name}"\r\n'.encode(),
+                b"Content-Type: application/jsonl\r\n\r\n",
+                Path(path).read_bytes(),
+                f"\r\n--{boundary}--\r\n".encode(),
+            ]
+        )
+        uploaded = self._call("POST", "/files", body, f"multipart/form-data; boundary={boundary}")
+        batch = {"input_file_id": uploaded["id"], "endpoint": _CHAT_PATH, "completion_window": "24h"}
+        return self._call("POST", "/batches", json.dumps(batch).encode("utf-8"), "application/json")["id"]
+
+    def status(self, batch_id: str) -> str:
+        batch = self._call("GET", f"/batches/{batch_id}")
+        if batch["status"] == "completed":
+            self._output_files[batch_id] = batch.get("output_file_id") or ""
+            return COMPLETED
+        if batch["status"] in {"failed", "expired", "cancelled"}:
+            return FAILED
+        return IN_PROGRESS
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        file_id = self._output_files.get(batch_id)
+        if file_id is None:
+            self.status(batch_id)
+            file_id = self._output_files.get(batch_id)
+        if not file_id:
+            return {}
+        return read_batch_output(self._get(f"{self.base_url}/files/{file_id}/content").splitlines())
+
+    def _call(self, method: str, path: str, body: bytes | None = None, content_type: str | None = None) -> dict[str, Any]:
+        url = f"{self.base_url}{path}"
+        if method == "GET":
+            return json.loads(self._get(url))
+        status, raw = self.pool.post(url, body or b"", {**self.headers, "Content-Type": content_type or ""}, self.timeout_s)
+        if status >= 400:
+            raise RuntimeError(f"Batch request failed: {status} {raw.decode('utf-8', errors='ignore')}")
+        return json.loads(raw)
+
+    def _get(self, url: str) -> bytes:
+        status, raw = self.pool.get(url, self.headers, self.timeout_s)
+        if status >= 400:
+            raise RuntimeError(f"Batch request failed: {status} {raw.decode('utf-8', errors='ignore')}")
+        return raw
+
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches API; OpenAI-format request lines are converted on submit."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        pool: ConnectionPool | None = None,
+        timeout_s: float = 120.0,
+    ) -> None:
+        key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        if not key:
+            raise ValueError("Missing api_key for the Anthropic batch backend")
+        self.base_url = (base_url or "https://api.anthropic.com").rstrip("/")
+        self.headers = {"x-api-key": key, "anthropic-version": "2023-06-01"}
+        self.pool = pool or shared_pool()
+        self.timeout_s = timeout_s
+        self._results_urls: dict[str, str] = {}
+
+    def submit(self, path: Path) -> str:
+        requests = []
+        with Path(path).open("r", encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                body = row["body"]
+                params = {
+                    "model": body["model"],
+                    # Required by the Messages API.
+                    "max_tokens": body.get("max_tokens", 512),
+                    "temperature": body.get("temperature", 0.0),
+                    "messages": body["messages"],
+                }
+                requests.append({"custom_id": row["custom_id"], "params": params})
+        payload = json.dumps({"requests": requests}).encode("utf-8")
+        headers = {**self.headers, "Content-Type": "application/json"}
+        status, raw = self.pool.post(f"{self.base_url}/v1/messages/batches", payload, headers, self.timeout_s)
+        if status >= 400:
+            raise RuntimeError(f"Batch request failed: {status} {raw.decode('utf-8', errors='ignore')}")
+        return json.loads(raw)["id"]
+
+    def status(self, batch_id: str) -> str:
+        batch = json.loads(self._get(f"{self.base_url}/v1/messages/batches/{batch_id}"))
+        if batch["processing_status"] != "ended":
+            return IN_PROGRESS
+        self._results_urls[batch_id] = batch.get("results_url") or ""
+        return COMPLETED
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        if batch_id not in self._results_urls:
+            self.status(batch_id)
+        url = self._results_urls.get(batch_id)
+        return read_batch_output(self._get(url).splitlines()) if url else {}
+
+    def _get(self, url: str) -> bytes:
+        status, raw = self.pool.get(url, self.headers, self.timeout_s)
+        if status >= 400:
+            raise RuntimeError(f"Batch request failed: {status} {raw.decode('utf-8', errors='ignore')}")
+        return raw
+
+
+def run_batch(backend: BatchBackend, path: str | Path, poll_interval_s: float = 10.0, timeout_s: float | None = None) -> tuple[str, dict[str, str]]:
+    """Submit ``path``, poll until the batch finishes, and return (batch_id, results)."""
+    batch_id = backend.submit(Path(path))
+    deadline = None if timeout_s is None else time.monotonic() + timeout_s
+    while (status := backend.status(batch_id)) == IN_PROGRESS:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Batch {batch_id} did not finish within {timeout_s}s")
+        time.sleep(poll_interval_s)
+    if status == FAILED:
+        raise RuntimeError(f"Batch {batch_id} failed")
+    return batch_id, backend.results(batch_id)
+
+
+class BatchRescorer:
+    """Re-judge the trajectories of finished agent results offline, without calling the victim.
+
+    ``write`` emits one judge request per non-root trajectory node, keyed by ``node_id``,
+    with the prompt ``judge`` would have built during the search: the parent's action
+    history (rebuilt from ``parent_id``; records written before that field existed are
+    judged without history) and the node's response. ``apply`` joins completions back by
+    ``node_id`` to the records of the last ``write`` and overwrites each node's ``tags`` and
+    ``score``; nodes without a result keep their old verdict.
+    """
+
+    def __init__(self, judge: LLMPromptJudge, goal: AttackGoal) -> None:
+        self.judge = judge
+        self.goal = goal
+        self._pending: dict[str, _PendingJudgement] = {}
+
+    def write(self, records: Iterable[dict[str, Any]], path: str | Path, model: str, max_tokens: int | None = None) -> int:
+        requests = [
+            BatchRequest(node_id, self.judge.prompt(pending.parent, pending.entry.get("response", "")))
+            for node_id, pending in self._collect(records).items()
+        ]
+        return write_batch_file(path, requests, model, max_tokens=max_tokens)
+
+    def apply(self, results: dict[str, str]) -> dict[str, int]:
+        summary = {"requests": len(self._pending), "judged": 0, "missing": 0, "changed_tags": 0}
+        for node_id, pending in self._pending.items():
+            raw = results.get(node_id)
+            if raw is None:
+                summary["missing"] += 1
+                continue
+            entry = pending.entry
+            observation = self.judge.parse_verdict(raw, entry.get("response", ""))
+            depth = int(entry.get("depth", pending.parent.depth + 1))
+            child = SearchNode(
+                node_id=node_id,
+                parent_id=pending.parent.node_id,
+                depth=depth,
+                goal=self.goal,
+                state=SearchState(budget_used=depth),
+                action=Action(name=entry.get("action", ""), source=entry.get("action_source", "operator")),
+                observation=observation,
+            )
+            tags = [tag.value for tag in observation.tags]
+            summary["judged"] += 1
+            summary["changed_tags"] += int(set(tags) != set(entry.get("tags", [])))
+            entry["tags"] = tags
+            entry["score"] = self.judge.score(pending.parent, child)
+        return summary
+
+    def submit(
+        self, backend: BatchBackend, path: str | Path, poll_interval_s: float = 10.0, timeout_s: float | None = None
+    ) -> dict[str, Any]:
+        """Run the request file from ``write`` through ``backend`` and ``apply`` its results."""
+        batch_id, results = run_batch(backend, path, poll_interval_s, timeout_s)
+        return {"batch_id": batch_id, **self.apply(results)}
+
+    def _collect(self, records: Iterable[dict[str, Any]]) -> dict[str, _PendingJudgement]:
+        self._pending = {}
+        for record in records:
+            trajectory = record.get("trajectory") or []
+            by_id = {entry["node_id"]: entry for entry in trajectory}
+            nodes: dict[str, SearchNode] = {}
+            for entry in trajectory:
+                if entry.get("action") == "root":
+                    continue
+                parent = self._node(by_id.get(entry.get("parent_id")), by_id, nodes)
+                self._pending[entry["node_id"]] = _PendingJudgement(parent, entry)
+        return self._pending
+
+    def _node(self, entry: dict[str, Any] | None, by_id: dict[str, dict[str, Any]], nodes: dict[str, SearchNode]) -> SearchNode:
+        if entry is None:
+            return SearchNode(node_id="", parent_id=None, depth=0, goal=self.goal, state=SearchState())
+        node = nodes.get(entry["node_id"])
+        if node is not None:
+            return node
+        parent_entry = by_id.get(entry.get("parent_id"))
+        state = SearchState(budget_used=int(entry.get("depth", 0)))
+        if parent_entry is not None:
+            parent = self._node(parent_entry, by_id, nodes)
+            state.attempted_actions = parent.state.attempted_actions.append(entry["action"])
+        node = SearchNode(
+            node_id=entry["node_id"],
+            parent_id=entry.get("parent_id"),
+            depth=int(entry.get("depth", 0)),
+            goal=self.goal,
+            state=state,
+        )
+        nodes[entry["node_id"]] = node
+        return node
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
 import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Collection, Iterable, Iterator, TextIO
 
-from agent_attack.runtime.engine import AttackConfig, CATSAttackEngine
+from agent_attack.core.interfaces import VictimModel
+from agent_attack.core.types import SearchNode
+from agent_attack.runtime.engine import AttackConfig, AttackSession
+from agent_attack.runtime.images import ImageEncoder, shared_image_encoder
 from agent_attack.runtime.model_clients import ClientConfig, HTTPModelClient
+from agent_attack.runtime.response_cache import CachedModelClient, ResponseCache
+from agent_attack.runtime.scheduler import BudgetExceeded
+from agent_attack.runtime.streaming import StopPredicate
 
 
 @dataclass(slots=True)
@@ -31,89 +42,530 @@ class BenchmarkItem:
 
 
 def load_benchmark(path: str | Path) -> list[BenchmarkItem]:
-    raw = json.loads(Path(path).read_text(encoding="utf-8"))
-    if not isinstance(raw, list):
-        raise ValueError("Benchmark file must be a JSON array")
-    return [BenchmarkItem.from_dict(item) for item in raw]
+    return list(iter_benchmark(path))
 
 
-def run_baseline_single_turn(items: list[BenchmarkItem], *, provider: str, model: str, api_key: str | None = None, base_url: str | None = None) -> list[dict[str, Any]]:
-    victim = HTTPModelClient(
+def iter_benchmark(
+    path: str | Path,
+    *,
+    shard: tuple[int, int] | None = None,
+    limit: int | None = None,
+    main_category: Collection[str] | None = None,
+    subcategory: Collection[str] | None = None,
+    style: Collection[str] | None = None,
+) -> Iterator[BenchmarkItem]:
+    """Lazily yield benchmark items from a JSON array or JSONL file.
+
+    ``shard=(i, n)`` keeps rows whose position in the file is ``i`` modulo ``n`` so that
+    ``n`` workers see disjoint slices; filters and ``limit`` apply within the shard.
+    JSONL rows outside the shard are never decoded.
+    """
+    if shard is not None and not 0 <= shard[0] < shard[1]:
+        raise ValueError(f"Invalid shard {shard[0]}/{shard[1]}")
+    filters = {
+        "main_category": set(main_category) if main_category else None,
+        "subcategory": set(subcategory) if subcategory else None,
+        "style": set(style) if style else None,
+    }
+    emitted = 0
+    with Path(path).open("r", encoding="utf-8") as fh:
+        for position, row in _iter_rows(fh, shard):
+            if shard is not None and position % shard[1] != shard[0]:
+                continue
+            if not isinstance(row, dict):
+                raise ValueError(f"Benchmark row {position} must be a JSON object")
+            if any(allowed is not None and row.get(key) not in allowed for key, allowed in filters.items()):
+                continue
+            if limit is not None and emitted >= limit:
+                return
+            emitted += 1
+            yield BenchmarkItem.from_dict(row)
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse an ``i/n`` shard spec."""
+    index, _, total = spec.partition("/")
+    try:
+        shard = int(index), int(total)
+    except ValueError:
+        raise ValueError(f"Shard must look like i/n, got {spec!r}") from None
+    if not 0 <= shard[0] < shard[1]:
+        raise ValueError(f"Invalid shard {spec!r}: need 0 <= i < n")
+    return shard
+
+
+_READ_CHUNK = 1 << 16
+
+
+def _iter_rows(fh: TextIO, shard: tuple[int, int] | None) -> Iterator[tuple[int, Any]]:
+    head = fh.read(_READ_CHUNK).lstrip()
+    fh.seek(0)
+    if head.startswith("["):
+        yield from enumerate(_iter_json_array(fh))
+        return
+    position = 0
+    for lineno, line in enumerate(fh, start=1):
+        if not line.strip():
+            continue
+        if shard is None or position % shard[1] == shard[0]:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"Benchmark file must be a JSON array or JSONL (line {lineno}: {exc.msg})") from exc
+            yield position, row
+        position += 1
+
+
+def _iter_json_array(fh: TextIO) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    opened = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buffer) and not eof:
+            chunk = fh.read(_READ_CHUNK)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        if pos >= len(buffer):
+            raise ValueError("Benchmark JSON array is not terminated")
+        if not opened:
+            if buffer[pos] != "[":
+                raise ValueError("Benchmark file must be a JSON array")
+            opened = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = fh.read(_READ_CHUNK)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield value
+        pos = end
+
+
+def run_baseline_single_turn(
+    items: Iterable[BenchmarkItem],
+    *,
+    provider: str,
+    model: str,
+    api_key: str | None = None,
+    base_url: str | None = None,
+    base_urls: list[str] | None = None,
+    balance_strategy: str = "least_outstanding",
+    health_check_interval_s: float | None = None,
+    concurrency: int = 1,
+    cache: ResponseCache | None = None,
+    cache_mode: str = "read_write",
+    send_images: bool = False,
+    image_max_side: int | None = None,
+    image_prefetch: int = 0,
+    max_tokens: int | None = None,
+    stop: list[str] | None = None,
+    stream: bool = False,
+    stop_predicate: StopPredicate | None = None,
+) -> list[dict[str, Any]]:
+    run_item = _baseline_item_fn(
+        provider,
+        model,
+        api_key,
+        base_url,
+        base_urls,
+        balance_strategy,
+        health_check_interval_s,
+        cache,
+        cache_mode,
+        send_images,
+        image_max_side,
+        max_tokens,
+        stop,
+        stream or stop_predicate is not None,
+        stop_predicate,
+    )
+    if send_images:
+        items = prefetch_images(items, shared_image_encoder(image_max_side), image_prefetch)
+    return _in_order(_iter_items(run_item, items, mode="baseline_single_turn", concurrency=concurrency))
+
+
+def iter_baseline_single_turn(
+    items: Iterable[BenchmarkItem],
+    *,
+    provider: str,
+    model: str,
+    api_key: str | None = None,
+    base_url: str | None = None,
+    base_urls: list[str] | None = None,
+    balance_strategy: str = "least_outstanding",
+    health_check_interval_s: float | None = None,
+    concurrency: int = 1,
+    cache: ResponseCache | None = None,
+    cache_mode: str = "read_write",
+    send_images: bool = False,
+    image_max_side: int | None = None,
+    image_prefetch: int = 0,
+    max_tokens: int | None = None,
+    stop: list[str] | None = None,
+    stream: bool = False,
+    stop_predicate: StopPredicate | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Like ``run_baseline_single_turn`` but yields each record, in input order, as soon as it and all earlier items finished."""
+    run_item = _baseline_item_fn(
+        provider,
+        model,
+        api_key,
+        base_url,
+        base_urls,
+        balance_strategy,
+        health_check_interval_s,
+        cache,
+        cache_mode,
+        send_images,
+        image_max_side,
+        max_tokens,
+        stop,
+        stream or stop_predicate is not None,
+        stop_predicate,
+    )
+    if send_images:
+        items = prefetch_images(items, shared_image_encoder(image_max_side), image_prefetch)
+    for _, record in _iter_items(run_item, items, mode="baseline_single_turn", concurrency=concurrency, ordered=True):
+        yield record
+
+
+def run_agent_attack(
+    items: Iterable[BenchmarkItem],
+    config: AttackConfig,
+    *,
+    concurrency: int = 1,
+    image_prefetch: int = 0,
+    session: AttackSession | None = None,
+) -> list[dict[str, Any]]:
+    """Attack every item through one ``AttackSession``; pass ``session`` to read its judge stats afterwards."""
+    session = session or AttackSession(config)
+    if config.send_images:
+        items = prefetch_images(items, shared_image_encoder(config.image_max_side), image_prefetch)
+    return _in_order(_iter_items(lambda item: _run_agent_item(item, session), items, mode="agent_attack", concurrency=concurrency))
+
+
+def iter_agent_attack(
+    items: Iterable[BenchmarkItem],
+    config: AttackConfig,
+    *,
+    concurrency: int = 1,
+    image_prefetch: int = 0,
+    session: AttackSession | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Like ``run_agent_attack`` but yields each record, in input order, as soon as it and all earlier items finished."""
+    session = session or AttackSession(config)
+    if config.send_images:
+        items = prefetch_images(items, shared_image_encoder(config.image_max_side), image_prefetch)
+    for _, record in _iter_items(lambda item: _run_agent_item(item, session), items, mode="agent_attack", concurrency=concurrency, ordered=True):
+        yield record
+
+
+def _baseline_item_fn(
+    provider: str,
+    model: str,
+    api_key: str | None,
+    base_url: str | None,
+    base_urls: list[str] | None,
+    balance_strategy: str,
+    health_check_interval_s: float | None,
+    cache: ResponseCache | None,
+    cache_mode: str,
+    send_images: bool,
+    image_max_side: int | None,
+    max_tokens: int | None,
+    stop: list[str] | None,
+    stream: bool,
+    stop_predicate: StopPredicate | None,
+) -> Callable[[BenchmarkItem], dict[str, Any]]:
+    victim: VictimModel = HTTPModelClient(
         ClientConfig(
             provider=provider,
             model=model,
             api_key=api_key,
             base_url=base_url,
+            base_urls=list(base_urls or []),
+            balance_strategy=balance_strategy,
+            health_check_interval_s=health_check_interval_s,
+            image_max_side=image_max_side,
+            max_tokens=max_tokens,
+            stop=list(stop or []),
+            stream=stream,
+            stop_predicate=stop_predicate,
         )
     )
-    outputs: list[dict[str, Any]] = []
-    for item in items:
-        response = victim.respond(item.original_prompt)
-        outputs.append(
+    if cache is not None:
+        victim = CachedModelClient(victim, cache, cache_mode)
+
+    def run_item(item: BenchmarkItem) -> dict[str, Any]:
+        if send_images and item.image_path:
+            message = {"role": "user", "content": item.original_prompt, "images": [item.image_path]}
+            response = victim.respond_messages([message])
+        else:
+            response = victim.respond(item.original_prompt)
+        return {
+            "id": item.sample_id,
+            "mode": "baseline_single_turn",
+            "original_prompt": item.original_prompt,
+            "response": response,
+            "meta": _item_meta(item),
+        }
+
+    return run_item
+
+
+def _run_agent_item(item: BenchmarkItem, session: AttackSession) -> dict[str, Any]:
+    planner = session.new_planner()
+    images = [item.image_path] if session.config.send_images and item.image_path else []
+    nodes = planner.run(session.default_goal(), seed_prompt=item.original_prompt, images=images)
+    return {
+        "id": item.sample_id,
+        "mode": "agent_attack",
+        "original_prompt": item.original_prompt,
+        "trajectory": [
             {
-                "id": item.sample_id,
-                "mode": "baseline_single_turn",
-                "original_prompt": item.original_prompt,
-                "response": response,
-                "meta": {
-                    "main_category": item.main_category,
-                    "subcategory": item.subcategory,
-                    "style": item.style,
-                    "image_path": item.image_path,
-                },
+                "node_id": n.node_id,
+                "parent_id": n.parent_id,
+                "depth": n.depth,
+                "action": n.action.name if n.action else "root",
+                "action_source": n.action.source if n.action else "root",
+                "score": n.score,
+                "tags": [t.value for t in n.observation.tags] if n.observation else [],
+                "response": n.observation.raw_response if n.observation else "",
             }
-        )
-    return outputs
+            for n in nodes
+        ],
+        "search_stats": _search_stats(planner.stats, nodes),
+        "meta": _item_meta(item),
+    }
+
 
+def prefetch_images(items: Iterable[BenchmarkItem], encoder: ImageEncoder, lookahead: int) -> Iterator[BenchmarkItem]:
+    """Yield ``items`` unchanged while encoding the images of the next ``lookahead`` items in the background.
 
-def run_agent_attack(items: list[BenchmarkItem], config: AttackConfig) -> list[dict[str, Any]]:
-    outputs: list[dict[str, Any]] = []
+    The encoder's prefetch pool is grown to ``lookahead`` threads so the whole window encodes in parallel.
+    """
+    if lookahead <= 0:
+        yield from items
+        return
+    encoder.reserve_prefetch(lookahead)
+    window: deque[BenchmarkItem] = deque()
     for item in items:
-        per_item_cfg = AttackConfig(
-            seed_prompt=item.original_prompt,
-            objective=config.objective,
-            subgoals=config.subgoals,
-            constraints=config.constraints,
-            target_provider=config.target_provider,
-            target_model=config.target_model,
-            judge_provider=config.judge_provider,
-            judge_model=config.judge_model,
-            target_api_key=config.target_api_key,
-            target_base_url=config.target_base_url,
-            judge_api_key=config.judge_api_key,
-            judge_base_url=config.judge_base_url,
-            max_budget=config.max_budget,
-            beam_width=config.beam_width,
-        )
-        engine = CATSAttackEngine(per_item_cfg)
-        nodes = engine.run()
-        outputs.append(
-            {
+        if item.image_path:
+            encoder.prefetch(item.image_path)
+        window.append(item)
+        if len(window) > lookahead:
+            yield window.popleft()
+    yield from window
+
+
+def _search_stats(planner_stats: dict[str, int], nodes: list[SearchNode]) -> dict[str, int]:
+    stats = dict(planner_stats)
+    fast = [n.observation.metadata for n in nodes if n.observation and n.observation.metadata.get("judge_stage") == "fast"]
+    if fast:
+        validated = [meta for meta in fast if "validation_agreed" in meta]
+        stats["fast_judged"] = len(fast)
+        stats["fast_validated"] = len(validated)
+        stats["fast_agreed"] = sum(1 for meta in validated if meta["validation_agreed"])
+    judged = [n.observation.metadata for n in nodes if n.observation and "judge_full_prompt_tokens" in n.observation.metadata]
+    if judged:
+        stats["judge_prompt_tokens"] = sum(meta["judge_prompt_tokens"] for meta in judged)
+        stats["judge_full_prompt_tokens"] = sum(meta["judge_full_prompt_tokens"] for meta in judged)
+        checked = [meta for meta in judged if "context_agreed" in meta]
+        if checked:
+            stats["judge_context_validated"] = len(checked)
+            stats["judge_context_agreed"] = sum(1 for meta in checked if meta["context_agreed"])
+    return stats
+
+
+def _item_meta(item: BenchmarkItem) -> dict[str, Any]:
+    return {
+        "main_category": item.main_category,
+        "subcategory": item.subcategory,
+        "style": item.style,
+        "image_path": item.image_path,
+    }
+
+
+def _iter_items(
+    fn: Callable[[BenchmarkItem], dict[str, Any]],
+    items: Iterable[BenchmarkItem],
+    *,
+    mode: str,
+    concurrency: int,
+    ordered: bool = False,
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield ``(input_index, record)`` as items finish, with at most ``concurrency`` in flight.
+
+    With ``ordered`` records are yielded in input order: finished records wait in a reorder
+    buffer that counts towards the ``2 * concurrency`` window, so one slow item stalls
+    submission instead of letting the buffer grow.
+
+    A failing item is recorded as an ``error`` entry instead of aborting the run, except for
+    ``BudgetExceeded``: then no further item is started, queued items are cancelled, items
+    already running are finished (and yielded if they succeed), and the exception is re-raised.
+    Items cut off by the budget get no record, so ``--resume`` retries exactly those.
+    """
+
+    def guarded(index: int, item: BenchmarkItem) -> tuple[int, dict[str, Any]]:
+        try:
+            return index, fn(item)
+        except BudgetExceeded:
+            raise
+        except Exception as exc:
+            return index, {
                 "id": item.sample_id,
-                "mode": "agent_attack",
+                "mode": mode,
                 "original_prompt": item.original_prompt,
-                "trajectory": [
-                    {
-                        "node_id": n.node_id,
-                        "depth": n.depth,
-                        "action": n.action.name if n.action else "root",
-                        "action_source": n.action.source if n.action else "root",
-                        "score": n.score,
-                        "tags": [t.value for t in n.observation.tags] if n.observation else [],
-                        "response": n.observation.raw_response if n.observation else "",
-                    }
-                    for n in nodes
-                ],
-                "meta": {
-                    "main_category": item.main_category,
-                    "subcategory": item.subcategory,
-                    "style": item.style,
-                    "image_path": item.image_path,
-                },
+                "error": f"{type(exc).__name__}: {exc}",
+                "meta": _item_meta(item),
             }
-        )
-    return outputs
+
+    if concurrency <= 1:
+        for index, item in enumerate(items):
+            yield guarded(index, item)
+        return
+    stopped: BudgetExceeded | None = None
+    pending: set[Future[tuple[int, dict[str, Any]]]] = set()
+    buffer: dict[int, dict[str, Any]] = {}
+    next_index = 0
+
+    def drain() -> Iterator[tuple[int, dict[str, Any]]]:
+        nonlocal pending, stopped, next_index
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.cancelled():
+                continue
+            try:
+                index, record = future.result()
+            except BudgetExceeded as exc:
+                stopped = stopped or exc
+                continue
+            if not ordered:
+                yield index, record
+                continue
+            buffer[index] = record
+            while next_index in buffer:
+                yield next_index, buffer.pop(next_index)
+                next_index += 1
+        if stopped is not None:
+            for future in pending:
+                future.cancel()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, item in enumerate(items):
+            pending.add(pool.submit(guarded, index, item))
+            while len(pending) + len(buffer) >= 2 * concurrency and pending:
+                yield from drain()
+            if stopped is not None:
+                break
+        while pending:
+            yield from drain()
+    # Only a budget stop leaves gaps; the records after them are still in input order.
+    for index in sorted(buffer):
+        yield index, buffer[index]
+    if stopped is not None:
+        raise stopped
+
+
+def _in_order(results: Iterable[tuple[int, dict[str, Any]]]) -> list[dict[str, Any]]:
+    finished: list[tuple[int, dict[str, Any]]] = []
+    try:
+        finished.extend(results)
+    except BudgetExceeded as exc:
+        exc.records = [record for _, record in sorted(finished, key=lambda pair: pair[0])]
+        raise
+    return [record for _, record in sorted(finished, key=lambda pair: pair[0])]
 
 
 def dump_results(path: str | Path, data: list[dict[str, Any]]) -> None:
     Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+class JsonlResultWriter:
+    """Append one JSON line per finished item, fsyncing at most every ``fsync_interval_s`` seconds."""
+
+    def __init__(self, path: str | Path, fsync_interval_s: float = 5.0) -> None:
+        self.path = Path(path)
+        self.fsync_interval_s = fsync_interval_s
+        self._lock = threading.Lock()
+        if self.path.exists() and self.path.stat().st_size:
+            with self.path.open("rb") as tail:
+                tail.seek(-1, os.SEEK_END)
+                torn = tail.read(1) != b"\n"
+        else:
+            torn = False
+        self._fh = self.path.open("a", encoding="utf-8")
+        if torn:
+            self._fh.write("\n")
+        self._last_sync = time.monotonic()
+
+    def write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            if time.monotonic() - self._last_sync >= self.fsync_interval_s:
+                os.fsync(self._fh.fileno())
+                self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh.closed:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+
+    def __enter__(self) -> "JsonlResultWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def read_jsonl_results(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield records from a results JSONL file, skipping a torn trailing line left by a crash."""
+    path = Path(path)
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def completed_sample_ids(path: str | Path) -> set[int]:
+    return {int(record["id"]) for record in read_jsonl_results(path) if "error" not in record}
+
+
+def dedupe_results(records: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Keep one record per ``id``, sorted by ``id``: a successful record wins over an error, later over earlier."""
+    merged: dict[int, dict[str, Any]] = {}
+    for record in records:
+        sample_id = int(record["id"])
+        previous = merged.get(sample_id)
+        if previous is None or "error" not in record or "error" in previous:
+            merged[sample_id] = record
+    return [merged[sample_id] for sample_id in sorted(merged)]
+
+
+def jsonl_to_json(src: str | Path, dst: str | Path) -> int:
+    """Convert streamed JSONL results into the ``dump_results`` array format, deduplicated and ordered by ``id``."""
+    merged = dedupe_results(read_jsonl_results(src))
+    dump_results(dst, merged)
+    return len(merged)
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from agent_attack.runtime.benchmark import JsonlResultWriter, dedupe_results, dump_results, read_jsonl_results
+from agent_attack.runtime.scheduler import BudgetExceeded
+
+# Worker exit status meaning "the campaign budget is spent": not a crash, so it is never restarted.
+BUDGET_EXIT_CODE = 75
+
+ShardRunner = Callable[[int, int, Path, set[int]], int]
+"""``run_shard(shard, num_shards, output, done_ids)``: append records for the shard's items not in
+``done_ids`` to ``output`` (JSONL) and return how many were written."""
+
+
+class Campaign:
+    """Shard bookkeeping in a directory shared by every worker process and host.
+
+    Layout under ``root``::
+
+        campaign.json          num_shards, fixed when the campaign is created
+        leases/<i>.lease       owner of shard i; its mtime is the owner's heartbeat
+        shards/<i>.<owner>.jsonl  records written by one attempt at shard i
+        done/<i>.json          completion marker with per-shard timings
+
+    A shard is claimed by creating its lease with ``O_EXCL``; a lease whose heartbeat is
+    older than ``lease_timeout_s`` belongs to a dead worker and may be taken over. Each
+    attempt writes its own file, so a takeover never interleaves with a slow former owner;
+    the new owner resumes from the sample ids all earlier attempts completed.
+    """
+
+    def __init__(self, root: str | Path, num_shards: int, lease_timeout_s: float = 60.0, owner: str | None = None) -> None:
+        if num_shards < 1:
+            raise ValueError("num_shards must be >= 1")
+        self.root = Path(root)
+        self.num_shards = num_shards
+        self.lease_timeout_s = lease_timeout_s
+        self.owner = owner or worker_id()
+        for sub in ("leases", "shards", "done"):
+            (self.root / sub).mkdir(parents=True, exist_ok=True)
+        manifest = self.root / "campaign.json"
+        try:
+            fd = os.open(manifest, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            existing = json.loads(manifest.read_text(encoding="utf-8"))["num_shards"]
+            if existing != num_shards:
+                raise ValueError(f"Campaign {self.root} was created with {existing} shards, not {num_shards}") from None
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump({"num_shards": num_shards, "created": time.time()}, fh)
+
+    @classmethod
+    def open(cls, root: str | Path, lease_timeout_s: float = 60.0) -> "Campaign":
+        """Attach to an existing campaign directory, e.g. to merge or inspect it."""
+        manifest = json.loads((Path(root) / "campaign.json").read_text(encoding="utf-8"))
+        return cls(root, manifest["num_shards"], lease_timeout_s=lease_timeout_s)
+
+    def claim(self) -> int | None:
+        """Lease the first shard that is neither done nor held by a live worker."""
+        for shard in range(self.num_shards):
+            if not self._done_path(shard).exists() and self._try_lease(shard):
+                if self._done_path(shard).exists():
+                    self.release(shard)
+                    continue
+                return shard
+        return None
+
+    def heartbeat(self, shard: int) -> None:
+        try:
+            os.utime(self._lease_path(shard))
+        except FileNotFoundError:
+            pass
+
+    def release(self, shard: int) -> None:
+        lease = self._lease_path(shard)
+        if self._lease_owner(lease) == self.owner:
+            lease.unlink(missing_ok=True)
+
+    def release_owner(self, owner: str) -> list[int]:
+        """Drop every lease held by ``owner`` (a worker known to be dead) so others can take over."""
+        released = []
+        for lease in (self.root / "leases").glob("*.lease"):
+            if self._lease_owner(lease) == owner:
+                lease.unlink(missing_ok=True)
+                released.append(int(lease.stem))
+        return released
+
+    def complete(self, shard: int, records: int, started: float) -> None:
+        finished = time.time()
+        marker = {
+            "shard": shard,
+            "owner": self.owner,
+            "records": records,
+            "started": started,
+            "finished": finished,
+            "elapsed_s": finished - started,
+        }
+        tmp = self._done_path(shard).with_suffix(f".{self.owner}.tmp")
+        tmp.write_text(json.dumps(marker), encoding="utf-8")
+        os.replace(tmp, self._done_path(shard))
+        self.release(shard)
+
+    def pending(self) -> list[int]:
+        return [shard for shard in range(self.num_shards) if not self._done_path(shard).exists()]
+
+    def claimable(self) -> list[int]:
+        return [shard for shard in self.pending() if self._lease_age(self._lease_path(shard)) is None or self._stale(shard)]
+
+    def is_done(self) -> bool:
+        return not self.pending()
+
+    def shard_output(self, shard: int) -> Path:
+        return self.root / "shards" / f"{shard}.{self.owner}.jsonl"
+
+    def completed_ids(self, shard: int) -> set[int]:
+        return {
+            int(record["id"])
+            for path in (self.root / "shards").glob(f"{shard}.*.jsonl")
+            for record in read_jsonl_results(path)
+            if "error" not in record
+        }
+
+    def merge(self, output: str | Path, output_format: str = "json") -> dict[str, Any]:
+        """Merge every attempt's records, one per ``sample_id``, ordered by id."""
+        records = [record for path in sorted((self.root / "shards").glob("*.jsonl")) for record in read_jsonl_results(path)]
+        merged = dedupe_results(records)
+        output = Path(output)
+        tmp = output.with_name(f"{output.name}.{self.owner}.tmp")
+        if output_format == "jsonl":
+            with JsonlResultWriter(tmp) as writer:
+                for record in merged:
+                    writer.write(record)
+        else:
+            dump_results(tmp, merged)
+        os.replace(tmp, output)
+        return {
+            "records": len(merged),
+            "duplicates_dropped": len(records) - len(merged),
+            "errors": sum(1 for record in merged if "error" in record),
+        }
+
+    def report(self) -> dict[str, Any]:
+        """Aggregate throughput over finished shards: records per wall-clock second across all workers."""
+        markers = [json.loads(path.read_text(encoding="utf-8")) for path in sorted((self.root / "done").glob("*.json"))]
+        if not markers:
+            return {"shards_done": 0, "shards": self.num_shards, "records": 0, "wall_s": 0.0, "items_per_s": 0.0}
+        records = sum(marker["records"] for marker in markers)
+        wall = max(marker["finished"] for marker in markers) - min(marker["started"] for marker in markers)
+        return {
+            "shards_done": len(markers),
+            "shards": self.num_shards,
+            "records": records,
+            "wall_s": wall,
+            "items_per_s": records / wall if wall > 0 else 0.0,
+            "shard_s_total": sum(marker["elapsed_s"] for marker in markers),
+            "workers": sorted({marker["owner"] for marker in markers}),
+        }
+
+    def _try_lease(self, shard: int) -> bool:
+        lease = self._lease_path(shard)
+        payload = json.dumps({"owner": self.owner, "claimed": time.time()})
+        for _ in range(2):
+            try:
+                fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._stale(shard):
+                    return False
+                # Move the stale lease aside; only one contender wins the rename.
+                tomb = lease.with_name(f"{lease.name}.{self.owner}.stale")
+                try:
+                    os.rename(lease, tomb)
+                except FileNotFoundError:
+                    return False
+                age = self._lease_age(tomb)
+                if age is not None and age < self.lease_timeout_s:
+                    # Lost a race and grabbed a fresh lease: put it back.
+                    try:
+                        os.link(tomb, lease)
+                    except FileExistsError:
+                        pass
+                    tomb.unlink(missing_ok=True)
+                    return False
+                tomb.unlink(missing_ok=True)
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            return True
+        return False
+
+    def _stale(self, shard: int) -> bool:
+        age = self._lease_age(self._lease_path(shard))
+        return age is not None and age >= self.lease_timeout_s
+
+    @staticmethod
+    def _lease_age(path: Path) -> float | None:
+        try:
+            return time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _lease_owner(path: Path) -> str | None:
+        try:
+            return json.loads(path.read_text(encoding="utf-8")).get("owner")
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _lease_path(self, shard: int) -> Path:
+        return self.root / "leases" / f"{shard}.lease"
+
+    def _done_path(self, shard: int) -> Path:
+        return self.root / "done" / f"{shard}.json"
+
+
+def worker_id(pid: int | None = None) -> str:
+    return f"{socket.gethostname()}-{pid if pid is not None else os.getpid()}"
+
+
+def run_campaign_worker(campaign: Campaign, run_shard: ShardRunner) -> int:
+    """Claim and run shards until none is claimable; returns how many shards this worker finished."""
+    finished = 0
+    while (shard := campaign.claim()) is not None:
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(campaign, shard, stop), daemon=True)
+        beat.start()
+        started = time.time()
+        try:
+            records = run_shard(shard, campaign.num_shards, campaign.shard_output(shard), campaign.completed_ids(shard))
+        except BaseException:
+            campaign.release(shard)
+            raise
+        finally:
+            stop.set()
+            beat.join()
+        campaign.complete(shard, records, started)
+        finished += 1
+    return finished
+
+
+def run_campaign(
+    root: str | Path,
+    num_shards: int,
+    run_shard: ShardRunner,
+    *,
+    processes: int = 1,
+    lease_timeout_s: float = 60.0,
+    max_restarts: int = 3,
+    poll_interval_s: float = 1.0,
+) -> Campaign:
+    """Run a campaign's shards in ``processes`` worker processes until every shard is done.
+
+    A worker that dies has its leases released and is replaced (at most ``max_restarts``
+    times); shards leased by workers on other hosts are waited for and taken over once their
+    heartbeat goes stale. ``run_shard`` must be picklable. A worker stopped by
+    ``BudgetExceeded`` is not replaced and no new worker is started; once the running ones
+    exit, ``BudgetExceeded`` is raised with the shards left unfinished.
+    """
+    campaign = Campaign(root, num_shards, lease_timeout_s=lease_timeout_s)
+    context = multiprocessing.get_context("spawn")
+    workers: list[Any] = []
+    restarts = 0
+    exhausted = False
+    while True:
+        for proc in [proc for proc in workers if not proc.is_alive()]:
+            workers.remove(proc)
+            if proc.exitcode == BUDGET_EXIT_CODE:
+                campaign.release_owner(worker_id(proc.pid))
+                exhausted = True
+            elif proc.exitcode != 0:
+                campaign.release_owner(worker_id(proc.pid))
+                restarts += 1
+                if restarts > max_restarts:
+                    for other in workers:
+                        other.terminate()
+                    raise RuntimeError(f"Campaign workers failed {restarts} times (last exit code {proc.exitcode})")
+        if exhausted and not workers:
+            raise BudgetExceeded(f"Campaign budget exhausted with shards {campaign.pending()} unfinished")
+        if campaign.is_done() and not workers:
+            return campaign
+        claimable = 0 if exhausted else len(campaign.claimable())
+        while claimable > 0 and len(workers) < processes:
+            proc = context.Process(target=_worker_main, args=(str(root), num_shards, lease_timeout_s, run_shard))
+            proc.start()
+            workers.append(proc)
+            claimable -= 1
+        time.sleep(poll_interval_s)
+
+
+def _worker_main(root: str, num_shards: int, lease_timeout_s: float, run_shard: ShardRunner) -> None:
+    try:
+        run_campaign_worker(Campaign(root, num_shards, lease_timeout_s=lease_timeout_s), run_shard)
+    except BudgetExceeded:
+        sys.exit(BUDGET_EXIT_CODE)
+
+
+def _heartbeat(campaign: Campaign, shard: int, stop: threading.Event) -> None:
+    while not stop.wait(campaign.lease_timeout_s / 3):
+        campaign.heartbeat(shard)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from agent_attack.core.interfaces import ActionRealizer
-from agent_attack.core.types import Action, SearchNode
+from agent_attack.core.interfaces import ActionRealizer, attach_images
+from agent_attack.core.types import Action, AttackGoal, Message, SearchNode
 
 
 class PromptRealizer(ActionRealizer):
@@ -14,3 +14,36 @@ class PromptRealizer(ActionRealizer):
             f"Action payload: {action.payload}\n"
             "Generate the next response while maintaining conversation consistency."
         )
+
+    def to_messages(self, node: SearchNode, action: Action) -> list[Message]:
+        """Prefix-cache-friendly transcript.
+
+        The system turn depends only on the goal and seed prompt, and earlier turns are replayed
+        byte-for-byte from the node's history, so only the final user turn differs between
+        siblings and every descendant extends its ancestors' exact prefix.
+        """
+        turns = list(node.state.history)
+        messages: list[Message] = [{"role": "system", "content": self.system_prompt(node.goal, turns[0] if turns else "")}]
+        for prompt, response in zip(turns[1::2], turns[2::2]):
+            messages.append({"role": "user", "content": prompt})
+            messages.append({"role": "assistant", "content": response})
+        messages.append({"role": "user", "content": self.turn_prompt(action)})
+        return attach_images(messages, node.state.images)
+
+    @staticmethod
+    def system_prompt(goal: AttackGoal, seed_prompt: str) -> str:
+        return (
+            f"Goal: {goal.objective}\n"
+            f"Subgoals: {goal.subgoals}\n"
+            f"Constraints: {goal.constraints}\n"
+            f"Seed prompt: {seed_prompt}\n"
+            "Maintain conversation consistency across turns."
+        )
+
+    @staticmethod
+    def turn_prompt(action: Action) -> str:
+        return (
+            f"Action: {action.name}\n"
+            f"Action payload: {action.payload}\n"
+            "Generate the next response while maintaining conversation consistency."
+        )
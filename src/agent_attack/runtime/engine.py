@@ -1,14 +1,20 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 
+from agent_attack.core.interfaces import VictimModel
 from agent_attack.core.types import AttackGoal, SearchNode
 from agent_attack.memory.skills import SkillLibrary
+from agent_attack.planner.frontier import FRONTIERS
 from agent_attack.planner.search import FrontierPlanner
 from agent_attack.runtime.components import PromptRealizer
-from agent_attack.runtime.judge import LLMPromptJudge
+from agent_attack.runtime.judge import JudgeContext, LLMPromptJudge, TieredJudge
 from agent_attack.runtime.model_clients import ClientConfig, HTTPModelClient
+from agent_attack.runtime.response_cache import CachedModelClient, ResponseCache
+from agent_attack.runtime.streaming import build_stop_predicate
 from agent_attack.skills.attack_techniques import TechniqueLibrary
+from agent_attack.skills.loader import SkillStore
 
 
 @dataclass(slots=True)
@@ -25,45 +31,165 @@ class AttackConfig:
     target_base_url: str | None = None
     judge_api_key: str | None = None
     judge_base_url: str | None = None
+    target_base_urls: list[str] = field(default_factory=list)
+    judge_base_urls: list[str] = field(default_factory=list)
+    balance_strategy: str = "least_outstanding"
+    health_check_interval_s: float | None = None
     max_budget: int = 15
     beam_width: int = 4
+    expansion_workers: int = 1
+    batch_judge: bool = False
+    transposition: str | None = None
+    transposition_include_response: bool = False
+    frontier: str = "bounded"
+    multi_turn: bool = False
+    pipeline: bool = False
+    pipeline_keep_misspeculated: bool = False
+    target_max_tokens: int | None = None
+    target_stop: list[str] = field(default_factory=list)
+    target_stream: bool = False
+    target_stop_after_tokens: int | None = None
+    target_stop_on_refusal: bool = False
+    judge_max_tokens: int | None = None
+    judge_stop: list[str] = field(default_factory=list)
+    send_images: bool = False
+    image_max_side: int | None = None
+    share_skill_stats: bool = False
+    skill_ranking: str = "mean"
+    skill_store: str | None = None
+    judge_last_actions: int | None = None
+    judge_response_max_tokens: int | None = None
+    judge_response_window: str = "head"
+    judge_context_validation_rate: float = 0.0
+    fast_judge_threshold: float | None = None
+    fast_judge_validation_rate: float = 0.0
+    cache_path: str | None = None
+    cache_mode: str = "read_write"
+    cache_max_bytes: int | None = None
 
 
-class CATSAttackEngine:
+class AttackSession:
+    """Long-lived clients, judge and libraries reused across many ``run`` calls.
+
+    With ``config.share_skill_stats`` every run updates one shared ``SkillLibrary``;
+    otherwise each run starts from a fresh one, matching a per-item engine. With
+    ``config.skill_store`` libraries are bulk-loaded from that ``SkillStore`` and every skill
+    outcome is written back to it, so learned skills outlive the process. Generation limits
+    (``max_tokens``, stop sequences) are set per role; only the target is streamed and may be
+    aborted early (``target_stop_after_tokens``, ``target_stop_on_refusal``).
+    """
+
     def __init__(self, config: AttackConfig) -> None:
         self.config = config
-        self.skill_library = SkillLibrary()
         self.technique_library = TechniqueLibrary()
+        self.skill_store = SkillStore.shared(config.skill_store) if config.skill_store else None
+        self.skill_library = self.new_skill_library()
 
-        target_client = HTTPModelClient(
+        stop_predicate = build_stop_predicate(config.target_stop_after_tokens, config.target_stop_on_refusal)
+        target_client: VictimModel = HTTPModelClient(
             ClientConfig(
                 provider=config.target_provider,
                 model=config.target_model,
                 api_key=config.target_api_key,
                 base_url=config.target_base_url,
+                base_urls=list(config.target_base_urls),
+                balance_strategy=config.balance_strategy,
+                health_check_interval_s=config.health_check_interval_s,
+                image_max_side=config.image_max_side,
+                max_tokens=config.target_max_tokens,
+                stop=list(config.target_stop),
+                stream=config.target_stream or stop_predicate is not None,
+                stop_predicate=stop_predicate,
             )
         )
-        judge_client = HTTPModelClient(
+        judge_client: VictimModel = HTTPModelClient(
             ClientConfig(
                 provider=config.judge_provider,
                 model=config.judge_model,
                 api_key=config.judge_api_key,
                 base_url=config.judge_base_url,
+                base_urls=list(config.judge_base_urls),
+                balance_strategy=config.balance_strategy,
+                health_check_interval_s=config.health_check_interval_s,
                 temperature=0.0,
+                max_tokens=config.judge_max_tokens,
+                stop=list(config.judge_stop),
+            )
+        )
+        if config.cache_path:
+            cache = ResponseCache.shared(config.cache_path, max_bytes=config.cache_max_bytes)
+            target_client = CachedModelClient(target_client, cache, config.cache_mode)
+            judge_client = CachedModelClient(judge_client, cache, config.cache_mode)
+        self.target_client = target_client
+        self.judge: LLMPromptJudge | TieredJudge = LLMPromptJudge(
+            judge_client,
+            context=JudgeContext(
+                last_actions=config.judge_last_actions,
+                response_max_tokens=config.judge_response_max_tokens,
+                response_window=config.judge_response_window,
+            ),
+            validation_rate=config.judge_context_validation_rate,
+        )
+        if config.fast_judge_threshold is not None:
+            self.judge = TieredJudge(
+                self.judge,
+                threshold=config.fast_judge_threshold,
+                validation_rate=config.fast_judge_validation_rate,
             )
+        self.realizer = PromptRealizer()
+
+    def new_skill_library(self) -> SkillLibrary:
+        store = self.skill_store
+        library = SkillLibrary(
+            ranking=self.config.skill_ranking,
+            on_update=(lambda skill, score: store.observe(skill, score)) if store else None,
         )
-        judge = LLMPromptJudge(judge_client)
-        self.planner = FrontierPlanner(
-            victim=target_client,
-            parser=judge,
-            checker=judge,
-            realizer=PromptRealizer(),
-            skill_library=self.skill_library,
+        if store is not None:
+            store.load_into(library)
+        return library
+
+    def new_planner(self, skill_library: SkillLibrary | None = None) -> FrontierPlanner:
+        config = self.config
+        if skill_library is None:
+            skill_library = self.skill_library if config.share_skill_stats else self.new_skill_library()
+        return FrontierPlanner(
+            victim=self.target_client,
+            parser=self.judge,
+            checker=self.judge,
+            realizer=self.realizer,
+            skill_library=skill_library,
             technique_library=self.technique_library,
             max_budget=config.max_budget,
             beam_width=config.beam_width,
+            expansion_workers=config.expansion_workers,
+            batch_judge=config.batch_judge,
+            transposition=config.transposition,
+            transposition_include_response=config.transposition_include_response,
+            frontier_factory=FRONTIERS[config.frontier],
+            multi_turn=config.multi_turn,
+            pipeline=config.pipeline,
+            keep_misspeculated=config.pipeline_keep_misspeculated,
         )
 
+    def default_goal(self) -> AttackGoal:
+        return AttackGoal(
+            objective=self.config.objective,
+            subgoals=list(self.config.subgoals),
+            constraints=list(self.config.constraints),
+        )
+
+    def run(self, seed_prompt: str, goal: AttackGoal | None = None, images: Sequence[str] = ()) -> list[SearchNode]:
+        return self.new_planner().run(goal or self.default_goal(), seed_prompt=seed_prompt, images=images)
+
+
+class CATSAttackEngine:
+    def __init__(self, config: AttackConfig, session: AttackSession | None = None) -> None:
+        self.config = config
+        self.session = session or AttackSession(config)
+        self.technique_library = self.session.technique_library
+        self.skill_library = self.session.skill_library if config.share_skill_stats else self.session.new_skill_library()
+        self.planner = self.session.new_planner(self.skill_library)
+
     def run(self) -> list[SearchNode]:
         goal = AttackGoal(
             objective=self.config.objective,
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import http.client
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterator
+from urllib.parse import urlsplit
+
+_PoolKey = tuple[str, str, int]
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connection pool keyed by host, with a per-host in-flight cap.
+
+    One pool is shared by every ``HTTPModelClient`` in the process (see ``shared_pool``),
+    so engines built for different items reuse the same warm connections. The ``Retry-After``
+    of a 429/503 response is kept per thread and read back with ``retry_after``.
+    """
+
+    def __init__(self, max_per_host: int = 32) -> None:
+        self.max_per_host = max_per_host
+        self._lock = threading.Lock()
+        self._idle: dict[_PoolKey, list[http.client.HTTPConnection]] = {}
+        self._slots: dict[_PoolKey, threading.BoundedSemaphore] = {}
+        self.opened = 0
+        self.reused = 0
+        self._local = threading.local()
+
+    def retry_after(self) -> float | None:
+        """Seconds the calling thread's last 429/503 response asked to wait, if it said."""
+        return getattr(self._local, "retry_after", None)
+
+    def post(self, url: str, body: bytes, headers: dict[str, str], timeout: float) -> tuple[int, bytes]:
+        return self._request("POST", url, body, headers, timeout)
+
+    def post_stream(
+        self, url: str, body: bytes, headers: dict[str, str], timeout: float, on_line: Callable[[bytes], bool]
+    ) -> tuple[int, bytes]:
+        """POST and pass each line of a 2xx response body to ``on_line`` as it arrives.
+
+        ``on_line`` returning True aborts the response: the connection is closed instead of
+        drained, which stops generation on servers that cancel on disconnect. Returns the
+        status and the bytes read; error bodies are read whole without calling ``on_line``.
+        """
+        return self._request("POST", url, body, headers, timeout, on_line)
+
+    def get(self, url: str, headers: dict[str, str], timeout: float) -> tuple[int, bytes]:
+        return self._request("GET", url, None, headers, timeout)
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None,
+        headers: dict[str, str],
+        timeout: float,
+        on_line: Callable[[bytes], bool] | None = None,
+    ) -> tuple[int, bytes]:
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname or "", parts.port or (443 if scheme == "https" else 80))
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._local.retry_after = None
+        with self._slot(key):
+            for attempt in range(2):
+                conn, reused = self._acquire(key, timeout)
+                streaming = False
+                try:
+                    conn.request(method, path, body=body, headers=headers)
+                    resp = conn.getresponse()
+                    if resp.status in (429, 503):
+                        self._local.retry_after = _parse_retry_after(resp.getheader("Retry-After"))
+                    if on_line is None or not 200 <= resp.status < 300:
+                        data = resp.read()
+                    else:
+                        streaming = True
+                        data, aborted = self._read_lines(resp, on_line)
+                        if aborted:
+                            conn.close()
+                            return resp.status, data
+                except (ConnectionError, http.client.HTTPException):
+                    conn.close()
+                    # A stale keep-alive socket fails before any line is delivered; never replay a stream.
+                    if reused and attempt == 0 and not streaming:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._release(key, conn)
+                return resp.status, data
+        raise RuntimeError("unreachable")
+
+    @staticmethod
+    def _read_lines(resp: http.client.HTTPResponse, on_line: Callable[[bytes], bool]) -> tuple[bytes, bool]:
+        lines: list[bytes] = []
+        while line := resp.readline():
+            lines.append(line)
+            if on_line(line):
+                return b"".join(lines), True
+        return b"".join(lines), False
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            idle = sum(len(conns) for conns in self._idle.values())
+        return {"opened": self.opened, "reused": self.reused, "idle": idle}
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    @contextmanager
+    def _slot(self, key: _PoolKey) -> Iterator[None]:
+        with self._lock:
+            slot = self._slots.setdefault(key, threading.BoundedSemaphore(self.max_per_host))
+        with slot:
+            yield
+
+    def _acquire(self, key: _PoolKey, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            conns = self._idle.get(key)
+            conn = conns.pop() if conns else None
+            if conn is not None:
+                self.reused += 1
+            else:
+                self.opened += 1
+        if conn is None:
+            scheme, host, port = key
+            factory = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            return factory(host, port, timeout=timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, key: _PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """``Retry-After`` as delta-seconds or an HTTP date; None when absent or malformed."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_shared_pool: ConnectionPool | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool() -> ConnectionPool:
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool()
+        return _shared_pool
+
+
+def set_shared_pool(pool: ConnectionPool) -> None:
+    """Replace the process-wide pool, e.g. with a ``RecordingPool`` or ``ReplayPool``."""
+    global _shared_pool
+    with _shared_lock:
+        _shared_pool = pool
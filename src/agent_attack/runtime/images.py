@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import base64
+import functools
+import importlib.util
+import io
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+_MAGIC = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+_ImageKey = tuple[str, int, int, int | None]
+
+
+@dataclass(slots=True, frozen=True)
+class ImagePayload:
+    mime_type: str
+    data_b64: str
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.data_b64}"
+
+
+class ImageEncoder:
+    """Read, optionally downscale, and base64-encode images, caching the result.
+
+    The LRU cache holds at most ``max_cache_bytes`` of encoded data and is keyed by
+    (resolved path, mtime, size, ``max_side``), so an edited file is re-encoded. Concurrent
+    requests for the same image share one encode. ``prefetch`` encodes in background
+    threads ahead of use; ``reserve_prefetch`` grows that pool to match a lookahead. Downscaling (``max_side``) needs Pillow; without it images are
+    sent as stored.
+    """
+
+    def __init__(self, max_side: int | None = None, max_cache_bytes: int = 256 * 1024 * 1024, prefetch_workers: int = 2) -> None:
+        self.max_side = max_side
+        self.max_cache_bytes = max_cache_bytes
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[_ImageKey, ImagePayload] = OrderedDict()
+        self._inflight: dict[_ImageKey, Future[ImagePayload]] = {}
+        self._cache_bytes = 0
+        self._prefetch_workers = prefetch_workers
+        self._prefetch = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="image-prefetch")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.encode_s = 0.0
+
+    def encode(self, path: str | Path) -> ImagePayload:
+        key = self._key(path)
+        with self._lock:
+            payload = self._cache.get(key)
+            if payload is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return payload
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+        assert future is not None
+        if not owner:
+            return future.result()
+        try:
+            start = time.perf_counter()
+            payload = _encode_file(key[0], self.max_side)
+            elapsed = time.perf_counter() - start
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            self.encode_s += elapsed
+            self._insert(key, payload)
+        future.set_result(payload)
+        return payload
+
+    def prefetch(self, path: str | Path) -> None:
+        """Encode ``path`` in the background; errors surface when it is actually used."""
+        with self._lock:
+            self._prefetch.submit(self._quiet_encode, path)
+
+    def reserve_prefetch(self, workers: int) -> None:
+        """Make sure at least ``workers`` images can be prefetched in parallel."""
+        with self._lock:
+            if workers <= self._prefetch_workers:
+                return
+            previous = self._prefetch
+            self._prefetch_workers = workers
+            self._prefetch = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-prefetch")
+        previous.shutdown(wait=False)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._cache),
+                "bytes": self._cache_bytes,
+                "encode_s": self.encode_s,
+            }
+
+    def close(self) -> None:
+        self._prefetch.shutdown(wait=False, cancel_futures=True)
+
+    def _quiet_encode(self, path: str | Path) -> None:
+        try:
+            self.encode(path)
+        except Exception:
+            pass
+
+    def _key(self, path: str | Path) -> _ImageKey:
+        resolved = os.path.realpath(path)
+        stat = os.stat(resolved)
+        return (resolved, stat.st_mtime_ns, stat.st_size, self.max_side)
+
+    def _insert(self, key: _ImageKey, payload: ImagePayload) -> None:
+        size = len(payload.data_b64)
+        if size > self.max_cache_bytes:
+            return
+        self._cache[key] = payload
+        self._cache_bytes += size
+        while self._cache_bytes > self.max_cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted.data_b64)
+            self.evictions += 1
+
+
+def image_fingerprint(path: str | Path, max_side: int | None = None) -> str:
+    """Identity of the image as sent (resolved path, mtime, size, effective ``max_side``), for cache keys.
+
+    ``max_side`` only takes part when Pillow is installed, since without it images are sent as stored.
+    """
+    resolved = os.path.realpath(path)
+    stat = os.stat(resolved)
+    fingerprint = f"{resolved}:{stat.st_mtime_ns}:{stat.st_size}"
+    if max_side is not None and _has_pillow():
+        fingerprint += f"@{max_side}"
+    return fingerprint
+
+
+@functools.cache
+def _has_pillow() -> bool:
+    return importlib.util.find_spec("PIL") is not None
+
+
+def _encode_file(path: str, max_side: int | None) -> ImagePayload:
+    data = Path(path).read_bytes()
+    mime = _sniff_mime(data, path)
+    if max_side is not None:
+        data, mime = _downscale(data, mime, max_side)
+    return ImagePayload(mime, base64.b64encode(data).decode("ascii"))
+
+
+def _sniff_mime(data: bytes, path: str) -> str:
+    for magic, mime in _MAGIC:
+        if data.startswith(magic):
+            return mime
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def _downscale(data: bytes, mime: str, max_side: int) -> tuple[bytes, str]:
+    try:
+        from PIL import Image
+    except ImportError:
+        return data, mime
+    with Image.open(io.BytesIO(data)) as image:
+        if max(image.size) <= max_side:
+            return data, mime
+        image.thumbnail((max_side, max_side))
+        out = io.BytesIO()
+        if mime == "image/jpeg" and image.mode in {"RGB", "L"}:
+            image.save(out, format="JPEG", quality=90)
+            return out.getvalue(), "image/jpeg"
+        image.save(out, format="PNG")
+        return out.getvalue(), "image/png"
+
+
+_shared_encoders: dict[int | None, ImageEncoder] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_image_encoder(max_side: int | None = None) -> ImageEncoder:
+    """Process-wide encoder per target resolution, shared by every client and the prefetcher."""
+    with _shared_lock:
+        encoder = _shared_encoders.get(max_side)
+        if encoder is None:
+            encoder = _shared_encoders[max_side] = ImageEncoder(max_side=max_side)
+        return encoder
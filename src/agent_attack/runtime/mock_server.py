@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+_JUDGE_MARKER = "safety evaluation judge"
+_BATCH_ITEM = re.compile(r"^\[(\d+)\] ", flags=re.MULTILINE)
+
+
+def _default_victim_replies() -> list[str]:
+    return [
+        "I can't help with that request, but I'm happy to discuss the topic at a high level.",
+        "Here is a general, policy-consistent overview of the considerations involved.",
+        "Could you clarify the context and purpose of your question?",
+    ]
+
+
+def _default_judge_replies() -> list[dict[str, Any]]:
+    return [
+        {"tags": ["refusal"], "score_delta": -0.3, "reason": "mock: refusal"},
+        {"tags": ["progress"], "score_delta": 0.4, "reason": "mock: progress"},
+        {"tags": ["unknown"], "score_delta": 0.0, "reason": "mock: unclear"},
+    ]
+
+
+@dataclass(slots=True)
+class MockResponder:
+    """Deterministic canned replies: the same prompt always gets the same answer.
+
+    Judge prompts (single or batched) get judge JSON; everything else gets a victim reply.
+    """
+
+    victim_replies: list[str] = field(default_factory=_default_victim_replies)
+    judge_replies: list[dict[str, Any]] = field(default_factory=_default_judge_replies)
+
+    def reply(self, prompt: str) -> str:
+        if _JUDGE_MARKER not in prompt:
+            return self._pick(self.victim_replies, prompt)
+        if "Model responses:" in prompt:
+            indices = [int(index) for index in _BATCH_ITEM.findall(prompt)]
+            results = [{"index": index, **self._pick(self.judge_replies, f"{index}:{prompt}")} for index in indices]
+            return json.dumps({"results": results})
+        return json.dumps(self._pick(self.judge_replies, prompt))
+
+    @staticmethod
+    def _pick(options: list[Any], prompt: str) -> Any:
+        digest = hashlib.sha1(prompt.encode("utf-8")).digest()
+        return options[int.from_bytes(digest[:4], "big") % len(options)]
+
+
+@dataclass(slots=True)
+class LatencyModel:
+    """Per-request delay: ``fixed`` (mean), ``uniform`` (mean ± jitter) or ``lognormal`` (median mean, sigma jitter)."""
+
+    kind: str = "fixed"
+    mean_s: float = 0.0
+    jitter_s: float = 0.0
+    seed: int = 0
+    _rng: random.Random = field(init=False, repr=False)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        if self.kind not in {"fixed", "uniform", "lognormal"}:
+            raise ValueError(f"Unsupported latency distribution: {self.kind}")
+        self._rng = random.Random(self.seed)
+
+    def sample(self) -> float:
+        if self.kind == "fixed" or self.mean_s <= 0:
+            return max(0.0, self.mean_s)
+        with self._lock:
+            if self.kind == "uniform":
+                return max(0.0, self._rng.uniform(self.mean_s - self.jitter_s, self.mean_s + self.jitter_s))
+            return self._rng.lognormvariate(0.0, self.jitter_s) * self.mean_s
+
+
+@dataclass(slots=True)
+class PrefixCacheModel:
+    """Simulated server-side prefix cache at message granularity.
+
+    Prefill costs ``prefill_s_per_kchar`` per 1000 characters of message content that
+    follow the longest previously seen message prefix, like vLLM automatic prefix caching.
+    """
+
+    prefill_s_per_kchar: float
+    capacity: int = 100_000
+    _seen: OrderedDict[bytes, None] = field(init=False, repr=False, default_factory=OrderedDict)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def prefill_s(self, messages: list[dict[str, Any]]) -> float:
+        digest = hashlib.sha1()
+        prefixes = []
+        for message in messages:
+            digest.update(json.dumps(message, sort_keys=True).encode("utf-8"))
+            prefixes.append(digest.copy().digest())
+        with self._lock:
+            cached = 0
+            for index, prefix in enumerate(prefixes, start=1):
+                if prefix in self._seen:
+                    cached = index
+            for prefix in prefixes:
+                self._seen[prefix] = None
+                self._seen.move_to_end(prefix)
+            while len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+        uncached = sum(len(str(message.get("content", ""))) for message in messages[cached:])
+        return uncached / 1000 * self.prefill_s_per_kchar
+
+
+def _limit(content: str, max_tokens: Any, stop: Any) -> tuple[str, str]:
+    """Apply ``stop`` sequences and ``max_tokens`` (4 characters per mock token) to a reply."""
+    for sequence in [stop] if isinstance(stop, str) else stop or []:
+        if sequence and sequence in content:
+            content = content[: content.index(sequence)]
+    if isinstance(max_tokens, int) and len(content) > max_tokens * 4:
+        return content[: max_tokens * 4], "length"
+    return content, "stop"
+
+
+def _text_content(content: Any) -> str:
+    """Text of an OpenAI message ``content``: a string, or the text parts of a multimodal part list."""
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict) and part.get("type") == "text")
+    return str(content)
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    responder: MockResponder
+    latency: LatencyModel
+    prefix_cache: PrefixCacheModel | None = None
+    decode_s_per_token: float = 0.0
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.rstrip("/").endswith("/models"):
+            self._send(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload: dict[str, Any] = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send(400, {"error": {"message": "invalid JSON body"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        messages = payload.get("messages") or [{}]
+        prompt = _text_content(messages[-1].get("content", ""))
+        prefill = self.prefix_cache.prefill_s(messages) if self.prefix_cache is not None else 0.0
+        content, finish_reason = _limit(self.responder.reply(prompt), payload.get("max_tokens"), payload.get("stop"))
+        if payload.get("stream"):
+            try:
+                self._stream(payload, prompt, content, prefill, finish_reason)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client aborted the stream.
+                self.close_connection = True
+            return
+        time.sleep(prefill + self.latency.sample() + self.decode_s_per_token * len(content) / 4)
+        self._send(
+            200,
+            {
+                "object": "chat.completion",
+                "model": payload.get("model", "mock"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": len(prompt) // 4 + len(content) // 4,
+                },
+            },
+        )
+
+    def _stream(self, payload: dict[str, Any], prompt: str, content: str, prefill: float, finish_reason: str) -> None:
+        """Server-sent events: the first token after the prefill, the rest spread over the sampled latency.
+
+        With ``decode_s_per_token`` each piece additionally takes that long per (4-character) token.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(prefill)
+        words = content.split(" ")
+        pieces = [" ".join(words[i : i + 4]) + (" " if i + 4 < len(words) else "") for i in range(0, len(words), 4)]
+        decode = self.latency.sample() / max(1, len(pieces))
+        model = payload.get("model", "mock")
+        for index, piece in enumerate(pieces):
+            if index:
+                time.sleep(decode + self.decode_s_per_token * len(piece) / 4)
+            delta = {"index": 0, "delta": {"content": piece}, "finish_reason": None}
+            self._event({"object": "chat.completion.chunk", "model": model, "choices": [delta]})
+        self._event(
+            {
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4},
+            }
+        )
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def _event(self, payload: dict[str, Any]) -> None:
+        self._chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+
+def start_mock_server(
+    latency: LatencyModel | None = None,
+    responder: MockResponder | None = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    prefill_s_per_kchar: float = 0.0,
+    decode_s_per_token: float = 0.0,
+) -> tuple[ThreadingHTTPServer, str]:
+    """Serve an OpenAI-compatible ``/chat/completions`` (and ``/models``) stub in a daemon thread; returns (server, base_url)."""
+    handler = type(
+        "MockHandler",
+        (_MockHandler,),
+        {
+            "responder": responder or MockResponder(),
+            "latency": latency or LatencyModel(),
+            "prefix_cache": PrefixCacheModel(prefill_s_per_kchar) if prefill_s_per_kchar > 0 else None,
+            "decode_s_per_token": decode_s_per_token,
+        },
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}/v1"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock model server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    parser.add_argument("--latency-mean", type=float, default=0.05, help="Seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--prefill-ms-per-kchar",
+        type=float,
+        default=0.0,
+        help="Simulated prefill cost per 1000 uncached prompt characters (enables the prefix cache model)",
+    )
+    parser.add_argument(
+        "--decode-ms-per-token",
+        type=float,
+        default=0.0,
+        help="Simulated generation time per output token (4 characters), so long replies take longer",
+    )
+    args = parser.parse_args()
+    latency = LatencyModel(args.latency, args.latency_mean, args.latency_jitter, args.seed)
+    server, base_url = start_mock_server(
+        latency,
+        host=args.host,
+        port=args.port,
+        prefill_s_per_kchar=args.prefill_ms_per_kchar / 1000,
+        decode_s_per_token=args.decode_ms_per_token / 1000,
+    )
+    print(f"mock server listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import http.client
 import json
 import os
-import urllib.error
-import urllib.request
+import random
+import threading
+import time
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Callable
 
 from agent_attack.core.interfaces import VictimModel
+from agent_attack.core.tracing import get_tracer
+from agent_attack.core.types import Message
+from agent_attack.runtime.balancer import Endpoint, EndpointBalancer, shared_balancer
+from agent_attack.runtime.http_pool import ConnectionPool, shared_pool
+from agent_attack.runtime.images import shared_image_encoder
+from agent_attack.runtime.mock_server import MockResponder
+from agent_attack.runtime.scheduler import RequestScheduler, shared_scheduler
+from agent_attack.runtime.streaming import SSEReader, StopPredicate
 
 
 @dataclass(slots=True)
@@ -16,57 +26,152 @@ class ClientConfig:
     model: str
     api_key: str | None = None
     base_url: str | None = None
+    base_urls: list[str] = field(default_factory=list)
+    balance_strategy: str = "least_outstanding"
+    health_check_interval_s: float | None = None
     temperature: float = 0.2
     timeout_s: int = 60
     extra_headers: dict[str, str] = field(default_factory=dict)
+    max_retries: int = 3
+    backoff_base_s: float = 1.0
+    backoff_max_s: float = 30.0
+    retry_after_max_s: float = 300.0
+    prompt_cache: bool = True
+    image_max_side: int | None = None
+    max_tokens: int | None = None
+    stop: list[str] = field(default_factory=list)
+    stream: bool = False
+    stop_predicate: StopPredicate | None = None
 
 
 class HTTPModelClient(VictimModel):
-    """Unified client for vLLM(OpenAI-compatible), OpenAI, Gemini and Anthropic."""
+    """Unified client for vLLM(OpenAI-compatible), OpenAI, Gemini and Anthropic.
 
-    def __init__(self, config: ClientConfig) -> None:
+    ``provider="mock"`` answers in-process with deterministic canned replies (no network).
+    With ``config.base_urls`` each request goes to a replica picked by a shared
+    ``EndpointBalancer``; retries may land on a different replica. Images attached to a
+    message are encoded once through the shared ``ImageEncoder`` cache.
+
+    ``config.max_tokens`` and ``config.stop`` map to each provider's generation limits. With
+    ``config.stream`` responses are read as server-sent events, and ``config.stop_predicate``
+    may cut a generation short (e.g. ``streaming.stop_on_refusal``) by closing the connection.
+    """
+
+    def __init__(
+        self,
+        config: ClientConfig,
+        pool: ConnectionPool | None = None,
+        scheduler: RequestScheduler | None = None,
+    ) -> None:
         self.config = config
         self.provider = config.provider.lower()
+        self.pool = pool or shared_pool()
+        self.scheduler = scheduler or shared_scheduler()
+        self.mock_responder = MockResponder() if self.provider == "mock" else None
+        self.image_encoder = shared_image_encoder(config.image_max_side)
+        self._stream_lock = threading.Lock()
+        self.stream_counts = {"streams": 0, "aborted": 0}
+        self.balancer: EndpointBalancer | None = None
+        if config.base_urls and self.mock_responder is None:
+            self.balancer = shared_balancer(
+                config.base_urls,
+                config.balance_strategy,
+                health_interval_s=config.health_check_interval_s,
+                health_headers=self._openai_like_headers() if self.provider in {"vllm", "openai"} else {},
+                pool=self.pool,
+            )
 
     def respond(self, prompt: str) -> str:
+        return self.respond_messages([{"role": "user", "content": prompt}])
+
+    def respond_messages(self, messages: list[Message]) -> str:
+        """Send a chat transcript in each provider's native multi-turn format.
+
+        Messages are serialized in order and unchanged, so requests sharing leading turns
+        share a byte-identical prefix (vLLM automatic prefix caching). For Anthropic,
+        ``config.prompt_cache`` adds ``cache_control`` breakpoints on the system prompt and
+        on the last turn before the new user message. A message's ``images`` are sent ahead of
+        its text as ``image_url`` data URLs (OpenAI/vLLM), ``inline_data`` parts (Gemini) or
+        base64 image blocks (Anthropic); the mock provider ignores them.
+        """
         provider = self.provider
+        config = self.config
+        if self.mock_responder is not None:
+            return self.mock_responder.reply(messages[-1]["content"])
+
         if provider in {"vllm", "openai"}:
-            payload = {
-                "model": self.config.model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": self.config.temperature,
+            payload: dict[str, Any] = {
+                "model": config.model,
+                "messages": [self._openai_message(message) for message in messages],
+                "temperature": config.temperature,
             }
-            url = self._openai_like_url()
+            if config.max_tokens is not None:
+                payload["max_tokens"] = config.max_tokens
+            if config.stop:
+                payload["stop"] = list(config.stop)
             headers = self._openai_like_headers()
-            data = self._post_json(url, payload, headers)
+            if config.stream:
+                payload["stream"] = True
+                payload["stream_options"] = {"include_usage": True}
+                return self._post_stream(self._openai_like_url, payload, headers, _openai_delta)
+            data = self._post_json(self._openai_like_url, payload, headers)
             return data["choices"][0]["message"]["content"]
 
         if provider == "gemini":
             key = self._require_key()
-            model = self.config.model
-            base = self.config.base_url or "https://generativelanguage.googleapis.com/v1beta"
-            url = f"{base}/models/{model}:generateContent?key={key}"
+            model = config.model
+            system = [message["content"] for message in messages if message["role"] == "system"]
+            generation: dict[str, Any] = {"temperature": config.temperature}
+            if config.max_tokens is not None:
+                generation["maxOutputTokens"] = config.max_tokens
+            if config.stop:
+                generation["stopSequences"] = list(config.stop)
             payload = {
-                "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {"temperature": self.config.temperature},
+                "contents": [
+                    {"role": "model" if message["role"] == "assistant" else "user", "parts": self._gemini_parts(message)}
+                    for message in messages
+                    if message["role"] != "system"
+                ],
+                "generationConfig": generation,
             }
-            data = self._post_json(url, payload, {})
+            if system:
+                payload["systemInstruction"] = {"parts": [{"text": text} for text in system]}
+            root = "https://generativelanguage.googleapis.com/v1beta"
+            if config.stream:
+                return self._post_stream(
+                    lambda base: f"{base or root}/models/{model}:streamGenerateContent?alt=sse&key={key}",
+                    payload,
+                    {},
+                    _gemini_delta,
+                )
+            data = self._post_json(lambda base: f"{base or root}/models/{model}:generateContent?key={key}", payload, {})
             return data["candidates"][0]["content"]["parts"][0]["text"]
 
         if provider == "anthropic":
+            system, turns = self._anthropic_messages(messages)
             payload = {
-                "model": self.config.model,
-                "max_tokens": 512,
-                "temperature": self.config.temperature,
-                "messages": [{"role": "user", "content": prompt}],
+                "model": config.model,
+                # Required by the Messages API.
+                "max_tokens": config.max_tokens if config.max_tokens is not None else 512,
+                "temperature": config.temperature,
+                "messages": turns,
             }
-            base = self.config.base_url or "https://api.anthropic.com"
-            url = f"{base.rstrip('/')}/v1/messages"
+            if system:
+                payload["system"] = system
+            if config.stop:
+                payload["stop_sequences"] = list(config.stop)
             headers = {
                 "x-api-key": self._require_key(),
                 "anthropic-version": "2023-06-01",
-                **self.config.extra_headers,
+                **config.extra_headers,
             }
+
+            def url(base: str | None) -> str:
+                return f"{(base or 'https://api.anthropic.com').rstrip('/')}/v1/messages"
+
+            if config.stream:
+                payload["stream"] = True
+                return self._post_stream(url, payload, headers, _anthropic_delta)
             data = self._post_json(url, payload, headers)
             blocks = data.get("content", [])
             for block in blocks:
@@ -76,13 +181,58 @@ class HTTPModelClient(VictimModel):
 
         raise ValueError(f"Unsupported provider: {self.config.provider}")
 
-    def _openai_like_url(self) -> str:
+    def _anthropic_messages(self, messages: list[Message]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        cache = {"cache_control": {"type": "ephemeral"}} if self.config.prompt_cache else {}
+        system = [
+            {"type": "text", "text": message["content"], **cache} for message in messages if message["role"] == "system"
+        ]
+        turns: list[dict[str, Any]] = [
+            {"role": message["role"], "content": self._anthropic_content(message)}
+            for message in messages
+            if message["role"] != "system"
+        ]
+        if cache and len(turns) > 1:
+            # Breakpoint on the shared prefix: everything up to the previous turn is reused by siblings.
+            shared = turns[-2]
+            if isinstance(shared["content"], str):
+                shared["content"] = [{"type": "text", "text": shared["content"]}]
+            shared["content"][-1].update(cache)
+        return system, turns
+
+    def _openai_message(self, message: Message) -> dict[str, Any]:
+        images = message.get("images")
+        if not images:
+            return {"role": message["role"], "content": message["content"]}
+        content: list[dict[str, Any]] = [
+            {"type": "image_url", "image_url": {"url": self.image_encoder.encode(path).data_url}} for path in images
+        ]
+        content.append({"type": "text", "text": message["content"]})
+        return {"role": message["role"], "content": content}
+
+    def _gemini_parts(self, message: Message) -> list[dict[str, Any]]:
+        parts: list[dict[str, Any]] = []
+        for path in message.get("images") or ():
+            image = self.image_encoder.encode(path)
+            parts.append({"inline_data": {"mime_type": image.mime_type, "data": image.data_b64}})
+        parts.append({"text": message["content"]})
+        return parts
+
+    def _anthropic_content(self, message: Message) -> str | list[dict[str, Any]]:
+        images = message.get("images")
+        if not images:
+            return message["content"]
+        content: list[dict[str, Any]] = []
+        for path in images:
+            image = self.image_encoder.encode(path)
+            content.append({"type": "image", "source": {"type": "base64", "media_type": image.mime_type, "data": image.data_b64}})
+        content.append({"type": "text", "text": message["content"]})
+        return content
+
+    def _openai_like_url(self, base: str | None) -> str:
         if self.provider == "openai":
-            base = self.config.base_url or "https://api.openai.com/v1"
-        else:
-            if not self.config.base_url:
-                raise ValueError("vLLM provider requires base_url, e.g. http://127.0.0.1:8000/v1")
-            base = self.config.base_url
+            base = base or "https://api.openai.com/v1"
+        elif not base:
+            raise ValueError("vLLM provider requires base_url, e.g. http://127.0.0.1:8000/v1")
         return f"{base.rstrip('/')}/chat/completions"
 
     def _openai_like_headers(self) -> dict[str, str]:
@@ -108,21 +258,136 @@ class HTTPModelClient(VictimModel):
             raise ValueError(f"Missing api_key for provider={self.provider}")
         return key
 
-    def _post_json(self, url: str, payload: dict[str, Any], headers: dict[str, str]) -> dict[str, Any]:
+    def _post_json(
+        self, build_url: Callable[[str | None], str], payload: dict[str, Any], headers: dict[str, str]
+    ) -> dict[str, Any]:
+        """POST ``payload`` to ``build_url(base)``, where ``base`` is the configured or balanced base URL."""
+        data: dict[str, Any] = {}
+
+        def parse(raw: bytes) -> tuple[int, int]:
+            data.update(json.loads(raw.decode("utf-8")))
+            return self._usage(data)
+
+        self._send(build_url, payload, headers, parse)
+        return data
+
+    def _post_stream(
+        self,
+        build_url: Callable[[str | None], str],
+        payload: dict[str, Any],
+        headers: dict[str, str],
+        delta: Callable[[dict[str, Any]], str],
+    ) -> str:
+        """Like ``_post_json`` for a server-sent-events response; returns the streamed text.
+
+        ``config.stop_predicate`` sees the stream's progress after every event and can abort it,
+        in which case the text so far is returned.
+        """
+        reader = SSEReader(delta, self._usage, self.config.stop_predicate)
+        self._send(build_url, payload, headers, lambda raw: (reader.prompt_tokens, reader.completion_tokens), reader)
+        with self._stream_lock:
+            self.stream_counts["streams"] += 1
+            self.stream_counts["aborted"] += int(reader.aborted)
+        return reader.text
+
+    def _send(
+        self,
+        build_url: Callable[[str | None], str],
+        payload: dict[str, Any],
+        headers: dict[str, str],
+        usage: Callable[[bytes], tuple[int, int]],
+        reader: SSEReader | None = None,
+    ) -> None:
+        """Retry, balance, rate-limit and trace one request; ``usage`` reads token counts off the raw body."""
         req_headers = {
             "Content-Type": "application/json",
             **headers,
         }
-        req = urllib.request.Request(
-            url=url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers=req_headers,
-            method="POST",
-        )
-        try:
-            with urllib.request.urlopen(req, timeout=self.config.timeout_s) as resp:
-                body = resp.read().decode("utf-8")
-        except urllib.error.HTTPError as exc:
-            detail = exc.read().decode("utf-8", errors="ignore")
-            raise RuntimeError(f"Model request failed: {exc.code} {detail}") from exc
-        return json.loads(body)
+        body = json.dumps(payload).encode("utf-8")
+        estimated_tokens = len(body) // 4
+        with get_tracer().span("http", provider=self.provider, model=self.config.model, bytes_sent=len(body)) as span:
+            for attempt in range(self.config.max_retries + 1):
+                self.scheduler.acquire(self.provider, estimated_tokens)
+                retryable = attempt < self.config.max_retries
+                endpoint = self.balancer.acquire() if self.balancer else None
+                url = build_url(endpoint.url if endpoint else self.config.base_url)
+                started = time.monotonic()
+                try:
+                    if reader is None:
+                        status, raw = self.pool.post(url, body, req_headers, timeout=self.config.timeout_s)
+                    else:
+                        reader.reset()
+                        status, raw = self.pool.post_stream(url, body, req_headers, self.config.timeout_s, reader.feed)
+                except (ConnectionError, TimeoutError, http.client.HTTPException):
+                    # HTTPException covers a connection dropped mid-body (IncompleteRead, RemoteDisconnected).
+                    self._release_endpoint(endpoint, False, started)
+                    if not retryable:
+                        raise
+                    self._backoff(attempt)
+                    continue
+                except BaseException:
+                    self._release_endpoint(endpoint, False, started)
+                    raise
+                self._release_endpoint(endpoint, status < 500, started)
+                if endpoint is not None:
+                    span.update(endpoint=endpoint.url)
+                if (status == 429 or status >= 500) and retryable:
+                    self._backoff(attempt, self.pool.retry_after())
+                    continue
+                break
+            span.update(status=status, attempts=attempt + 1, bytes_received=len(raw))
+            if status >= 400:
+                detail = raw.decode("utf-8", errors="ignore")
+                raise RuntimeError(f"Model request failed: {status} {detail}")
+            prompt_tokens, completion_tokens = usage(raw)
+            if not prompt_tokens and not completion_tokens:
+                prompt_tokens = estimated_tokens
+            if reader is not None and reader.aborted:
+                # Final usage never arrives on an aborted stream; count what was received.
+                prompt_tokens = prompt_tokens or estimated_tokens
+                completion_tokens = max(completion_tokens, reader.progress.tokens)
+            span.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+            if reader is not None:
+                span.update(stream_events=reader.events, aborted=reader.aborted)
+        self.scheduler.record(self.provider, self.config.model, prompt_tokens, completion_tokens, estimated_tokens)
+
+    def _release_endpoint(self, endpoint: Endpoint | None, ok: bool, started: float) -> None:
+        if endpoint is not None and self.balancer is not None:
+            self.balancer.release(endpoint, ok=ok, latency_s=time.monotonic() - started)
+
+    def _backoff(self, attempt: int, retry_after: float | None = None) -> None:
+        """Sleep before a retry: the server's ``Retry-After`` (capped) if given, else jittered exponential."""
+        self.scheduler.record_retry(self.provider)
+        if retry_after is not None:
+            time.sleep(min(retry_after, self.config.retry_after_max_s))
+            return
+        ceiling = min(self.config.backoff_max_s, self.config.backoff_base_s * 2**attempt)
+        time.sleep(random.uniform(0, ceiling))
+
+    def _usage(self, data: dict[str, Any]) -> tuple[int, int]:
+        if self.provider == "gemini":
+            usage = data.get("usageMetadata") or {}
+            return int(usage.get("promptTokenCount", 0)), int(usage.get("candidatesTokenCount", 0))
+        usage = data.get("usage") or {}
+        if self.provider == "anthropic":
+            # Streams report input tokens in ``message_start`` and output tokens in ``message_delta``.
+            usage = usage or (data.get("message") or {}).get("usage") or {}
+            return int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+        return int(usage.get("prompt_tokens", 0)), int(usage.get("completion_tokens", 0))
+
+
+def _openai_delta(event: dict[str, Any]) -> str:
+    choices = event.get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+def _gemini_delta(event: dict[str, Any]) -> str:
+    candidates = event.get("candidates") or [{}]
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(part.get("text", "") for part in parts)
+
+
+def _anthropic_delta(event: dict[str, Any]) -> str:
+    if event.get("type") != "content_block_delta":
+        return ""
+    return (event.get("delta") or {}).get("text", "")
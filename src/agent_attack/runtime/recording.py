@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlsplit
+
+from agent_attack.runtime.http_pool import ConnectionPool
+
+
+def _request_key(url: str, body: bytes) -> str:
+    # Only the path is keyed: the query carries Gemini's API key, and the host is whichever
+    # replica the balancer picked, which need not be the same on replay.
+    return hashlib.sha256(urlsplit(url).path.encode("utf-8") + b"\n" + body).hexdigest()
+
+
+class RecordingPool(ConnectionPool):
+    """Connection pool that appends every request/response pair to a JSONL cassette.
+
+    Only the URL (without query string), request body and raw response bytes are stored;
+    headers, and with them API keys, are not.
+    """
+
+    def __init__(self, path: str | Path, max_per_host: int = 32) -> None:
+        super().__init__(max_per_host=max_per_host)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("a", encoding="utf-8")
+        self._write_lock = threading.Lock()
+
+    def post(self, url: str, body: bytes, headers: dict[str, str], timeout: float) -> tuple[int, bytes]:
+        status, data = super().post(url, body, headers, timeout)
+        self._record(url, body, status, data)
+        return status, data
+
+    def post_stream(
+        self, url: str, body: bytes, headers: dict[str, str], timeout: float, on_line: Callable[[bytes], bool]
+    ) -> tuple[int, bytes]:
+        # An aborted stream is recorded as far as it was read, and replays the same way.
+        status, data = super().post_stream(url, body, headers, timeout, on_line)
+        self._record(url, body, status, data)
+        return status, data
+
+    def _record(self, url: str, body: bytes, status: int, data: bytes) -> None:
+        entry = {
+            "key": _request_key(url, body),
+            "url": urlsplit(url)._replace(query="").geturl(),
+            "request": body.decode("utf-8", errors="replace"),
+            "status": status,
+            "response_b64": base64.b64encode(data).decode("ascii"),
+        }
+        with self._write_lock:
+            self._fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._fh.flush()
+
+    def close(self) -> None:
+        super().close()
+        with self._write_lock:
+            self._fh.close()
+
+
+class ReplayPool(ConnectionPool):
+    """Serve recorded responses byte-for-byte without touching the network.
+
+    Requests are matched on URL path and body, so a run balanced over several replicas replays
+    regardless of which replica served each call. Repeated identical requests are answered in
+    recording order; once a request's recordings are used up, the last one is repeated.
+    Unknown requests raise ``KeyError``.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        super().__init__()
+        self._recordings: dict[str, deque[tuple[int, bytes]]] = {}
+        self._lock_replay = threading.Lock()
+        self.replayed = 0
+        self.misses = 0
+        with Path(path).open("r", encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                recorded = (int(entry["status"]), base64.b64decode(entry["response_b64"]))
+                # Re-keyed from the stored request, so cassettes keyed with the host still replay.
+                key = _request_key(entry["url"], entry["request"].encode("utf-8"))
+                self._recordings.setdefault(key, deque()).append(recorded)
+
+    def post(self, url: str, body: bytes, headers: dict[str, str], timeout: float) -> tuple[int, bytes]:
+        key = _request_key(url, body)
+        with self._lock_replay:
+            queue = self._recordings.get(key)
+            if not queue:
+                self.misses += 1
+                raise KeyError(f"No recorded response for POST {urlsplit(url).path}")
+            self.replayed += 1
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def post_stream(
+        self, url: str, body: bytes, headers: dict[str, str], timeout: float, on_line: Callable[[bytes], bool]
+    ) -> tuple[int, bytes]:
+        status, data = self.post(url, body, headers, timeout)
+        if 200 <= status < 300:
+            for line in data.splitlines(keepends=True):
+                if on_line(line):
+                    break
+        return status, data
+
+    def get(self, url: str, headers: dict[str, str], timeout: float) -> tuple[int, bytes]:
+        # Health checks are not recorded; every replayed endpoint is healthy.
+        return 200, b"{}"
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable
+
+from agent_attack.core.interfaces import VictimModel
+from agent_attack.core.types import Message
+from agent_attack.runtime.images import image_fingerprint
+
+
+class CacheMode(str, Enum):
+    READ_WRITE = "read_write"
+    WRITE_ONLY = "write_only"
+    READ_ONLY = "read_only"
+
+
+class ResponseCache:
+    """Content-addressed on-disk store of model responses (SQLite, LRU eviction by size)."""
+
+    _shared: dict[Path, "ResponseCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str | Path, max_bytes: int | None = None) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        (self._total_bytes,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @classmethod
+    def shared(cls, path: str | Path, max_bytes: int | None = None) -> "ResponseCache":
+        key = Path(path).resolve()
+        with cls._shared_lock:
+            cache = cls._shared.get(key)
+            if cache is None:
+                cache = cls._shared[key] = cls(key, max_bytes=max_bytes)
+            return cache
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float | None, base_url: str | None, *rest: Any) -> str:
+        """Hash of the client identity followed by any extra fields, the prompt last."""
+        material = json.dumps([provider, model, temperature, base_url, *rest], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses(key, response, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self.writes += 1
+            if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+                self._evict(self._total_bytes - self.max_bytes)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self, excess: int) -> None:
+        freed = 0
+        victims: list[str] = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+            if freed >= excess:
+                break
+            victims.append(key)
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in victims])
+        self._total_bytes -= freed
+        self.evictions += len(victims)
+
+
+class CachedModelClient(VictimModel):
+    """Wrap any ``VictimModel`` with a ``ResponseCache`` lookup keyed on its client config."""
+
+    def __init__(self, inner: VictimModel, cache: ResponseCache, mode: CacheMode | str = CacheMode.READ_WRITE) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.mode = CacheMode(mode)
+        config = getattr(inner, "config", None)
+        self._key_fields: tuple[Any, ...] = (
+            str(getattr(config, "provider", type(inner).__name__)).lower(),
+            str(getattr(config, "model", "")),
+            getattr(config, "temperature", None),
+            getattr(config, "base_url", None),
+        )
+        self._image_max_side: int | None = getattr(config, "image_max_side", None)
+        # Generation limits change the response; they are keyed only when set so older entries stay valid.
+        limits = (getattr(config, "max_tokens", None), list(getattr(config, "stop", None) or []))
+        predicate = getattr(config, "stop_predicate", None) if getattr(config, "stream", False) else None
+        if limits != (None, []) or predicate is not None:
+            self._key_fields += (*limits, getattr(predicate, "__name__", repr(predicate)) if predicate else None)
+
+    def respond(self, prompt: str) -> str:
+        return self._cached(prompt, lambda: self.inner.respond(prompt))
+
+    def respond_messages(self, messages: list[Message]) -> str:
+        if len(messages) == 1 and messages[0]["role"] == "user" and not messages[0].get("images"):
+            return self.respond(messages[0]["content"])
+        keyed = [
+            {**message, "images": [image_fingerprint(path, self._image_max_side) for path in message["images"]]} if message.get("images") else message
+            for message in messages
+        ]
+        material = json.dumps(keyed, ensure_ascii=False)
+        return self._cached(material, lambda: self.inner.respond_messages(messages))
+
+    def _cached(self, material: str, call: Callable[[], str]) -> str:
+        key = ResponseCache.make_key(*self._key_fields, material)
+        if self.mode is not CacheMode.WRITE_ONLY:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        response = call()
+        if self.mode is not CacheMode.READ_ONLY:
+            self.cache.put(key, response)
+        return response
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised before a model call once the process-wide token or dollar cap is spent.
+
+    Benchmark runners stop at the first one; the list-returning runners then set ``records``
+    to the items that finished before the run stopped.
+    """
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.records: list[dict[str, Any]] = []
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate_per_min``."""
+
+    def __init__(self, rate_per_min: float, capacity: float | None = None) -> None:
+        self.rate_per_s = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._level >= amount:
+                    self._level -= amount
+                    return
+                wait_s = (amount - self._level) / self.rate_per_s
+            time.sleep(wait_s)
+
+    def charge(self, amount: float) -> None:
+        """Adjust the level after the fact (e.g. actual vs. estimated tokens); may go negative."""
+        with self._lock:
+            self._refill()
+            self._level -= amount
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+
+class SpendLedger:
+    """Token and dollar spend in one SQLite file, shared by every process that opens it.
+
+    A campaign keeps its ledger in the campaign directory, so ``max_total_tokens`` and
+    ``max_cost_usd`` cap the whole campaign across worker processes, hosts and restarts.
+    """
+
+    def __init__(self, path: str | Path, timeout_s: float = 30.0) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=timeout_s, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spend (id INTEGER PRIMARY KEY CHECK (id = 0), "
+            "tokens INTEGER NOT NULL, cost_usd REAL NOT NULL)"
+        )
+        self._conn.execute("INSERT OR IGNORE INTO spend VALUES (0, 0, 0.0)")
+
+    def add(self, tokens: int, cost_usd: float) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE spend SET tokens = tokens + ?, cost_usd = cost_usd + ? WHERE id = 0", (tokens, cost_usd))
+
+    def totals(self) -> tuple[int, float]:
+        with self._lock:
+            tokens, cost = self._conn.execute("SELECT tokens, cost_usd FROM spend WHERE id = 0").fetchone()
+        return int(tokens), float(cost)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass(slots=True)
+class ProviderUsage:
+    requests: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+
+
+@dataclass(slots=True)
+class _ProviderLimits:
+    requests: TokenBucket | None = None
+    tokens: TokenBucket | None = None
+
+
+class RequestScheduler:
+    """Process-wide per-provider rate limits plus a global token/dollar budget.
+
+    ``HTTPModelClient`` calls ``acquire`` before every request and ``record`` with the
+    usage reported by the provider afterwards. With a ``SpendLedger`` (``set_budget``) the
+    budget is checked against the spend of every process sharing the ledger.
+    """
+
+    def __init__(self, max_total_tokens: int | None = None, max_cost_usd: float | None = None) -> None:
+        self.max_total_tokens = max_total_tokens
+        self.max_cost_usd = max_cost_usd
+        self._limits: dict[str, _ProviderLimits] = {}
+        self._prices: dict[str, tuple[float, float]] = {}
+        self._usage: dict[str, ProviderUsage] = {}
+        self._ledger: SpendLedger | None = None
+        self._lock = threading.Lock()
+
+    def set_rate_limit(self, provider: str, requests_per_min: float | None = None, tokens_per_min: float | None = None) -> None:
+        with self._lock:
+            self._limits[provider.lower()] = _ProviderLimits(
+                requests=TokenBucket(requests_per_min) if requests_per_min else None,
+                tokens=TokenBucket(tokens_per_min) if tokens_per_min else None,
+            )
+
+    def set_price(self, model: str, prompt_per_mtok: float, completion_per_mtok: float) -> None:
+        """USD per million prompt/completion tokens for ``model``."""
+        with self._lock:
+            self._prices[model] = (prompt_per_mtok, completion_per_mtok)
+
+    def set_budget(
+        self, max_total_tokens: int | None = None, max_cost_usd: float | None = None, ledger: SpendLedger | None = None
+    ) -> None:
+        with self._lock:
+            self.max_total_tokens = max_total_tokens
+            self.max_cost_usd = max_cost_usd
+            self._ledger = ledger
+
+    def acquire(self, provider: str, estimated_tokens: int) -> None:
+        self._check_budget()
+        limits = self._limits.get(provider.lower())
+        if limits is None:
+            return
+        if limits.requests is not None:
+            limits.requests.acquire(1)
+        if limits.tokens is not None:
+            limits.tokens.acquire(estimated_tokens)
+
+    def record(self, provider: str, model: str, prompt_tokens: int, completion_tokens: int, estimated_tokens: int) -> None:
+        provider = provider.lower()
+        limits = self._limits.get(provider)
+        if limits is not None and limits.tokens is not None:
+            limits.tokens.charge(prompt_tokens + completion_tokens - estimated_tokens)
+        prompt_price, completion_price = self._prices.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+        with self._lock:
+            usage = self._usage.setdefault(provider, ProviderUsage())
+            usage.requests += 1
+            usage.prompt_tokens += prompt_tokens
+            usage.completion_tokens += completion_tokens
+            usage.cost_usd += cost
+            ledger = self._ledger
+        if ledger is not None:
+            ledger.add(prompt_tokens + completion_tokens, cost)
+
+    def record_retry(self, provider: str) -> None:
+        with self._lock:
+            self._usage.setdefault(provider.lower(), ProviderUsage()).retries += 1
+
+    def usage(self) -> dict[str, Any]:
+        with self._lock:
+            per_provider = {
+                name: {
+                    "requests": u.requests,
+                    "retries": u.retries,
+                    "prompt_tokens": u.prompt_tokens,
+                    "completion_tokens": u.completion_tokens,
+                    "cost_usd": round(u.cost_usd, 6),
+                }
+                for name, u in self._usage.items()
+            }
+        return {
+            "total_tokens": sum(u["prompt_tokens"] + u["completion_tokens"] for u in per_provider.values()),
+            "cost_usd": round(sum(u["cost_usd"] for u in per_provider.values()), 6),
+            "providers": per_provider,
+        }
+
+    def _check_budget(self) -> None:
+        if self.max_total_tokens is None and self.max_cost_usd is None:
+            return
+        with self._lock:
+            ledger = self._ledger
+            tokens = sum(u.prompt_tokens + u.completion_tokens for u in self._usage.values())
+            cost = sum(u.cost_usd for u in self._usage.values())
+        if ledger is not None:
+            tokens, cost = ledger.totals()
+        if self.max_total_tokens is not None and tokens >= self.max_total_tokens:
+            raise BudgetExceeded(f"Token budget exhausted: {tokens} >= {self.max_total_tokens}")
+        if self.max_cost_usd is not None and cost >= self.max_cost_usd:
+            raise BudgetExceeded(f"Cost budget exhausted: ${cost:.4f} >= ${self.max_cost_usd:.4f}")
+
+
+_shared_scheduler: RequestScheduler | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler() -> RequestScheduler:
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = RequestScheduler()
+        return _shared_scheduler
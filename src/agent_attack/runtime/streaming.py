@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+from agent_attack.runtime.judge import RefusalHeuristic
+from agent_attack.runtime.tokens import TokenCounter
+
+
+class StreamProgress:
+    """What a stop predicate sees after each streamed piece.
+
+    ``tokens`` is the running ``estimate_tokens`` of the text so far and ``previous_chars`` the
+    text length before the latest piece. ``text`` is joined on first access per piece, so
+    predicates that only need the counts stay O(1) per event.
+    """
+
+    __slots__ = ("_pieces", "_text", "_counter", "chars", "previous_chars", "tokens")
+
+    def __init__(self) -> None:
+        self._pieces: list[str] = []
+        self._text: str | None = ""
+        self._counter = TokenCounter()
+        self.chars = 0
+        self.previous_chars = 0
+        self.tokens = 0
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._pieces)
+            self._pieces = [self._text]
+        return self._text
+
+    def add(self, piece: str) -> None:
+        self._pieces.append(piece)
+        self._text = None
+        self.previous_chars = self.chars
+        self.chars += len(piece)
+        self.tokens = self._counter.feed(piece)
+
+
+StopPredicate = Callable[[StreamProgress], bool]
+"""Called after every streamed piece; returning True aborts the generation.
+
+The predicates below carry a descriptive ``__name__``, which response-cache keys include.
+"""
+
+
+def stop_after_tokens(max_tokens: int) -> StopPredicate:
+    """Abort once the streamed text reaches ``max_tokens`` estimated tokens."""
+
+    def predicate(progress: StreamProgress) -> bool:
+        return progress.tokens >= max_tokens
+
+    predicate.__name__ = f"stop_after_tokens({max_tokens})"
+    return predicate
+
+
+def stop_on_refusal(threshold: float = 0.9, window_chars: int = 200, heuristic: RefusalHeuristic | None = None) -> StopPredicate:
+    """Abort as soon as the opening ``window_chars`` characters read as a confident refusal."""
+    heuristic = heuristic or RefusalHeuristic()
+
+    def predicate(progress: StreamProgress) -> bool:
+        # The window was complete on an earlier piece and its verdict cannot change.
+        if progress.previous_chars >= window_chars:
+            return False
+        return heuristic.confidence(progress.text[:window_chars]) >= threshold
+
+    predicate.__name__ = f"stop_on_refusal({threshold}, {window_chars})"
+    return predicate
+
+
+def any_of(*predicates: StopPredicate) -> StopPredicate:
+    def predicate(progress: StreamProgress) -> bool:
+        return any(inner(progress) for inner in predicates)
+
+    predicate.__name__ = f"any_of({', '.join(inner.__name__ for inner in predicates)})"
+    return predicate
+
+
+def build_stop_predicate(after_tokens: int | None = None, on_refusal: bool = False) -> StopPredicate | None:
+    """Combine the configured abort rules; None when there are none."""
+    predicates = []
+    if after_tokens is not None:
+        predicates.append(stop_after_tokens(after_tokens))
+    if on_refusal:
+        predicates.append(stop_on_refusal())
+    if not predicates:
+        return None
+    return predicates[0] if len(predicates) == 1 else any_of(*predicates)
+
+
+class SSEReader:
+    """Accumulate the text of a server-sent-events completion stream, line by line.
+
+    ``delta`` extracts the new text from one decoded ``data:`` event and ``usage`` its
+    (prompt, completion) token counts, 0 when absent; the largest counts seen are kept.
+    ``feed`` returns True when ``stop`` asks to abort.
+    """
+
+    def __init__(
+        self,
+        delta: Callable[[dict[str, Any]], str],
+        usage: Callable[[dict[str, Any]], tuple[int, int]],
+        stop: StopPredicate | None = None,
+    ) -> None:
+        self.delta = delta
+        self.usage = usage
+        self.stop = stop
+        self.reset()
+
+    @property
+    def text(self) -> str:
+        return self.progress.text
+
+    def reset(self) -> None:
+        self.progress = StreamProgress()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.events = 0
+        self.aborted = False
+
+    def feed(self, line: bytes) -> bool:
+        if not line.startswith(b"data:"):
+            return False
+        data = line[5:].strip()
+        if not data or data == b"[DONE]":
+            return False
+        event = json.loads(data)
+        self.events += 1
+        prompt_tokens, completion_tokens = self.usage(event)
+        self.prompt_tokens = max(self.prompt_tokens, prompt_tokens)
+        self.completion_tokens = max(self.completion_tokens, completion_tokens)
+        piece = self.delta(event)
+        if piece:
+            self.progress.add(piece)
+            if self.stop is not None and self.stop(self.progress):
+                self.aborted = True
+                return True
+        return False
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import re
+
+# Word runs, single CJK characters, and single punctuation marks; whitespace is free.
+_PIECE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]|[^\W぀-ヿ㐀-䶿一-鿿가-힯]+|[^\w\s]")
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count without a tokenizer.
+
+    Each CJK character and punctuation mark counts as one token and each word as one token
+    per started four characters, which tracks BPE tokenizers closely enough for budgeting.
+    """
+    return sum(_piece_tokens(match.group()) for match in _PIECE.finditer(text))
+
+
+class TokenCounter:
+    """Running ``estimate_tokens`` of a text that arrives in pieces, in time linear in its length.
+
+    Only the trailing piece, which the next chunk may extend, is re-estimated; a long trailing
+    word keeps just its last partial four-character group pending.
+    """
+
+    __slots__ = ("_done", "_tail")
+
+    def __init__(self) -> None:
+        self._done = 0
+        self._tail = ""
+
+    @property
+    def total(self) -> int:
+        return self._done + (_piece_tokens(self._tail) if self._tail else 0)
+
+    def feed(self, chunk: str) -> int:
+        text = self._tail + chunk
+        last = None
+        for match in _PIECE.finditer(text):
+            if last is not None:
+                self._done += _piece_tokens(last.group())
+            last = match
+        self._tail = ""
+        if last is not None:
+            if last.end() < len(text):
+                self._done += _piece_tokens(last.group())
+            else:
+                # Word runs count one token per started group of four characters, so whole groups are final.
+                tail = last.group()
+                keep = len(tail) % _CHARS_PER_TOKEN or _CHARS_PER_TOKEN
+                self._done += (len(tail) - keep) // _CHARS_PER_TOKEN
+                self._tail = tail[-keep:]
+        return self.total
+
+
+def truncate_tokens(text: str, max_tokens: int, window: str = "head") -> str:
+    """Cut ``text`` to about ``max_tokens`` estimated tokens.
+
+    ``window="head"`` keeps the beginning; ``"head_tail"`` keeps half the budget from each
+    end. The dropped span is replaced by a ``[... N tokens omitted ...]`` marker.
+    """
+    if window not in {"head", "head_tail"}:
+        raise ValueError(f"Unsupported truncation window: {window}")
+    if len(text) <= max_tokens:
+        return text
+    spans: list[tuple[int, int, int]] = []
+    total = 0
+    for match in _PIECE.finditer(text):
+        tokens = _piece_tokens(match.group())
+        spans.append((match.start(), match.end(), tokens))
+        total += tokens
+    if total <= max_tokens:
+        return text
+    head_budget = max_tokens if window == "head" else max_tokens - max_tokens // 2
+    head_end, used, index = 0, 0, 0
+    while index < len(spans) and used + spans[index][2] <= head_budget:
+        head_end = spans[index][1]
+        used += spans[index][2]
+        index += 1
+    tail_start, tail_used = len(text), 0
+    if window == "head_tail":
+        back = len(spans) - 1
+        while back >= index and tail_used + spans[back][2] <= max_tokens - head_budget:
+            tail_start = spans[back][0]
+            tail_used += spans[back][2]
+            back -= 1
+    omitted = total - used - tail_used
+    return f"{text[:head_end]} [... {omitted} tokens omitted ...] {text[tail_start:]}".rstrip()
+
+
+def _piece_tokens(piece: str) -> int:
+    return -(-len(piece) // _CHARS_PER_TOKEN)
@@ -1,24 +1,239 @@
 from __future__ import annotations
 
 import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any
 
-from agent_attack.memory.skills import Skill
+from agent_attack.core.types import ObservationTag
+from agent_attack.memory.skills import Skill, SkillLibrary, SkillStats, skill_directness
+
+_COLUMNS = "name, preconditions, policy_steps, parameters, termination, count, mean, m2, decayed_mean, alpha, beta"
+
+
+class SkillVersionConflict(RuntimeError):
+    """Raised by ``SkillStore.save`` when the stored version moved past ``expected_version``."""
 
 
 class SkillStore:
-    def __init__(self, root: Path) -> None:
-        self.root = root
-        self.root.mkdir(parents=True, exist_ok=True)
-
-    def save(self, skill: Skill) -> Path:
-        path = self.root / f"{skill.name}.json"
-        payload = {
-            "name": skill.name,
-            "preconditions": [tag.value for tag in skill.preconditions],
-            "policy_steps": skill.policy_steps,
-            "parameters": skill.parameters,
-            "termination": skill.termination,
-        }
-        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-        return path
+    """Skills and their running statistics in one SQLite file, indexed by precondition tag.
+
+    Writes run in ``BEGIN IMMEDIATE`` transactions, so several worker processes can share a
+    store: ``observe`` applies one outcome as an atomic read-modify-write and every write bumps
+    the skill's ``version``. Passing a directory (the old one-JSON-file-per-skill layout)
+    stores the database as ``skills.sqlite`` inside it; ``import_json_dir`` migrates those files.
+    """
+
+    _shared: dict[Path, "SkillStore"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str | Path, timeout_s: float = 30.0) -> None:
+        path = Path(path)
+        if path.is_dir() or not path.suffix:
+            path.mkdir(parents=True, exist_ok=True)
+            path = path / "skills.sqlite"
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=timeout_s, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS skills ("
+            "name TEXT PRIMARY KEY, preconditions TEXT NOT NULL, policy_steps TEXT NOT NULL, "
+            "parameters TEXT NOT NULL, termination TEXT NOT NULL, "
+            "count INTEGER NOT NULL, mean REAL NOT NULL, m2 REAL NOT NULL, decayed_mean REAL, "
+            "alpha REAL NOT NULL, beta REAL NOT NULL, version INTEGER NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS skill_tags (tag TEXT NOT NULL, name TEXT NOT NULL, "
+            "PRIMARY KEY (tag, name)) WITHOUT ROWID"
+        )
+
+    @classmethod
+    def shared(cls, path: str | Path) -> "SkillStore":
+        key = Path(path).resolve()
+        with cls._shared_lock:
+            store = cls._shared.get(key)
+            if store is None:
+                store = cls._shared[key] = cls(key)
+            return store
+
+    def save(self, skill: Skill, expected_version: int | None = None) -> int:
+        """Insert or replace ``skill`` (definition and statistics); returns its new version.
+
+        Unlike the old JSON store, whose ``save`` returned the written file's ``Path``, there is
+        no per-skill file: the version is what a later ``save(..., expected_version=)`` checks.
+        """
+        with self._write():
+            row = self._conn.execute("SELECT version FROM skills WHERE name = ?", (skill.name,)).fetchone()
+            current = row[0] if row else 0
+            if expected_version is not None and current != expected_version:
+                raise SkillVersionConflict(f"{skill.name}: expected version {expected_version}, found {current}")
+            self._upsert(skill, current + 1)
+            return current + 1
+
+    def save_many(self, skills: Iterable[Skill]) -> int:
+        """Write many skills in a single transaction; returns how many were written."""
+        written = 0
+        with self._write():
+            versions = dict(self._conn.execute("SELECT name, version FROM skills"))
+            for skill in skills:
+                self._upsert(skill, versions.get(skill.name, 0) + 1)
+                written += 1
+        return written
+
+    def observe(self, skill: Skill, score: float, decay: float = 0.9) -> SkillStats:
+        """Fold one outcome into the stored statistics atomically and return them.
+
+        Unknown skills are inserted first with empty statistics, so concurrent workers never
+        overwrite each other's observations. The stored ``directness`` parameter is recomputed
+        from the merged statistics, as ``SkillLibrary.observe_transition`` does in memory.
+        """
+        with self._write():
+            row = self._conn.execute(
+                "SELECT count, mean, m2, decayed_mean, alpha, beta, version, parameters FROM skills WHERE name = ?",
+                (skill.name,),
+            ).fetchone()
+            if row is None:
+                stats, version, parameters = SkillStats(), 0, dict(skill.parameters)
+                self._upsert(skill, 0, stats)
+            else:
+                stats, version, parameters = SkillStats(*row[:6]), row[6], json.loads(row[7])
+            stats.update(score, decay)
+            parameters["directness"] = skill_directness(stats)
+            self._conn.execute(
+                "UPDATE skills SET count = ?, mean = ?, m2 = ?, decayed_mean = ?, alpha = ?, beta = ?, "
+                "parameters = ?, version = ?, updated = ? WHERE name = ?",
+                (*_stats_row(stats), json.dumps(parameters), version + 1, time.time(), skill.name),
+            )
+            return stats
+
+    def delete(self, name: str) -> bool:
+        with self._write():
+            self._conn.execute("DELETE FROM skill_tags WHERE name = ?", (name,))
+            return self._conn.execute("DELETE FROM skills WHERE name = ?", (name,)).rowcount > 0
+
+    def get(self, name: str) -> Skill | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM skills WHERE name = ?", (name,)).fetchone()
+        return _skills_from_rows([row])[0] if row else None
+
+    def version(self, name: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM skills WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def load_all(self) -> list[Skill]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {_COLUMNS} FROM skills ORDER BY rowid").fetchall()
+        return _skills_from_rows(rows)
+
+    def by_tag(self, *tags: ObservationTag) -> list[Skill]:
+        """Skills with any of ``tags`` among their preconditions, via the tag index."""
+        if not tags:
+            return []
+        marks = ", ".join("?" * len(tags))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM skills WHERE name IN "
+                f"(SELECT name FROM skill_tags WHERE tag IN ({marks})) ORDER BY rowid",
+                [tag.value for tag in tags],
+            ).fetchall()
+        return _skills_from_rows(rows)
+
+    def load_into(self, library: SkillLibrary, tags: Iterable[ObservationTag] | None = None) -> int:
+        """Bulk-load stored skills (all, or those matching ``tags``) into ``library``."""
+        skills = self.load_all() if tags is None else self.by_tag(*tags)
+        library.add_skills(skills)
+        return len(skills)
+
+    def import_json_dir(self, root: str | Path) -> int:
+        """Migrate skills saved by the old one-JSON-file-per-skill store."""
+        skills = []
+        for path in sorted(Path(root).glob("*.json")):
+            data = json.loads(path.read_text(encoding="utf-8"))
+            skills.append(
+                Skill(
+                    name=data["name"],
+                    preconditions=[ObservationTag(tag) for tag in data.get("preconditions", [])],
+                    policy_steps=list(data.get("policy_steps", [])),
+                    parameters=dict(data.get("parameters", {})),
+                    termination=data.get("termination", "on_progress_or_refusal"),
+                )
+            )
+        return self.save_many(skills)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            skills, observations = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(count), 0) FROM skills").fetchone()
+            tags = dict(self._conn.execute("SELECT tag, COUNT(*) FROM skill_tags GROUP BY tag"))
+        return {"skills": skills, "observations": observations, "by_tag": tags}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _write(self) -> Iterator[None]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _upsert(self, skill: Skill, version: int, stats: SkillStats | None = None) -> None:
+        self._conn.execute(
+            f"INSERT INTO skills({_COLUMNS}, version, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET preconditions = excluded.preconditions, "
+            "policy_steps = excluded.policy_steps, parameters = excluded.parameters, "
+            "termination = excluded.termination, count = excluded.count, mean = excluded.mean, m2 = excluded.m2, "
+            "decayed_mean = excluded.decayed_mean, alpha = excluded.alpha, beta = excluded.beta, "
+            "version = excluded.version, updated = excluded.updated",
+            (
+                skill.name,
+                json.dumps([tag.value for tag in skill.preconditions]),
+                json.dumps(skill.policy_steps),
+                json.dumps(skill.parameters),
+                skill.termination,
+                *_stats_row(stats or skill.stats),
+                version,
+                time.time(),
+            ),
+        )
+        self._conn.execute("DELETE FROM skill_tags WHERE name = ?", (skill.name,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO skill_tags(tag, name) VALUES (?, ?)",
+            [(tag.value, skill.name) for tag in skill.preconditions],
+        )
+
+
+def _stats_row(stats: SkillStats) -> tuple[int, float, float, float | None, float, float]:
+    return (stats.count, stats.mean, stats.m2, stats.decayed_mean, stats.alpha, stats.beta)
+
+
+def _skills_from_rows(rows: list[tuple[Any, ...]]) -> list[Skill]:
+    """Decode rows into skills, parsing each JSON column of all rows with one ``json.loads``."""
+
+    def column(index: int) -> list[Any]:
+        return json.loads("[" + ",".join(row[index] for row in rows) + "]")
+
+    tags = ObservationTag._value2member_map_
+    return [
+        Skill(
+            name=row[0],
+            preconditions=[tags[tag] for tag in preconditions],
+            policy_steps=policy_steps,
+            parameters=parameters,
+            termination=row[4],
+            stats=SkillStats(*row[5:]),
+        )
+        for row, preconditions, policy_steps, parameters in zip(rows, column(1), column(2), column(3))
+    ]